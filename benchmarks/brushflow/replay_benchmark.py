@@ -0,0 +1,373 @@
+"""
+刷流离线回放测试
+
+基于 JSON 夹具回放刷流（brush）及检查（check）流程，输出各阶段的耗时、CPU时间及内存峰值，
+用于在发布前评估任务规模增长（默认 1k/10k/50k 个刷流任务）时的性能回退。
+
+站点、种子、下载器及插件数据均使用内存中的替身对象，不会访问网络、数据库或真实下载器。
+本脚本不随插件发布，需在已安装刷流插件的 MoviePilot 运行环境中，于 MoviePilot 根目录执行：
+
+    PYTHONPATH=. python /path/to/benchmarks/brushflow/replay_benchmark.py --sizes 1000 10000 50000
+
+夹具不存在时按固定随机种子生成并保存到 --fixtures 目录（默认为系统临时目录），之后重复运行将直接回放已保存的夹具，
+使用 --regenerate 可重新生成。
+"""
+import argparse
+import copy
+import hashlib
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import app.plugins.brushflow as brushflow_module
+from app.plugins.brushflow import BrushConfig, BrushFlow, BrushTaskStore, PhaseTimer
+from app.schemas import TorrentInfo
+from app.utils.string import StringUtils
+
+# 站点数量
+SITE_COUNT = 5
+# 每个站点每次返回的种子数
+SITE_TORRENT_COUNT = 200
+# 刷流标签，与 BrushConfig.brush_tag 保持一致
+BRUSH_TAG = "刷流"
+# 回放使用的刷流配置
+REPLAY_CONFIG = {
+    "enabled": True,
+    "notify": False,
+    "brushsites": list(range(1, SITE_COUNT + 1)),
+    "downloader": "replay",
+    "disksize": 10 ** 7,
+    "freeleech": "free",
+    "hr": "yes",
+    "pubtime": "0-1440",
+    "seed_ratio": 2,
+    "seed_time": 240,
+    "auto_archive_days": 7,
+    # 开启动态删除，阈值远小于夹具的做种体积，保证每次回放都会执行动态删除
+    "proxy_delete": True,
+    "delete_size_range": "1-2",
+    "except_subscribe": False,
+    "brush_sequential": True,
+    "download_batch": 10,
+    "browse_workers": 4,
+}
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha1("-".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def generate_fixtures(task_count: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成指定任务规模的夹具：刷流任务、下载器种子及各站点的新种子
+    """
+    rnd = random.Random(seed + task_count)
+    now = int(time.time())
+    tasks: Dict[str, dict] = {}
+    downloader_torrents: List[dict] = []
+    for i in range(task_count):
+        torrent_hash = _hash("task", task_count, i)
+        site_id = i % SITE_COUNT + 1
+        size = rnd.randint(1, 50) * 1024 ** 3
+        added_on = now - rnd.randint(600, 30 * 86400)
+        deleted = rnd.random() < 0.3
+        ratio = round(rnd.uniform(0, 3), 2)
+        tasks[torrent_hash] = {
+            "site": site_id,
+            "site_name": f"site{site_id}",
+            "title": f"Replay.Torrent.{i}.2024.1080p.WEB-DL",
+            "size": size,
+            "pubdate": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(added_on - 60)),
+            "description": f"Replay torrent {i}",
+            "imdbid": None,
+            "page_url": f"https://site{site_id}.example/details.php?id={i}",
+            "date_elapsed": None,
+            "freedate": None,
+            "uploadvolumefactor": 1,
+            "downloadvolumefactor": 0,
+            "hit_and_run": rnd.random() < 0.1,
+            "volume_factor": "免费",
+            "freedate_diff": "",
+            "ratio": ratio,
+            "downloaded": size,
+            "uploaded": int(size * ratio),
+            "seeding_time": max(0, now - added_on - 600),
+            "deleted": deleted,
+            "deleted_time": added_on + 86400 if deleted else None,
+            "time": added_on
+        }
+        if deleted:
+            continue
+        # 少量种子移除刷流标签，覆盖标签同步流程
+        tags = ["已整理", BRUSH_TAG] if rnd.random() > 0.01 else ["已整理"]
+        downloader_torrents.append({
+            "hash": torrent_hash,
+            "name": tasks[torrent_hash]["title"],
+            "added_on": added_on,
+            "completion_on": added_on + 600,
+            "last_activity": now - rnd.randint(0, 86400),
+            "ratio": ratio,
+            "uploaded": int(size * ratio),
+            "downloaded": size,
+            "size": size,
+            "total_size": size,
+            "tags": ",".join(tags),
+            "tracker": f"https://tracker.site{site_id}.example/announce",
+            "state": "stalledUP"
+        })
+
+    existing_titles = [task["title"] for task in tasks.values()]
+    site_torrents: Dict[str, List[dict]] = {}
+    for site_id in range(1, SITE_COUNT + 1):
+        torrents = []
+        for j in range(SITE_TORRENT_COUNT):
+            # 部分种子与已有任务重复，覆盖去重流程
+            if existing_titles and rnd.random() < 0.3:
+                title = rnd.choice(existing_titles)
+            else:
+                title = f"Replay.New.{site_id}.{j}.2024.2160p.WEB-DL"
+            torrents.append({
+                "site": site_id,
+                "site_name": f"site{site_id}",
+                "title": title,
+                "description": f"Replay new torrent {site_id}-{j}",
+                "enclosure": f"magnet:?xt=urn:btih:{_hash('new', task_count, site_id, j)}",
+                "page_url": f"https://site{site_id}.example/details.php?id=new{j}",
+                "size": rnd.randint(1, 50) * 1024 ** 3,
+                "seeders": rnd.randint(0, 50),
+                "peers": rnd.randint(0, 200),
+                "grabs": rnd.randint(0, 500),
+                "pubdate": time.strftime("%Y-%m-%d %H:%M:%S",
+                                         time.localtime(now - rnd.randint(60, 3 * 86400))),
+                "uploadvolumefactor": rnd.choice([1, 2]),
+                "downloadvolumefactor": rnd.choice([0, 0, 0.5, 1]),
+                "hit_and_run": rnd.random() < 0.2
+            })
+        site_torrents[str(site_id)] = torrents
+
+    return {
+        "tasks": tasks,
+        "downloader_torrents": downloader_torrents,
+        "site_torrents": site_torrents
+    }
+
+
+def load_fixtures(fixtures_dir: Path, task_count: int, regenerate: bool = False) -> Dict[str, Any]:
+    """
+    读取夹具，不存在或要求重新生成时生成并保存
+    """
+    fixture_file = fixtures_dir / f"brushflow_{task_count}.json"
+    if fixture_file.exists() and not regenerate:
+        return json.loads(fixture_file.read_text(encoding="utf-8"))
+    fixtures = generate_fixtures(task_count)
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    fixture_file.write_text(json.dumps(fixtures, ensure_ascii=False), encoding="utf-8")
+    return fixtures
+
+
+class ReplayTorrent(dict):
+    """
+    qBittorrent 种子替身，兼容字典及属性访问
+    """
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item)
+
+
+class ReplayDownloader:
+    """
+    qBittorrent 下载器替身
+    """
+    qbc = None
+
+    def __init__(self, torrents: List[dict]):
+        self.torrents: Dict[str, ReplayTorrent] = {torrent["hash"]: ReplayTorrent(torrent) for torrent in torrents}
+
+    @staticmethod
+    def is_inactive() -> bool:
+        return False
+
+    def get_torrents(self, ids: Any = None, **kwargs) -> Tuple[List[ReplayTorrent], bool]:
+        if ids:
+            ids = {ids} if isinstance(ids, str) else set(ids)
+            return [torrent for torrent_hash, torrent in self.torrents.items() if torrent_hash in ids], False
+        return list(self.torrents.values()), False
+
+    @staticmethod
+    def get_downloading_torrents(**kwargs) -> List[ReplayTorrent]:
+        return []
+
+    def get_completed_torrents(self, ids: Any = None, **kwargs) -> List[ReplayTorrent]:
+        torrents, _ = self.get_torrents(ids=ids)
+        return [torrent for torrent in torrents if torrent.get("completion_on")]
+
+    def add_torrent(self, content: Any, tag: List[str] = None, **kwargs) -> bool:
+        if not isinstance(content, str) or not content.startswith("magnet"):
+            return False
+        btih = parse_qs(urlparse(content).query)["xt"][0].split(":")[-1].lower()
+        now = int(time.time())
+        self.torrents[btih] = ReplayTorrent({
+            "hash": btih, "name": btih, "added_on": now, "completion_on": 0, "last_activity": now,
+            "ratio": 0, "uploaded": 0, "downloaded": 0, "size": 0, "total_size": 0,
+            "tags": ",".join(tag or []), "tracker": "", "state": "downloading"
+        })
+        return True
+
+    @staticmethod
+    def get_torrent_id_by_tag(**kwargs) -> Optional[str]:
+        return None
+
+    def delete_torrents(self, ids: List[str], **kwargs) -> bool:
+        for torrent_hash in ids or []:
+            self.torrents.pop(torrent_hash, None)
+        return True
+
+
+class ReplayDownloaderHelper:
+    """
+    下载器帮助类替身
+    """
+
+    def __init__(self, downloader: ReplayDownloader):
+        self.service = SimpleNamespace(name=REPLAY_CONFIG["downloader"], type="qbittorrent", instance=downloader)
+
+    def get_service(self, name: str = None, **kwargs):
+        return self.service if name == self.service.name else None
+
+    @staticmethod
+    def is_downloader(service_type: str, service: Any = None) -> bool:
+        return bool(service) and service.type == service_type
+
+
+class ReplayTorrentsChain:
+    """
+    站点种子获取替身，按夹具返回种子
+    """
+
+    def __init__(self, site_torrents: Dict[str, List[dict]]):
+        self.domain_torrents = {f"site{site_id}.example": torrents for site_id, torrents in site_torrents.items()}
+
+    def browse(self, domain: str) -> List[TorrentInfo]:
+        return [TorrentInfo(**torrent) for torrent in self.domain_torrents.get(domain, [])]
+
+
+class ReplaySiteOper:
+    """
+    站点数据替身
+    """
+
+    @staticmethod
+    def get(site_id: int):
+        return SimpleNamespace(id=site_id, name=f"site{site_id}", domain=f"site{site_id}.example")
+
+
+class ReplayBrushFlow(BrushFlow):
+    """
+    回放用刷流插件，插件数据保存在内存中，外部依赖均替换为替身对象
+    """
+
+    # noinspection PyMissingConstructor
+    def __init__(self, fixtures: Dict[str, Any]):
+        self.plugin_data: Dict[str, Any] = {}
+        self.sites_helper = SimpleNamespace(get_indexers=lambda: [], get_indexer=lambda domain: None)
+        self.site_oper = ReplaySiteOper()
+        self.torrents_chain = ReplayTorrentsChain(fixtures["site_torrents"])
+        self.subscribe_oper = SimpleNamespace(list=lambda: [])
+        self.downloader_helper = ReplayDownloaderHelper(ReplayDownloader(fixtures["downloader_torrents"]))
+        self.eventmanager = SimpleNamespace(send_event=lambda **kwargs: None)
+        self.systemmessage = SimpleNamespace(put=lambda *args, **kwargs: None)
+        self.chain = SimpleNamespace(run_module=lambda *args, **kwargs: [])
+        self._brush_config = BrushConfig(config=REPLAY_CONFIG)
+        self._subscribe_infos = {}
+        self._bandwidth_sampler = None
+        self._torrent_mirror = None
+        self._task_brush_enable = False
+        # 预先写入刷流任务，再以新的任务存储模拟进程重启后首次加载
+        BrushTaskStore(plugin=self).save(copy.deepcopy(fixtures["tasks"]))
+        self._task_store = BrushTaskStore(plugin=self)
+
+    def get_data(self, key: str = None, plugin_id: str = None) -> Any:
+        return copy.deepcopy(self.plugin_data.get(key))
+
+    def save_data(self, key: str, value: Any, plugin_id: str = None):
+        self.plugin_data[key] = copy.deepcopy(value)
+
+    def del_data(self, key: str, plugin_id: str = None):
+        self.plugin_data.pop(key, None)
+
+    def post_message(self, *args, **kwargs):
+        pass
+
+    def update_config(self, *args, **kwargs):
+        pass
+
+
+def run_replay(fixtures: Dict[str, Any]) -> List[Tuple[PhaseTimer, int, int]]:
+    """
+    回放一次刷流及检查，返回各流程的统计结果、任务数及内存峰值
+    """
+    results: List[Tuple[PhaseTimer, int, int]] = []
+
+    class CollectingPhaseTimer(PhaseTimer):
+        """
+        在输出统计时收集统计结果
+        """
+
+        def log(self, task_count: int):
+            results.append((self, task_count, tracemalloc.get_traced_memory()[1]))
+            super().log(task_count)
+
+    plugin = ReplayBrushFlow(fixtures)
+    # 仅在回放期间替换插件模块中的 PhaseTimer
+    brushflow_module.PhaseTimer = CollectingPhaseTimer
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        plugin.brush()
+        tracemalloc.reset_peak()
+        plugin.check()
+    finally:
+        tracemalloc.stop()
+        brushflow_module.PhaseTimer = PhaseTimer
+    return results
+
+
+def print_report(task_count: int, results: List[Tuple[PhaseTimer, int, int]]):
+    """
+    输出统计报告
+    """
+    print(f"\n===== 任务规模 {task_count} =====")
+    for timer, count, peak in results:
+        total = sum(phase[1] for phase in timer.phases)
+        cpu = sum(phase[2] for phase in timer.phases)
+        print(f"{timer.name}：任务数 {count}，总耗时 {total * 1000:.1f}ms，CPU {cpu * 1000:.1f}ms，"
+              f"内存峰值 {StringUtils.str_filesize(peak)}")
+        for phase, elapsed, phase_cpu, phase_peak in timer.phases:
+            peak_text = StringUtils.str_filesize(phase_peak) if phase_peak is not None else "-"
+            print(f"  {phase:<12} 耗时 {elapsed * 1000:>10.1f}ms  CPU {phase_cpu * 1000:>10.1f}ms  峰值内存 {peak_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="刷流离线回放测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="刷流任务规模")
+    parser.add_argument("--fixtures", type=Path, default=Path(tempfile.gettempdir()) / "brushflow_replay",
+                        help="夹具目录")
+    parser.add_argument("--regenerate", action="store_true", help="重新生成夹具")
+    args = parser.parse_args()
+
+    for task_count in args.sizes:
+        fixtures = load_fixtures(args.fixtures, task_count, regenerate=args.regenerate)
+        print_report(task_count, run_replay(fixtures))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 import base64
+import hashlib
+import heapq
 import json
+import math
 import random
 import re
 import threading
 import time
+import tracemalloc
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from datetime import datetime, timedelta
-from typing import Any, List, Dict, Tuple, Optional, Union, Set
+from typing import Any, List, Dict, Tuple, Optional, Union, Set, Callable, Deque, Iterator
 from urllib.parse import urlparse, parse_qs, unquote, parse_qsl, urlencode, urlunparse
 
 import pytz
+from bencode import bdecode
 from app.helper.sites import SitesHelper
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -77,6 +85,11 @@ class BrushConfig:
         self.qb_category = config.get("qb_category")
         self.site_hr_active = config.get("site_hr_active", False)
         self.site_skip_tips = config.get("site_skip_tips", False)
+        self.browse_workers = self.__parse_number(config.get("browse_workers"))
+        self.browse_timeout = self.__parse_number(config.get("browse_timeout"))
+        self.bandwidth_mode = config.get("bandwidth_mode", "avg")
+        self.downloader_sync = config.get("downloader_sync", False)
+        self.download_batch = self.__parse_number(config.get("download_batch"))
 
         self.brush_tag = "刷流"
         # 站点独立配置
@@ -241,6 +254,660 @@ class BrushConfig:
         return self.__str__()
 
 
+class TorrentTaskIndex:
+    """
+    刷流任务索引，用于在刷流过程中以O(1)的代价判断重复种子
+    """
+
+    def __init__(self, torrent_tasks: Dict[str, dict] = None):
+        # 站点名称+标题
+        self.site_titles: Set[Tuple[str, str]] = set()
+        # 站点名称+种子详情地址
+        self.site_page_urls: Set[Tuple[str, str]] = set()
+        # 标题 -> 尚未开始做种的任务所属站点名称
+        self.unfinished_titles: Dict[str, Set[str]] = {}
+
+        for task in (torrent_tasks or {}).values():
+            self.add(task)
+
+    def add(self, task: dict):
+        """
+        将刷流任务加入索引
+        """
+        if not task:
+            return
+        site_name = f"{task.get('site_name')}"
+        title = f"{task.get('title')}"
+        self.site_titles.add((site_name, title))
+        self.site_page_urls.add((site_name, f"{task.get('page_url')}"))
+        if not task.get("seed_time"):
+            self.unfinished_titles.setdefault(title, set()).add(site_name)
+
+    def remove(self, task: dict):
+        """
+        将刷流任务移出索引，用于撤销添加失败种子的预占位
+        """
+        if not task:
+            return
+        site_name = f"{task.get('site_name')}"
+        title = f"{task.get('title')}"
+        self.site_titles.discard((site_name, title))
+        self.site_page_urls.discard((site_name, f"{task.get('page_url')}"))
+        sites = self.unfinished_titles.get(title)
+        if sites is not None:
+            sites.discard(site_name)
+            if not sites:
+                del self.unfinished_titles[title]
+
+    def contains_title(self, site_name: str, title: str) -> bool:
+        """
+        判断站点中是否已存在相同标题的任务
+        """
+        return (f"{site_name}", f"{title}") in self.site_titles
+
+    def contains_page_url(self, site_name: str, page_url: str) -> bool:
+        """
+        判断站点中是否已存在相同详情地址的任务
+        """
+        return (f"{site_name}", f"{page_url}") in self.site_page_urls
+
+    def contains_unfinished_in_other_site(self, site_name: str, title: str) -> bool:
+        """
+        判断其他站点是否存在尚未开始做种的相同标题任务
+        """
+        sites = self.unfinished_titles.get(title)
+        if not sites:
+            return False
+        return any(site != site_name for site in sites)
+
+
+class PhaseTimer:
+    """
+    分阶段性能统计，依次记录各阶段的耗时及进程CPU时间，用于评估刷流及检查流程随任务规模增长的开销
+    如通过 PYTHONTRACEMALLOC 等方式启用了 tracemalloc，会同时记录各阶段的内存峰值
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.phases: List[Tuple[str, float, float, Optional[int]]] = []
+        self._tracing = tracemalloc.is_tracing()
+        self.__reset()
+
+    def __reset(self):
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self._tracing:
+            tracemalloc.reset_peak()
+
+    def lap(self, phase: str):
+        """
+        结束当前阶段并开始下一阶段
+        """
+        peak = tracemalloc.get_traced_memory()[1] if self._tracing else None
+        self.phases.append((phase, time.perf_counter() - self._start, time.process_time() - self._cpu_start, peak))
+        self.__reset()
+
+    def log(self, task_count: int):
+        """
+        以DEBUG级别输出各阶段统计
+        """
+        if not self.phases:
+            return
+        details = []
+        for phase, elapsed, cpu, peak in self.phases:
+            detail = f"{phase} {elapsed * 1000:.1f}ms/CPU {cpu * 1000:.1f}ms"
+            if peak is not None:
+                detail += f"/峰值内存 {StringUtils.str_filesize(peak)}"
+            details.append(detail)
+        total = sum(phase[1] for phase in self.phases)
+        logger.debug(f"{self.name}性能统计，任务数 {task_count}，总耗时 {total * 1000:.1f}ms：{'，'.join(details)}")
+
+
+class TaskStatistics:
+    """
+    未归档刷流任务的统计数据，在任务新增、更新、删除、归档时增量维护
+    变更任务前先以 sign=-1 扣除旧值，变更后再累加新值
+    """
+    fields = ["count", "deleted", "active", "seeding_size", "uploaded", "downloaded",
+              "active_uploaded", "active_downloaded"]
+
+    def __init__(self):
+        self.count = 0
+        self.deleted = 0
+        self.active = 0
+        self.seeding_size = 0
+        self.uploaded = 0
+        self.downloaded = 0
+        self.active_uploaded = 0
+        self.active_downloaded = 0
+
+    def apply(self, task: dict, sign: int = 1):
+        """
+        累加（sign=1）或扣除（sign=-1）单个任务
+        """
+        if not task:
+            return
+        uploaded = task.get("uploaded") or 0
+        downloaded = task.get("downloaded") or 0
+        self.count += sign
+        self.uploaded += sign * uploaded
+        self.downloaded += sign * downloaded
+        if task.get("deleted"):
+            self.deleted += sign
+        else:
+            self.active += sign
+            self.seeding_size += sign * (task.get("size") or 0)
+            self.active_uploaded += sign * uploaded
+            self.active_downloaded += sign * downloaded
+
+    def reconcile(self, tasks: Dict[str, dict]):
+        """
+        基于全部任务重新计算
+        """
+        self.__init__()
+        for task in tasks.values():
+            self.apply(task)
+
+    def copy(self) -> "TaskStatistics":
+        statistics = TaskStatistics()
+        for field in self.fields:
+            setattr(statistics, field, getattr(self, field))
+        return statistics
+
+    def to_dict(self) -> Dict[str, float]:
+        return {field: getattr(self, field) for field in self.fields}
+
+
+class BrushTaskStore:
+    """
+    刷流任务存储
+    - 刷流任务按Hash分桶保存，每次仅写回存在变更任务的分桶
+    - 归档任务按页追加保存，只会写入最后一页，不再整体重写
+    - 统计数据随任务变更增量维护，加载时定期全量校准
+    """
+    # 刷流任务分桶数量
+    bucket_count = 32
+    # 归档任务每页数量
+    archived_page_size = 500
+    # 统计数据全量校准间隔（秒）
+    statistics_reconcile_interval = 6 * 3600
+
+    def __init__(self, plugin: _PluginBase):
+        self._plugin = plugin
+        # 最近一次加载或保存时的任务快照，用于判断任务是否发生变更
+        self._snapshots: Dict[str, dict] = {}
+        # 只读缓存及排序索引，任务加载或保存后重建
+        self._cache: Optional[Dict[str, dict]] = None
+        self._sorted_cache: Dict[Tuple[str, bool], List[dict]] = {}
+        self._version = 0
+        self._cache_lock = threading.Lock()
+        # 当前任务的统计数据，任务变更时需同步维护
+        self.statistics = TaskStatistics()
+        # 最近一次保存时的统计数据，及最近一次全量校准的时间
+        self._saved_statistics: Optional[TaskStatistics] = None
+        self._reconciled_at = 0.0
+
+    @classmethod
+    def bucket_of(cls, torrent_hash: str) -> int:
+        """
+        计算种子Hash所在的分桶
+        """
+        return zlib.crc32(str(torrent_hash).encode("utf-8")) % cls.bucket_count
+
+    @staticmethod
+    def __bucket_key(bucket: int) -> str:
+        return f"torrents_{bucket}"
+
+    @staticmethod
+    def __archived_key(page: int) -> str:
+        return f"archived_{page}"
+
+    def migrate(self):
+        """
+        将旧版本整体保存的 torrents / archived 数据迁移为分桶及分页存储
+        """
+        legacy_tasks = self._plugin.get_data("torrents")
+        if legacy_tasks and isinstance(legacy_tasks, dict):
+            grouped: Dict[int, Dict[str, dict]] = {}
+            for torrent_hash, task in legacy_tasks.items():
+                grouped.setdefault(self.bucket_of(torrent_hash), {})[torrent_hash] = task
+            for bucket, bucket_tasks in grouped.items():
+                existing = self._plugin.get_data(self.__bucket_key(bucket)) or {}
+                existing.update(bucket_tasks)
+                self._plugin.save_data(self.__bucket_key(bucket), existing)
+            logger.info(f"已将 {len(legacy_tasks)} 个刷流任务迁移为分桶存储")
+        if legacy_tasks is not None:
+            self._plugin.del_data("torrents")
+
+        legacy_archived = self._plugin.get_data("archived")
+        if legacy_archived and isinstance(legacy_archived, dict):
+            self.append_archived(legacy_archived)
+            logger.info(f"已将 {len(legacy_archived)} 个归档任务迁移为分页存储")
+        if legacy_archived is not None:
+            self._plugin.del_data("archived")
+
+        self.__reset_cache(None)
+        self._saved_statistics = None
+
+    def __reset_cache(self, tasks: Optional[Dict[str, dict]]):
+        with self._cache_lock:
+            self._version += 1
+            self._cache = tasks
+            self._sorted_cache = {}
+
+    def __read_tasks(self) -> Dict[str, dict]:
+        tasks: Dict[str, dict] = {}
+        for bucket in range(self.bucket_count):
+            tasks.update(self._plugin.get_data(self.__bucket_key(bucket)) or {})
+        return tasks
+
+    def load(self) -> Dict[str, dict]:
+        """
+        加载刷流任务并记录快照，需在刷流锁内调用，后续通过 save 写回变更
+        """
+        tasks = self.__read_tasks()
+        self._snapshots = {torrent_hash: dict(task) for torrent_hash, task in tasks.items()}
+        self.__reset_cache(self._snapshots)
+        self.__load_statistics(tasks)
+        return tasks
+
+    def __load_statistics(self, tasks: Dict[str, dict]):
+        """
+        恢复最近一次保存时的统计数据，首次加载或超过校准间隔时全量重新计算
+        """
+        if self._saved_statistics and time.time() - self._reconciled_at < self.statistics_reconcile_interval:
+            self.statistics = self._saved_statistics.copy()
+            return
+        statistics = TaskStatistics()
+        statistics.reconcile(tasks)
+        if self._saved_statistics and statistics.to_dict() != self._saved_statistics.to_dict():
+            logger.debug(f"刷流任务统计数据已校准，校准前 {self._saved_statistics.to_dict()}，"
+                         f"校准后 {statistics.to_dict()}")
+        self.statistics = statistics
+        self._saved_statistics = statistics.copy()
+        self._reconciled_at = time.time()
+
+    def get_tasks(self) -> Dict[str, dict]:
+        """
+        只读获取刷流任务，优先使用最近一次加载或保存的缓存，返回结果请勿修改
+        """
+        with self._cache_lock:
+            cache, version = self._cache, self._version
+        if cache is not None:
+            return cache
+        tasks = self.__read_tasks()
+        with self._cache_lock:
+            # 读取期间如果任务已经重新加载或保存，则不使用本次结果覆盖缓存
+            if self._version == version:
+                self._cache = tasks
+                self._sorted_cache = {}
+        return tasks
+
+    def get_sorted_tasks(self, sort_key: str, reverse: bool = True, default: Any = 0) -> List[dict]:
+        """
+        获取按指定字段排序的刷流任务，排序结果在任务变更前会被缓存复用
+        """
+        tasks = self.get_tasks()
+        with self._cache_lock:
+            version = self._version
+            sorted_tasks = self._sorted_cache.get((sort_key, reverse))
+        if sorted_tasks is None:
+            sorted_tasks = sorted(tasks.values(),
+                                  key=lambda task: task.get(sort_key) if task.get(sort_key) is not None else default,
+                                  reverse=reverse)
+            with self._cache_lock:
+                if self._version == version:
+                    self._sorted_cache[(sort_key, reverse)] = sorted_tasks
+        return sorted_tasks
+
+    def save(self, tasks: Dict[str, dict]):
+        """
+        仅写回存在新增、变更或移除任务的分桶
+        """
+        dirty_buckets = {self.bucket_of(torrent_hash) for torrent_hash, task in tasks.items()
+                         if self._snapshots.get(torrent_hash) != task}
+        dirty_buckets.update(self.bucket_of(torrent_hash) for torrent_hash in self._snapshots.keys() - tasks.keys())
+        self._saved_statistics = self.statistics.copy()
+        if not dirty_buckets:
+            return
+
+        grouped: Dict[int, Dict[str, dict]] = {bucket: {} for bucket in dirty_buckets}
+        for torrent_hash, task in tasks.items():
+            bucket_tasks = grouped.get(self.bucket_of(torrent_hash))
+            if bucket_tasks is not None:
+                bucket_tasks[torrent_hash] = task
+        for bucket, bucket_tasks in grouped.items():
+            if bucket_tasks:
+                self._plugin.save_data(self.__bucket_key(bucket), bucket_tasks)
+            else:
+                self._plugin.del_data(self.__bucket_key(bucket))
+
+        self._snapshots = {torrent_hash: dict(task) for torrent_hash, task in tasks.items()}
+        self.__reset_cache(self._snapshots)
+        logger.debug(f"刷流任务已保存，写入分桶数 {len(dirty_buckets)}/{self.bucket_count}")
+
+    def __get_archived_meta(self) -> Dict[str, int]:
+        meta = self._plugin.get_data("archived_meta") or {"pages": 0, "count": 0}
+        # 早期版本的分页元数据没有统计信息，这里补充计算一次
+        if "uploaded" not in meta:
+            deleted, uploaded, downloaded = 0, 0, 0
+            for page in range(meta.get("pages", 0)):
+                for task in self.get_archived_page(page).values():
+                    deleted += 1 if task.get("deleted") else 0
+                    uploaded += task.get("uploaded") or 0
+                    downloaded += task.get("downloaded") or 0
+            meta.update({"deleted": deleted, "uploaded": uploaded, "downloaded": downloaded})
+            if meta.get("pages"):
+                self._plugin.save_data("archived_meta", meta)
+        return meta
+
+    def append_archived(self, tasks: Dict[str, dict]):
+        """
+        追加归档任务，仅写入最后一页及新增的分页
+        """
+        if not tasks:
+            return
+        meta = self.__get_archived_meta()
+        page = max(meta.get("pages", 0) - 1, 0)
+        page_tasks: Dict[str, dict] = self._plugin.get_data(self.__archived_key(page)) or {}
+        for torrent_hash, task in tasks.items():
+            if len(page_tasks) >= self.archived_page_size:
+                self._plugin.save_data(self.__archived_key(page), page_tasks)
+                page += 1
+                page_tasks = {}
+            page_tasks[torrent_hash] = task
+        self._plugin.save_data(self.__archived_key(page), page_tasks)
+        meta.update({
+            "pages": page + 1,
+            "count": meta.get("count", 0) + len(tasks),
+            "deleted": meta.get("deleted", 0) + sum(1 for task in tasks.values() if task.get("deleted")),
+            "uploaded": meta.get("uploaded", 0) + sum(task.get("uploaded") or 0 for task in tasks.values()),
+            "downloaded": meta.get("downloaded", 0) + sum(task.get("downloaded") or 0 for task in tasks.values())
+        })
+        self._plugin.save_data("archived_meta", meta)
+
+    def get_archived_page(self, page: int) -> Dict[str, dict]:
+        """
+        获取指定页的归档任务
+        """
+        return self._plugin.get_data(self.__archived_key(page)) or {}
+
+    def iter_archived_pages(self) -> Iterator[Dict[str, dict]]:
+        """
+        逐页遍历归档任务
+        """
+        for page in range(self.__get_archived_meta().get("pages", 0)):
+            yield self.get_archived_page(page)
+
+    def get_archived_tasks(self) -> Dict[str, dict]:
+        """
+        获取全部归档任务
+        """
+        archived_tasks: Dict[str, dict] = {}
+        for page_tasks in self.iter_archived_pages():
+            archived_tasks.update(page_tasks)
+        return archived_tasks
+
+    def archived_count(self) -> int:
+        """
+        归档任务数量
+        """
+        return self.__get_archived_meta().get("count", 0)
+
+    def get_statistic_info(self) -> Dict[str, int]:
+        """
+        汇总当前任务及归档任务的统计数据
+        """
+        meta = self.__get_archived_meta()
+        statistics = self.statistics
+        return {
+            "count": statistics.count + meta.get("count", 0),
+            "deleted": statistics.deleted + meta.get("deleted", 0),
+            "uploaded": statistics.uploaded + meta.get("uploaded", 0),
+            "downloaded": statistics.downloaded + meta.get("downloaded", 0),
+            "unarchived": statistics.deleted,
+            "active": statistics.active,
+            "active_uploaded": statistics.active_uploaded,
+            "active_downloaded": statistics.active_downloaded
+        }
+
+    def clear(self):
+        """
+        清空全部刷流任务及归档任务
+        """
+        for bucket in range(self.bucket_count):
+            self._plugin.del_data(self.__bucket_key(bucket))
+        for page in range(self.__get_archived_meta().get("pages", 0)):
+            self._plugin.del_data(self.__archived_key(page))
+        self._plugin.del_data("archived_meta")
+        self._plugin.del_data("torrents")
+        self._plugin.del_data("archived")
+        self._snapshots = {}
+        self.__reset_cache(None)
+        self.statistics = TaskStatistics()
+        self._saved_statistics = None
+
+
+class TorrentRecord:
+    """
+    下载器种子的标准化记录，每次检查时每个种子仅构建一次，后续删种流程直接读取属性
+    """
+    __slots__ = ("hash", "title", "seeding_time", "ratio", "uploaded", "downloaded", "avg_upspeed", "iatime",
+                 "dltime", "total_size", "add_time", "add_on", "tags", "tracker", "labels", "torrent")
+
+    def __init__(self, torrent_info: dict, labels: List[str], torrent: Any):
+        self.hash: str = torrent_info.get("hash")
+        self.title: str = torrent_info.get("title")
+        self.seeding_time: int = torrent_info.get("seeding_time") or 0
+        self.ratio: float = torrent_info.get("ratio") or 0
+        self.uploaded: int = torrent_info.get("uploaded") or 0
+        self.downloaded: int = torrent_info.get("downloaded") or 0
+        self.avg_upspeed: int = torrent_info.get("avg_upspeed") or 0
+        self.iatime: int = torrent_info.get("iatime") or 0
+        self.dltime: int = torrent_info.get("dltime") or 0
+        self.total_size: int = torrent_info.get("total_size") or 0
+        self.add_time: str = torrent_info.get("add_time")
+        self.add_on: float = torrent_info.get("add_on") or 0
+        self.tags: Any = torrent_info.get("tags")
+        self.tracker: Optional[str] = torrent_info.get("tracker")
+        self.labels: List[str] = labels
+        # 下载器原始种子数据
+        self.torrent: Any = torrent
+
+
+class TorrentSyncMirror:
+    """
+    下载器种子本地镜像，每次仅同步发生变化的种子
+    - qBittorrent：基于 /api/v2/sync/maindata 的 rid 增量数据
+    - Transmission：仅请求必要字段，基于 recently-active 增量数据，并定期全量同步以修正遗漏
+    """
+    # Transmission 需要获取的种子字段
+    tr_fields = ["id", "hashString", "name", "status", "labels", "totalSize", "percentDone", "uploadRatio",
+                 "addedDate", "doneDate", "activityDate"]
+
+    def __init__(self, full_sync_interval: int = 6):
+        """
+        :param full_sync_interval: Transmission 每隔多少次增量同步进行一次全量同步
+        """
+        self._full_sync_interval = max(1, full_sync_interval)
+        self._torrents: Dict[str, Any] = {}
+        # qBittorrent 增量同步标识
+        self._rid = 0
+        # Transmission 种子ID与Hash的映射，用于处理已移除的种子
+        self._tr_ids: Dict[int, str] = {}
+        self._sync_count = 0
+
+    def reset(self):
+        """
+        清空镜像，下次同步时重新全量获取
+        """
+        self._torrents = {}
+        self._rid = 0
+        self._tr_ids = {}
+        self._sync_count = 0
+
+    def sync_qbittorrent(self, qbc: Any) -> List[dict]:
+        """
+        同步 qBittorrent 种子
+        """
+        maindata = qbc.sync_maindata(rid=self._rid)
+        if maindata.get("full_update"):
+            self._torrents = {}
+        for torrent_hash, fields in (maindata.get("torrents") or {}).items():
+            torrent = self._torrents.get(torrent_hash)
+            if torrent is None:
+                torrent = {"hash": torrent_hash}
+                self._torrents[torrent_hash] = torrent
+            torrent.update(fields)
+        for torrent_hash in maindata.get("torrents_removed") or []:
+            self._torrents.pop(torrent_hash, None)
+        self._rid = maindata.get("rid", 0)
+        logger.debug(f"qBittorrent 增量同步完成，rid={self._rid}，"
+                     f"变更种子 {len(maindata.get('torrents') or {})} 个，镜像种子 {len(self._torrents)} 个")
+        return list(self._torrents.values())
+
+    def sync_transmission(self, trc: Any) -> List[Any]:
+        """
+        同步 Transmission 种子
+        """
+        if not self._torrents or self._sync_count % self._full_sync_interval == 0:
+            torrents = trc.get_torrents(arguments=self.tr_fields)
+            self._torrents = {torrent.hashString: torrent for torrent in torrents}
+            self._tr_ids = {torrent.id: torrent.hashString for torrent in torrents}
+            logger.debug(f"Transmission 全量同步完成，镜像种子 {len(self._torrents)} 个")
+        else:
+            active_torrents, removed_ids = trc.get_recently_active_torrents(arguments=self.tr_fields)
+            for torrent in active_torrents:
+                self._torrents[torrent.hashString] = torrent
+                self._tr_ids[torrent.id] = torrent.hashString
+            for torrent_id in removed_ids or []:
+                torrent_hash = self._tr_ids.pop(torrent_id, None)
+                if torrent_hash:
+                    self._torrents.pop(torrent_hash, None)
+            logger.debug(f"Transmission 增量同步完成，变更种子 {len(active_torrents)} 个，"
+                         f"移除种子 {len(removed_ids or [])} 个，镜像种子 {len(self._torrents)} 个")
+        self._sync_count += 1
+        return list(self._torrents.values())
+
+
+class BandwidthSampler:
+    """
+    带宽采样器，后台定时采样上传和下载带宽，保留最近的采样窗口供刷流前置条件直接读取
+    """
+
+    def __init__(self, sample_func: Callable[[], Optional[Tuple[float, float]]],
+                 interval: float = 3.0, window: int = 20, alpha: float = 0.3):
+        """
+        :param sample_func: 采样函数，返回 (上传带宽, 下载带宽)，单位 B/s
+        :param interval: 采样间隔（秒）
+        :param window: 采样窗口大小
+        :param alpha: 指数加权平均的平滑系数
+        """
+        self._sample_func = sample_func
+        self._interval = interval
+        self._alpha = alpha
+        # 环形缓冲区，元素为 (采样时间, 上传带宽, 下载带宽)
+        self._samples: Deque[Tuple[float, float, float]] = deque(maxlen=window)
+        self._ewma: Optional[Tuple[float, float]] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        """
+        启动后台采样线程
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="BrushFlow-BandwidthSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止后台采样线程并清空采样数据
+        """
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self._interval * 2)
+        self._thread = None
+        with self._lock:
+            self._samples.clear()
+            self._ewma = None
+
+    def sample(self) -> bool:
+        """
+        立即采样一次
+        """
+        try:
+            speeds = self._sample_func()
+        except Exception as e:
+            logger.debug(f"带宽采样失败，错误详情: {e}")
+            return False
+        if not speeds:
+            return False
+        upload_speed, download_speed = (speeds[0] or 0), (speeds[1] or 0)
+        with self._lock:
+            self._samples.append((time.time(), upload_speed, download_speed))
+            if self._ewma is None:
+                self._ewma = (upload_speed, download_speed)
+            else:
+                self._ewma = (self._alpha * upload_speed + (1 - self._alpha) * self._ewma[0],
+                              self._alpha * download_speed + (1 - self._alpha) * self._ewma[1])
+        return True
+
+    def __run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self._interval)
+
+    def __fresh_samples(self) -> List[Tuple[float, float, float]]:
+        """
+        获取窗口时长内的有效采样，过期的采样不参与计算
+        """
+        max_age = self._interval * (self._samples.maxlen or 1)
+        now = time.time()
+        with self._lock:
+            return [sample for sample in self._samples if now - sample[0] <= max_age]
+
+    def average(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        采样窗口内的平均带宽
+        """
+        samples = self.__fresh_samples()
+        if not samples:
+            return None, None
+        return (sum(sample[1] for sample in samples) / len(samples),
+                sum(sample[2] for sample in samples) / len(samples))
+
+    def ewma(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        指数加权平均带宽
+        """
+        if not self.__fresh_samples():
+            return None, None
+        with self._lock:
+            return self._ewma if self._ewma else (None, None)
+
+    def percentile(self, percent: float) -> Tuple[Optional[float], Optional[float]]:
+        """
+        采样窗口内的带宽百分位数（最近秩法）
+        """
+        samples = self.__fresh_samples()
+        if not samples:
+            return None, None
+        rank = max(0, min(len(samples) - 1, math.ceil(percent / 100 * len(samples)) - 1))
+        return (sorted(sample[1] for sample in samples)[rank],
+                sorted(sample[2] for sample in samples)[rank])
+
+    def sample_count(self) -> int:
+        return len(self.__fresh_samples())
+
+
 class BrushFlow(_PluginBase):
     # region 全局定义
 
@@ -251,7 +918,7 @@ class BrushFlow(_PluginBase):
     # 插件图标
     plugin_icon = "brush.jpg"
     # 插件版本
-    plugin_version = "4.3.1"
+    plugin_version = "5.3.6"
     # 插件作者
     plugin_author = "jxxghp,InfinityPacer"
     # 作者主页
@@ -279,6 +946,28 @@ class BrushFlow(_PluginBase):
     _brush_interval = 10
     # Check定时
     _check_interval = 5
+    # 站点种子并发获取数
+    _browse_workers = 5
+    # 单站点种子获取超时时间（秒）
+    _browse_timeout = 120
+    # 带宽采样器
+    _bandwidth_sampler = None
+    # 刷流任务存储
+    _task_store = None
+    # 下载器种子镜像
+    _torrent_mirror = None
+    # 数据页展示的最大任务数
+    _page_size = 200
+    # 任务明细可排序字段及缺省值
+    _task_sort_fields = {
+        "time": 0,
+        "site_name": "",
+        "title": "",
+        "size": 0,
+        "uploaded": 0,
+        "downloaded": 0,
+        "ratio": 0
+    }
     # 退出事件
     _event = threading.Event()
     _scheduler = None
@@ -293,6 +982,8 @@ class BrushFlow(_PluginBase):
         self.torrents_chain = TorrentsChain()
         self.subscribe_oper = SubscribeOper()
         self.downloader_helper = DownloaderHelper()
+        self._task_store = BrushTaskStore(plugin=self)
+        self._torrent_mirror = TorrentSyncMirror()
         self._task_brush_enable = False
 
         if not config:
@@ -312,6 +1003,9 @@ class BrushFlow(_PluginBase):
 
         brush_config = self._brush_config
 
+        with lock:
+            self._task_store.migrate()
+
         # 这里先过滤掉已删除的站点并保存，特别注意的是，这里保留了界面选择站点时的顺序，以便后续站点随机刷流或顺序刷流
         if brush_config.brushsites:
             site_id_to_public_status = {site.get("id"): site.get("public") for site in self.sites_helper.get_indexers()}
@@ -352,6 +1046,11 @@ class BrushFlow(_PluginBase):
         if not self.service_info:
             return
 
+        # 配置了带宽限制时，启动后台带宽采样
+        if self._task_brush_enable and (brush_config.maxupspeed or brush_config.maxdlspeed):
+            self._bandwidth_sampler = BandwidthSampler(sample_func=self.__sample_bandwidth)
+            self._bandwidth_sampler.start()
+
         # 检查是否启用了一次性任务
         if brush_config.onlyonce:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -413,7 +1112,77 @@ class BrushFlow(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        """
+        获取插件API
+        [{
+            "path": "/xx",
+            "endpoint": self.xxx,
+            "methods": ["GET", "POST"],
+            "summary": "API说明"
+        }]
+        """
+        return [{
+            "path": "/tasks",
+            "endpoint": self.get_tasks,
+            "methods": ["GET"],
+            "summary": "刷流任务明细",
+            "description": "分页获取刷流任务明细，支持按站点、状态筛选及排序",
+        }]
+
+    def get_tasks(self, apikey: str, offset: int = 0, limit: int = 50, sort: str = "time", order: str = "desc",
+                  site: str = None, status: str = None) -> schemas.Response:
+        """
+        分页获取刷流任务明细，可由API调用
+        :param apikey: API密钥
+        :param offset: 偏移量
+        :param limit: 每页数量，最大500
+        :param sort: 排序字段：time/site_name/title/size/uploaded/downloaded/ratio
+        :param order: 排序方式：desc/asc
+        :param site: 站点名称
+        :param status: 任务状态：active/deleted
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if sort not in self._task_sort_fields:
+            return schemas.Response(success=False, message=f"不支持的排序字段：{sort}")
+        if status and status not in ["active", "deleted"]:
+            return schemas.Response(success=False, message=f"不支持的任务状态：{status}")
+
+        total, items = self.__query_task_items(offset=max(0, int(offset)), limit=max(1, min(int(limit), 500)),
+                                               sort=sort, reverse=order != "asc", site=site, status=status)
+        return schemas.Response(success=True, data={"total": total, "items": items})
+
+    def __query_task_items(self, offset: int = 0, limit: int = None, sort: str = "time", reverse: bool = True,
+                           site: str = None, status: str = None) -> Tuple[int, List[dict]]:
+        """
+        基于排序索引筛选并分页获取任务明细
+        :return: (筛选后的任务总数, 当前页任务明细)
+        """
+        tasks = self._task_store.get_sorted_tasks(sort_key=sort, reverse=reverse,
+                                                  default=self._task_sort_fields.get(sort, 0))
+        if site or status:
+            deleted = status == "deleted"
+            tasks = [task for task in tasks
+                     if (not site or task.get("site_name") == site)
+                     and (not status or bool(task.get("deleted")) == deleted)]
+        total = len(tasks)
+        page_tasks = tasks[offset:offset + limit] if limit else tasks[offset:]
+        return total, [self.__build_task_item(task) for task in page_tasks]
+
+    @staticmethod
+    def __build_task_item(task: dict) -> dict:
+        """
+        构建任务明细
+        """
+        return {
+            'site': task.get("site_name"),
+            'title': task.get("title"),
+            'size': StringUtils.str_filesize(task.get("size")),
+            'uploaded': StringUtils.str_filesize(task.get("uploaded") or 0),
+            'downloaded': StringUtils.str_filesize(task.get("downloaded") or 0),
+            'ratio': round(task.get('ratio') or 0, 2),
+            'status': "已删除" if task.get("deleted") else "正常"
+        }
 
     def get_service(self) -> List[Dict[str, Any]]:
         """
@@ -1621,6 +2390,110 @@ class BrushFlow(_PluginBase):
                                                 ]
                                             }
                                         ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'browse_workers',
+                                                            'label': '站点并发获取数',
+                                                            'placeholder': f'默认 {self._browse_workers}',
+                                                            'type': 'number',
+                                                            "min": "1"
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'browse_timeout',
+                                                            'label': '站点获取超时时间（秒）',
+                                                            'placeholder': f'默认 {self._browse_timeout}',
+                                                            'type': 'number',
+                                                            "min": "1"
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSelect',
+                                                        'props': {
+                                                            'model': 'bandwidth_mode',
+                                                            'label': '带宽计算方式',
+                                                            'items': [
+                                                                {'title': '平均值', 'value': 'avg'},
+                                                                {'title': '指数加权平均', 'value': 'ewma'},
+                                                                {'title': '90百分位', 'value': 'p90'}
+                                                            ]
+                                                        }
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'downloader_sync',
+                                                            'label': '增量同步下载器种子',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'download_batch',
+                                                            'label': '种子批量下载数',
+                                                            'placeholder': '默认 1，即逐个下载',
+                                                            'type': 'number',
+                                                            "min": "1"
+                                                        }
+                                                    }
+                                                ]
+                                            }
+                                        ]
                                     }
                                 ]
                             }
@@ -1796,15 +2669,17 @@ class BrushFlow(_PluginBase):
             "proxy_delete": False,
             "freeleech": "free",
             "hr": "yes",
+            "bandwidth_mode": "avg",
+            "downloader_sync": False,
             "enable_site_config": False,
             "site_config": BrushConfig.get_demo_site_config()
         }
 
     def get_page(self) -> List[dict]:
-        # 种子明细
-        torrents = self.get_data("torrents") or {}
+        # 种子明细，按time倒序仅展示最近的任务，完整数据通过API分页获取
+        total, items = self.__query_task_items(offset=0, limit=self._page_size)
 
-        if not torrents:
+        if not total:
             return [
                 {
                     'component': 'div',
@@ -1814,10 +2689,6 @@ class BrushFlow(_PluginBase):
                     }
                 }
             ]
-        else:
-            data_list = torrents.values()
-            # 按time倒序排序
-            data_list = sorted(data_list, key=lambda x: x.get("time") or 0, reverse=True)
 
         # 表格标题
         headers = [
@@ -1829,18 +2700,26 @@ class BrushFlow(_PluginBase):
             {'title': '分享率', 'key': 'ratio', 'sortable': True},
             {'title': '状态', 'key': 'status', 'sortable': True},
         ]
-        # 种子数据明细
-        items = [
-            {
-                'site': data.get("site_name"),
-                'title': data.get("title"),
-                'size': StringUtils.str_filesize(data.get("size")),
-                'uploaded': StringUtils.str_filesize(data.get("uploaded") or 0),
-                'downloaded': StringUtils.str_filesize(data.get("downloaded") or 0),
-                'ratio': round(data.get('ratio') or 0, 2),
-                'status': "已删除" if data.get("deleted") else "正常"
-            } for data in data_list
-        ]
+        # 任务较多时，提示通过API获取完整数据
+        tips_elements = []
+        if total > len(items):
+            tips_elements.append({
+                'component': 'VCol',
+                'props': {
+                    'cols': 12,
+                },
+                'content': [
+                    {
+                        'component': 'VAlert',
+                        'props': {
+                            'type': 'info',
+                            'variant': 'tonal',
+                            'text': f'共 {total} 个刷流任务，当前仅展示最近的 {len(items)} 个，'
+                                    f'完整数据可通过 /api/v1/plugin/{self.__class__.__name__}/tasks 接口分页获取'
+                        }
+                    }
+                ]
+            })
 
         # 拼装页面
         return [
@@ -1858,7 +2737,7 @@ class BrushFlow(_PluginBase):
                         'props': {
                             'class': 'd-none d-sm-block',
                         },
-                        'content': [
+                        'content': tips_elements + [
                             {
                                 'component': 'VCol',
                                 'props': {
@@ -1891,6 +2770,9 @@ class BrushFlow(_PluginBase):
         退出插件
         """
         try:
+            if self._bandwidth_sampler:
+                self._bandwidth_sampler.stop()
+                self._bandwidth_sampler = None
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
                 if self._scheduler.running:
@@ -1919,8 +2801,10 @@ class BrushFlow(_PluginBase):
         with lock:
             logger.info(f"开始执行刷流任务 ...")
 
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
-            torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
+            timer = PhaseTimer(name="刷流任务")
+            torrent_tasks: Dict[str, dict] = self._task_store.load()
+            torrents_size = self._task_store.statistics.seeding_size
+            timer.lap("加载任务")
 
             # 判断能否通过保种体积前置条件
             size_condition_passed, reason = self.__evaluate_size_condition_for_brush(torrents_size=torrents_size)
@@ -1936,8 +2820,6 @@ class BrushFlow(_PluginBase):
                 logger.info(f"刷流任务执行完成")
                 return
 
-            statistic_info = self.__get_statistic_info()
-
             # 获取所有站点的信息，并过滤掉不存在的站点
             site_infos = []
             for siteid in brush_config.brushsites:
@@ -1954,25 +2836,98 @@ class BrushFlow(_PluginBase):
             # 获取订阅标题
             subscribe_titles = self.__get_subscribe_titles()
 
-            # 处理所有站点
-            for site in site_infos:
-                # 如果站点刷流没有正确响应，说明没有通过前置条件，其他站点也不需要继续刷流了
-                if not self.__brush_site_torrents(siteid=site.id, torrent_tasks=torrent_tasks,
-                                                  statistic_info=statistic_info,
-                                                  subscribe_titles=subscribe_titles):
-                    logger.info(f"站点 {site.name} 刷流中途结束，停止后续刷流")
-                    break
-                else:
-                    logger.info(f"站点 {site.name} 刷流完成")
+            # 构建刷流任务索引，用于判断重复种子
+            task_index = TorrentTaskIndex(torrent_tasks=torrent_tasks)
+            timer.lap("构建索引")
+
+            # 按站点顺序依次刷流，后续站点的种子在刷流的同时并发获取
+            site_torrents = self.__iter_site_torrents(site_infos=site_infos)
+            try:
+                for site, torrents in site_torrents:
+                    # 如果站点刷流没有正确响应，说明没有通过前置条件，其他站点也不需要继续刷流了
+                    if not self.__brush_site_torrents(siteid=site.id, torrents=torrents,
+                                                      torrent_tasks=torrent_tasks,
+                                                      subscribe_titles=subscribe_titles,
+                                                      task_index=task_index):
+                        logger.info(f"站点 {site.name} 刷流中途结束，停止后续刷流")
+                        break
+                    else:
+                        logger.info(f"站点 {site.name} 刷流完成")
+            finally:
+                site_torrents.close()
+            timer.lap("获取及添加种子")
 
             # 保存数据
-            self.save_data("torrents", torrent_tasks)
+            self._task_store.save(torrent_tasks)
             # 保存统计数据
-            self.save_data("statistic", statistic_info)
+            self.save_data("statistic", self._task_store.get_statistic_info())
+            timer.lap("保存数据")
+            timer.log(task_count=len(torrent_tasks))
             logger.info(f"刷流任务执行完成")
 
-    def __brush_site_torrents(self, siteid, torrent_tasks: Dict[str, dict], statistic_info: Dict[str, int],
-                              subscribe_titles: Set[str]) -> bool:
+    def __iter_site_torrents(self, site_infos: List[Any]) -> Iterator[Tuple[Any, Optional[List[TorrentInfo]]]]:
+        """
+        按站点顺序返回站点种子，通过线程池提前并发获取后续站点，单个站点超时后放弃该站点的结果
+        同时获取的站点数不超过并发数，中途停止刷流时不再获取后续站点
+        """
+        if not site_infos:
+            return
+
+        brush_config = self.__get_brush_config()
+        workers = int(brush_config.browse_workers or self._browse_workers)
+        timeout = float(brush_config.browse_timeout or self._browse_timeout)
+        workers = max(1, min(workers, len(site_infos)))
+
+        # 记录每个站点实际开始获取的时间，排队中的站点不计入超时
+        start_times: Dict[int, float] = {}
+
+        def browse_site(site: Any) -> List[TorrentInfo]:
+            start_times[site.id] = time.time()
+            logger.info(f"开始获取站点 {site.name} 的新种子 ...")
+            return self.torrents_chain.browse(domain=site.domain)
+
+        logger.info(f"正在并发获取站点种子，并发数 {workers}，单站点超时时间 {timeout:.0f} 秒")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="BrushFlow-Browse")
+        # 已提交获取的站点，按站点顺序依次取出
+        submitted: Deque[Tuple[Any, Future]] = deque()
+        # 已超时放弃但仍在获取的站点
+        abandoned: List[Tuple[Any, Future]] = []
+        next_index = 0
+        try:
+            while not self._event.is_set():
+                while next_index < len(site_infos) and len(submitted) < workers:
+                    site = site_infos[next_index]
+                    submitted.append((site, executor.submit(browse_site, site)))
+                    next_index += 1
+                if not submitted:
+                    break
+                site, future = submitted.popleft()
+                torrents = None
+                while not self._event.is_set():
+                    done, _ = wait([future], timeout=1)
+                    if done:
+                        try:
+                            torrents = future.result() or []
+                        except Exception as e:
+                            logger.error(f"站点 {site.name} 获取种子失败，错误详情: {e}")
+                        break
+                    start_time = start_times.get(site.id)
+                    if start_time and time.time() - start_time > timeout:
+                        logger.warning(f"站点 {site.name} 获取种子超时（{timeout:.0f} 秒），本次跳过该站点")
+                        abandoned.append((site, future))
+                        break
+                if self._event.is_set():
+                    break
+                yield site, torrents
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            running = [site.name for site, future in abandoned + list(submitted) if future.running()]
+            if running:
+                logger.warning(f"站点 {', '.join(running)} 仍在获取种子，本次刷流将丢弃其结果")
+
+    def __brush_site_torrents(self, siteid, torrents: Optional[List[TorrentInfo]], torrent_tasks: Dict[str, dict],
+                              subscribe_titles: Set[str],
+                              task_index: TorrentTaskIndex) -> bool:
         """
         针对站点进行刷流
         """
@@ -1981,8 +2936,6 @@ class BrushFlow(_PluginBase):
             logger.warning(f"站点不存在：{siteid}")
             return True
 
-        logger.info(f"开始获取站点 {siteinfo.name} 的新种子 ...")
-        torrents = self.torrents_chain.browse(domain=siteinfo.domain)
         if not torrents:
             logger.info(f"站点 {siteinfo.name} 没有获取到种子")
             return True
@@ -1999,16 +2952,39 @@ class BrushFlow(_PluginBase):
         # 按发布日期降序排列
         torrents.sort(key=lambda x: x.pubdate or '', reverse=True)
 
-        torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
+        torrents_size = self._task_store.statistics.seeding_size
 
         logger.info(f"正在准备种子刷流，数量 {len(torrents)}")
 
+        # 批量下载时，待添加的种子
+        batch_size = max(1, int(self.__get_brush_config().download_batch or 1))
+        pending_torrents: List[TorrentInfo] = []
+
+        def flush_pending_torrents():
+            nonlocal torrents_size
+            if not pending_torrents:
+                return
+            for pending_torrent, hash_string in self.__download_torrents(torrents=pending_torrents):
+                if not hash_string:
+                    logger.warning(f"{pending_torrent.title} 添加刷流任务失败！")
+                    # 撤销预占的做种体积及索引
+                    torrents_size -= pending_torrent.size
+                    task_index.remove({"site_name": siteinfo.name, "title": pending_torrent.title,
+                                       "page_url": pending_torrent.page_url})
+                    continue
+                self.__add_brush_task(siteinfo=siteinfo, torrent=pending_torrent, hash_string=hash_string,
+                                      torrent_tasks=torrent_tasks,
+                                      task_index=task_index)
+            pending_torrents.clear()
+
         # 过滤种子
         for torrent in torrents:
             # 判断能否通过刷流前置条件
-            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush(include_network_conditions=False)
+            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush(
+                include_network_conditions=False, pending_count=len(pending_torrents))
             self.__log_brush_conditions(passed=pre_condition_passed, reason=reason)
             if not pre_condition_passed:
+                flush_pending_torrents()
                 return False
 
             logger.debug(f"种子详情：{torrent}")
@@ -2022,69 +2998,78 @@ class BrushFlow(_PluginBase):
 
             # 判断能否通过刷流条件
             condition_passed, reason = self.__evaluate_conditions_for_brush(torrent=torrent,
-                                                                            torrent_tasks=torrent_tasks)
+                                                                            task_index=task_index)
             self.__log_brush_conditions(passed=condition_passed, reason=reason, torrent=torrent)
             if not condition_passed:
                 continue
 
-            # 添加下载任务
-            hash_string = self.__download(torrent=torrent)
-            if not hash_string:
-                logger.warning(f"{torrent.title} 添加刷流任务失败！")
-                continue
+            # 先行加入索引及做种体积，避免同一批次中选中重复种子或超出保种体积
+            task_index.add({"site_name": siteinfo.name, "title": torrent.title, "page_url": torrent.page_url})
+            torrents_size += torrent.size
+            pending_torrents.append(torrent)
+            if len(pending_torrents) >= batch_size:
+                flush_pending_torrents()
 
-            # 触发刷流下载时间并保存任务信息
-            torrent_task = {
-                "site": siteinfo.id,
-                "site_name": siteinfo.name,
-                "title": torrent.title,
-                "size": torrent.size,
-                "pubdate": torrent.pubdate,
-                # "site_cookie": torrent.site_cookie,
-                # "site_ua": torrent.site_ua,
-                # "site_proxy": torrent.site_proxy,
-                # "site_order": torrent.site_order,
-                "description": torrent.description,
-                "imdbid": torrent.imdbid,
-                # "enclosure": torrent.enclosure,
-                "page_url": torrent.page_url,
-                # "seeders": torrent.seeders,
-                # "peers": torrent.peers,
-                # "grabs": torrent.grabs,
-                "date_elapsed": torrent.date_elapsed,
-                "freedate": torrent.freedate,
-                "uploadvolumefactor": torrent.uploadvolumefactor,
-                "downloadvolumefactor": torrent.downloadvolumefactor,
-                "hit_and_run": torrent.hit_and_run or brush_config.site_hr_active,
-                "volume_factor": torrent.volume_factor,
-                "freedate_diff": torrent.freedate_diff,
-                # "labels": torrent.labels,
-                # "pri_order": torrent.pri_order,
-                # "category": torrent.category,
-                "ratio": 0,
-                "downloaded": 0,
-                "uploaded": 0,
-                "seeding_time": 0,
-                "deleted": False,
-                "time": time.time()
-            }
+        flush_pending_torrents()
+        return True
 
-            self.eventmanager.send_event(etype=EventType.PluginTriggered, data={
-                "plugin_id": self.__class__.__name__,
-                "event_name": "brushflow_download_added",
-                "hash": hash_string,
-                "data": torrent_task,
-                "downloader": self.service_info.name
-            })
-            torrent_tasks[hash_string] = torrent_task
+    def __add_brush_task(self, siteinfo: Any, torrent: TorrentInfo, hash_string: str, torrent_tasks: Dict[str, dict],
+                         task_index: TorrentTaskIndex):
+        """
+        记录刷流任务并发送通知
+        """
+        brush_config = self.__get_brush_config(sitename=siteinfo.name)
 
-            # 统计数据
-            torrents_size += torrent.size
-            statistic_info["count"] += 1
-            logger.info(f"站点 {siteinfo.name}，新增刷流种子下载：{torrent.title}|{torrent.description}")
-            self.__send_add_message(torrent)
+        # 触发刷流下载时间并保存任务信息
+        torrent_task = {
+            "site": siteinfo.id,
+            "site_name": siteinfo.name,
+            "title": torrent.title,
+            "size": torrent.size,
+            "pubdate": torrent.pubdate,
+            # "site_cookie": torrent.site_cookie,
+            # "site_ua": torrent.site_ua,
+            # "site_proxy": torrent.site_proxy,
+            # "site_order": torrent.site_order,
+            "description": torrent.description,
+            "imdbid": torrent.imdbid,
+            # "enclosure": torrent.enclosure,
+            "page_url": torrent.page_url,
+            # "seeders": torrent.seeders,
+            # "peers": torrent.peers,
+            # "grabs": torrent.grabs,
+            "date_elapsed": torrent.date_elapsed,
+            "freedate": torrent.freedate,
+            "uploadvolumefactor": torrent.uploadvolumefactor,
+            "downloadvolumefactor": torrent.downloadvolumefactor,
+            "hit_and_run": torrent.hit_and_run or brush_config.site_hr_active,
+            "volume_factor": torrent.volume_factor,
+            "freedate_diff": torrent.freedate_diff,
+            # "labels": torrent.labels,
+            # "pri_order": torrent.pri_order,
+            # "category": torrent.category,
+            "ratio": 0,
+            "downloaded": 0,
+            "uploaded": 0,
+            "seeding_time": 0,
+            "deleted": False,
+            "time": time.time()
+        }
 
-        return True
+        self.eventmanager.send_event(etype=EventType.PluginTriggered, data={
+            "plugin_id": self.__class__.__name__,
+            "event_name": "brushflow_download_added",
+            "hash": hash_string,
+            "data": torrent_task,
+            "downloader": self.service_info.name
+        })
+        torrent_tasks[hash_string] = torrent_task
+        task_index.add(torrent_task)
+
+        # 统计数据
+        self._task_store.statistics.apply(torrent_task)
+        logger.info(f"站点 {siteinfo.name}，新增刷流种子下载：{torrent.title}|{torrent.description}")
+        self.__send_add_message(torrent)
 
     def __evaluate_size_condition_for_brush(self, torrents_size: float,
                                             add_torrent_size: float = 0.0) -> Tuple[bool, Optional[str]]:
@@ -2131,13 +3116,15 @@ class BrushFlow(_PluginBase):
 
         return True, None
 
-    def __evaluate_pre_conditions_for_brush(self, include_network_conditions: bool = True) \
+    def __evaluate_pre_conditions_for_brush(self, include_network_conditions: bool = True, pending_count: int = 0) \
             -> Tuple[bool, Optional[str]]:
         """
         前置过滤不符合条件的种子
+        :param include_network_conditions: 是否包含带宽条件
+        :param pending_count: 已选中但尚未添加到下载器的种子数
         """
         reasons = [
-            ("maxdlcount", lambda config: self.__get_downloading_count() >= int(config),
+            ("maxdlcount", lambda config: self.__get_downloading_count() + pending_count >= int(config),
              lambda config: f"当前同时下载任务数已达到最大值 {config}，暂时停止新增任务")
         ]
 
@@ -2163,7 +3150,7 @@ class BrushFlow(_PluginBase):
 
         return True, None
 
-    def __evaluate_conditions_for_brush(self, torrent, torrent_tasks) -> Tuple[bool, Optional[str]]:
+    def __evaluate_conditions_for_brush(self, torrent, task_index: TorrentTaskIndex) -> Tuple[bool, Optional[str]]:
         """
         过滤不符合条件的种子
         """
@@ -2171,21 +3158,17 @@ class BrushFlow(_PluginBase):
 
         # 排除重复种子
         # 默认根据标题和站点名称进行排除
-        task_key = f"{torrent.site_name}{torrent.title}"
-        if any(task_key == f"{task.get('site_name')}{task.get('title')}" for task in torrent_tasks.values()):
+        if task_index.contains_title(site_name=torrent.site_name, title=torrent.title):
             return False, "重复种子"
 
         # 部分站点标题会上新时携带后缀，这里进一步根据种子详情地址进行排除
         if torrent.page_url:
-            task_page_url = f"{torrent.site_name}{torrent.page_url}"
-            if any(task_page_url == f"{task.get('site_name')}{task.get('page_url')}" for task in
-                   torrent_tasks.values()):
+            if task_index.contains_page_url(site_name=torrent.site_name, page_url=torrent.page_url):
                 return False, "重复种子"
 
         # 不同站点如果遇到相同种子，判断前一个种子是否已经在做种，否则排除处理
         if torrent.title:
-            if any(torrent.site_name != f"{task.get('site_name')}" and torrent.title == f"{task.get('title')}"
-                   and not task.get("seed_time") for task in torrent_tasks.values()):
+            if task_index.contains_unfinished_in_other_site(site_name=torrent.site_name, title=torrent.title):
                 return False, "其他站点存在尚未下载完成的相同种子"
 
         # 促销条件
@@ -2275,16 +3258,24 @@ class BrushFlow(_PluginBase):
 
         with lock:
             logger.info("开始检查刷流下载任务 ...")
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
+            timer = PhaseTimer(name="刷流检查")
+            torrent_tasks: Dict[str, dict] = self._task_store.load()
             unmanaged_tasks: Dict[str, dict] = self.get_data("unmanaged") or {}
+            timer.lap("加载任务")
 
             downloader = self.downloader
-            seeding_torrents, error = downloader.get_torrents()
+            if brush_config.downloader_sync:
+                seeding_torrents, error = self.__sync_torrents()
+            else:
+                seeding_torrents, error = downloader.get_torrents()
             if error:
                 logger.warning("连接下载器出错，将在下个时间周期重试")
                 return
+            timer.lap("获取下载器种子")
 
-            seeding_torrents_dict = {self.__get_hash(torrent): torrent for torrent in seeding_torrents}
+            is_qbittorrent = self.downloader_helper.is_downloader("qbittorrent", service=self.service_info)
+            seeding_torrents_dict = {self.__get_hash(torrent, is_qbittorrent=is_qbittorrent): torrent
+                                     for torrent in seeding_torrents}
 
             # 检查种子刷流标签变更情况
             self.__update_seeding_tasks_based_on_tags(torrent_tasks=torrent_tasks, unmanaged_tasks=unmanaged_tasks,
@@ -2297,14 +3288,18 @@ class BrushFlow(_PluginBase):
 
             logger.info(f"共有 {len(torrent_check_hashes)} 个任务正在刷流，开始检查任务状态")
 
-            # 获取到当前所有做种数据中需要被检查的种子数据
-            check_torrents = [seeding_torrents_dict[th] for th in torrent_check_hashes if th in seeding_torrents_dict]
+            # 获取到当前所有做种数据中需要被检查的种子数据，并统一构建种子记录，后续流程不再重复解析
+            check_torrents = self.__build_torrent_records(
+                torrents=[seeding_torrents_dict[th] for th in torrent_check_hashes if th in seeding_torrents_dict],
+                is_qbittorrent=is_qbittorrent)
 
             # 先更新刷流任务的最新状态，上下传，分享率
-            self.__update_torrent_tasks_state(torrents=check_torrents, torrent_tasks=torrent_tasks)
+            self.__update_torrent_tasks_state(records=check_torrents, torrent_tasks=torrent_tasks,
+                                              statistics=self._task_store.statistics)
 
             # 更新刷流任务列表中在下载器中删除的种子为删除状态
             self.__update_undeleted_torrents_missing_in_downloader(torrent_tasks, torrent_check_hashes, check_torrents)
+            timer.lap("更新任务状态")
 
             # 根据配置的标签进行种子排除
             if check_torrents:
@@ -2318,7 +3313,7 @@ class BrushFlow(_PluginBase):
                 combined_tags = ",".join(tags_to_exclude)
                 if combined_tags:  # 确保有标签需要排除
                     pre_filter_count = len(check_torrents)  # 获取过滤前的任务数量
-                    check_torrents = self.__filter_torrents_by_tag(torrents=check_torrents, exclude_tag=combined_tags)
+                    check_torrents = self.__filter_records_by_tag(records=check_torrents, exclude_tag=combined_tags)
                     post_filter_count = len(check_torrents)  # 获取过滤后的任务数量
                     excluded_count = pre_filter_count - post_filter_count  # 计算被排除的任务数量
                     logger.info(
@@ -2336,16 +3331,18 @@ class BrushFlow(_PluginBase):
                 # 如果配置了动态删除以及删种阈值，则根据动态删种进行分组处理
                 if brush_config.proxy_delete and brush_config.delete_size_range:
                     logger.info("已开启动态删种，按系统默认动态删种条件开始检查任务")
-                    proxy_delete_hashes = self.__delete_torrent_for_proxy(torrents=check_torrents,
+                    proxy_delete_hashes = self.__delete_torrent_for_proxy(records=check_torrents,
                                                                           torrent_tasks=torrent_tasks) or []
                     need_delete_hashes.extend(proxy_delete_hashes)
                 # 否则均认为是没有开启动态删种
                 else:
                     logger.info("没有开启动态删种，按用户设置删种条件开始检查任务")
-                    not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=check_torrents,
+                    not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(records=check_torrents,
                                                                                             torrent_tasks=torrent_tasks) or []
                     need_delete_hashes.extend(not_proxy_delete_hashes)
 
+                timer.lap("评估删除条件")
+
                 if need_delete_hashes:
                     # 如果是QB，则重新汇报Tracker
                     if self.downloader_helper.is_downloader("qbittorrent", service=self.service_info):
@@ -2353,38 +3350,72 @@ class BrushFlow(_PluginBase):
                     # 删除种子
                     if downloader.delete_torrents(ids=need_delete_hashes, delete_file=True):
                         for torrent_hash in need_delete_hashes:
+                            self._task_store.statistics.apply(torrent_tasks[torrent_hash], sign=-1)
                             torrent_tasks[torrent_hash]["deleted"] = True
                             torrent_tasks[torrent_hash]["deleted_time"] = time.time()
+                            self._task_store.statistics.apply(torrent_tasks[torrent_hash])
+                timer.lap("删除种子")
 
             # 归档数据
             self.__auto_archive_tasks(torrent_tasks=torrent_tasks)
 
             self.__update_and_save_statistic_info(torrent_tasks)
 
-            self.save_data("torrents", torrent_tasks)
+            self._task_store.save(torrent_tasks)
+            timer.lap("归档及保存数据")
+            timer.log(task_count=len(torrent_tasks))
 
             logger.info("刷流下载任务检查完成")
 
-    def __update_torrent_tasks_state(self, torrents: List[Any], torrent_tasks: Dict[str, dict]):
+    def __sync_torrents(self) -> Tuple[List[Any], bool]:
+        """
+        通过本地镜像增量同步下载器种子，同步失败时清空镜像，下个周期重新全量同步
+        """
+        downloader = self.downloader
+        try:
+            if self.downloader_helper.is_downloader("qbittorrent", service=self.service_info):
+                if not downloader.qbc:
+                    return [], True
+                return self._torrent_mirror.sync_qbittorrent(qbc=downloader.qbc), False
+            if self.downloader_helper.is_downloader("transmission", service=self.service_info):
+                if not downloader.trc:
+                    return [], True
+                return self._torrent_mirror.sync_transmission(trc=downloader.trc), False
+            return downloader.get_torrents()
+        except Exception as e:
+            logger.error(f"增量同步下载器种子失败，错误详情: {e}")
+            self._torrent_mirror.reset()
+            return [], True
+
+    def __build_torrent_records(self, torrents: List[Any], is_qbittorrent: bool) -> List[TorrentRecord]:
+        """
+        构建种子记录
+        """
+        return [TorrentRecord(torrent_info=self.__get_torrent_info(torrent, is_qbittorrent=is_qbittorrent),
+                              labels=self.__get_label(torrent, is_qbittorrent=is_qbittorrent),
+                              torrent=torrent) for torrent in torrents]
+
+    @staticmethod
+    def __update_torrent_tasks_state(records: List[TorrentRecord], torrent_tasks: Dict[str, dict],
+                                     statistics: TaskStatistics):
         """
         更新刷流任务的最新状态，上下传，分享率
         """
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
+        for record in records:
+            torrent_task = torrent_tasks.get(record.hash, None)
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
                 continue
 
-            torrent_info = self.__get_torrent_info(torrent)
-
             # 更新上传量、下载量
+            statistics.apply(torrent_task, sign=-1)
             torrent_task.update({
-                "downloaded": torrent_info.get("downloaded"),
-                "uploaded": torrent_info.get("uploaded"),
-                "ratio": torrent_info.get("ratio"),
-                "seeding_time": torrent_info.get("seeding_time"),
+                "downloaded": record.downloaded,
+                "uploaded": record.uploaded,
+                "ratio": record.ratio,
+                "seeding_time": record.seeding_time,
             })
+            statistics.apply(torrent_task)
 
     def __update_seeding_tasks_based_on_tags(self, torrent_tasks: Dict[str, dict], unmanaged_tasks: Dict[str, dict],
                                              seeding_torrents_dict: Dict[str, Any]):
@@ -2400,7 +3431,7 @@ class BrushFlow(_PluginBase):
         removed_tasks = []
         # 基于 seeding_torrents_dict 的信息更新或添加到 torrent_tasks
         for torrent_hash, torrent in seeding_torrents_dict.items():
-            tags = self.__get_label(torrent=torrent)
+            tags = self.__get_label(torrent=torrent, is_qbittorrent=True)
             # 判断是否包含刷流标签
             if brush_config.brush_tag in tags:
                 # 如果包含刷流标签又不在刷流任务中，则需要加入管理
@@ -2410,6 +3441,7 @@ class BrushFlow(_PluginBase):
                         # 如果在 unmanaged_tasks 中，移除并转移到 torrent_tasks
                         torrent_task = unmanaged_tasks.pop(torrent_hash)
                         torrent_tasks[torrent_hash] = torrent_task
+                        self._task_store.statistics.apply(torrent_task)
                         added_tasks.append(torrent_task)
                         logger.info(f"站点 {torrent_task.get('site_name')}，"
                                     f"刷流任务种子再次加入：{torrent_task.get('title')}|{torrent_task.get('description')}")
@@ -2417,6 +3449,7 @@ class BrushFlow(_PluginBase):
                         # 否则，创建一个新的任务
                         torrent_task = self.__convert_torrent_info_to_task(torrent)
                         torrent_tasks[torrent_hash] = torrent_task
+                        self._task_store.statistics.apply(torrent_task)
                         added_tasks.append(torrent_task)
                         logger.info(f"站点 {torrent_task.get('site_name')}，"
                                     f"刷流任务种子加入：{torrent_task.get('title')}|{torrent_task.get('description')}")
@@ -2424,7 +3457,9 @@ class BrushFlow(_PluginBase):
                 else:
                     torrent_task = torrent_tasks[torrent_hash]
                     if torrent_task.get("deleted"):
+                        self._task_store.statistics.apply(torrent_task, sign=-1)
                         torrent_task["deleted"] = False
+                        self._task_store.statistics.apply(torrent_task)
                         reset_tasks.append(torrent_task)
                         logger.info(
                             f"站点 {torrent_task.get('site_name')}，在下载器中找到已标记删除的刷流任务对应的种子信息，"
@@ -2434,12 +3469,13 @@ class BrushFlow(_PluginBase):
                 if torrent_hash in torrent_tasks:
                     # 如果种子不符合刷流条件但在 torrent_tasks 中，移除并加入 unmanaged_tasks
                     torrent_task = torrent_tasks.pop(torrent_hash)
+                    self._task_store.statistics.apply(torrent_task, sign=-1)
                     unmanaged_tasks[torrent_hash] = torrent_task
                     removed_tasks.append(torrent_task)
                     logger.info(f"站点 {torrent_task.get('site_name')}，"
                                 f"刷流任务种子移除：{torrent_task.get('title')}|{torrent_task.get('description')}")
 
-        self.save_data("torrents", torrent_tasks)
+        self._task_store.save(torrent_tasks)
         self.save_data("unmanaged", unmanaged_tasks)
 
         # 发送汇总消息
@@ -2454,16 +3490,15 @@ class BrushFlow(_PluginBase):
                                                             reason="在下载器中找到已标记删除的刷流任务对应的种子信息",
                                                             torrent_tasks=reset_tasks)
 
-    def __group_torrents_by_proxy_delete(self, torrents: List[Any], torrent_tasks: Dict[str, dict]):
+    def __group_torrents_by_proxy_delete(self, records: List[TorrentRecord], torrent_tasks: Dict[str, dict]):
         """
         根据是否启用动态删种进行分组
         """
-        proxy_delete_torrents = []
-        not_proxy_delete_torrents = []
+        proxy_delete_records = []
+        not_proxy_delete_records = []
 
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
+        for record in records:
+            torrent_task = torrent_tasks.get(record.hash, None)
 
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
@@ -2473,13 +3508,13 @@ class BrushFlow(_PluginBase):
 
             brush_config = self.__get_brush_config(site_name)
             if brush_config.proxy_delete:
-                proxy_delete_torrents.append(torrent)
+                proxy_delete_records.append(record)
             else:
-                not_proxy_delete_torrents.append(torrent)
+                not_proxy_delete_records.append(record)
 
-        return proxy_delete_torrents, not_proxy_delete_torrents
+        return proxy_delete_records, not_proxy_delete_records
 
-    def __evaluate_conditions_for_delete(self, site_name: str, torrent_info: dict, torrent_task: dict) \
+    def __evaluate_conditions_for_delete(self, site_name: str, torrent_record: TorrentRecord, torrent_task: dict) \
             -> Tuple[bool, str]:
         """
         评估删除条件并返回是否应删除种子及其原因
@@ -2493,37 +3528,38 @@ class BrushFlow(_PluginBase):
         hit_and_run = torrent_task.get("hit_and_run", False)
         hr_specific_conditions_configured = hit_and_run and (brush_config.hr_seed_time or brush_config.seed_ratio)
         if hr_specific_conditions_configured:
-            if (brush_config.hr_seed_time and torrent_info.get("seeding_time")
+            if (brush_config.hr_seed_time and torrent_record.seeding_time
                     >= float(brush_config.hr_seed_time) * 3600):
-                return True, (f"H&R种子，做种时间 {torrent_info.get('seeding_time') / 3600:.1f} 小时，"
+                return True, (f"H&R种子，做种时间 {torrent_record.seeding_time / 3600:.1f} 小时，"
                               f"大于 {brush_config.hr_seed_time} 小时")
-            if brush_config.seed_ratio and torrent_info.get("ratio") >= float(brush_config.seed_ratio):
-                return True, f"H&R种子，分享率 {torrent_info.get('ratio'):.2f}，大于 {brush_config.seed_ratio}"
+            if brush_config.seed_ratio and torrent_record.ratio >= float(brush_config.seed_ratio):
+                return True, f"H&R种子，分享率 {torrent_record.ratio:.2f}，大于 {brush_config.seed_ratio}"
             return False, "H&R种子，未能满足设置的H&R删除条件"
 
         # 处理其他场景，1. 不是H&R种子；2. 是H&R种子但没有特定条件配置
         reason = reason if not hit_and_run else "H&R种子（未设置H&R条件），未能满足设置的删除条件"
-        if brush_config.seed_time and torrent_info.get("seeding_time") >= float(brush_config.seed_time) * 3600:
-            reason = f"做种时间 {torrent_info.get('seeding_time') / 3600:.1f} 小时，大于 {brush_config.seed_time} 小时"
-        elif brush_config.seed_ratio and torrent_info.get("ratio") >= float(brush_config.seed_ratio):
-            reason = f"分享率 {torrent_info.get('ratio'):.2f}，大于 {brush_config.seed_ratio}"
-        elif brush_config.seed_size and torrent_info.get("uploaded") >= float(brush_config.seed_size) * 1024 ** 3:
-            reason = f"上传量 {torrent_info.get('uploaded') / 1024 ** 3:.1f} GB，大于 {brush_config.seed_size} GB"
-        elif brush_config.download_time and torrent_info.get("downloaded") < torrent_info.get(
-                "total_size") and torrent_info.get("dltime") >= float(brush_config.download_time) * 3600:
-            reason = f"下载耗时 {torrent_info.get('dltime') / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
-        elif brush_config.seed_avgspeed and torrent_info.get("avg_upspeed") <= float(
-                brush_config.seed_avgspeed) * 1024 and torrent_info.get("seeding_time") >= 30 * 60:
-            reason = f"平均上传速度 {torrent_info.get('avg_upspeed') / 1024:.1f} KB/s，低于 {brush_config.seed_avgspeed} KB/s"
-        elif brush_config.seed_inactivetime and torrent_info.get("iatime") >= float(
+        if brush_config.seed_time and torrent_record.seeding_time >= float(brush_config.seed_time) * 3600:
+            reason = f"做种时间 {torrent_record.seeding_time / 3600:.1f} 小时，大于 {brush_config.seed_time} 小时"
+        elif brush_config.seed_ratio and torrent_record.ratio >= float(brush_config.seed_ratio):
+            reason = f"分享率 {torrent_record.ratio:.2f}，大于 {brush_config.seed_ratio}"
+        elif brush_config.seed_size and torrent_record.uploaded >= float(brush_config.seed_size) * 1024 ** 3:
+            reason = f"上传量 {torrent_record.uploaded / 1024 ** 3:.1f} GB，大于 {brush_config.seed_size} GB"
+        elif brush_config.download_time and torrent_record.downloaded < torrent_record.total_size \
+                and torrent_record.dltime >= float(brush_config.download_time) * 3600:
+            reason = f"下载耗时 {torrent_record.dltime / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
+        elif brush_config.seed_avgspeed and torrent_record.avg_upspeed <= float(
+                brush_config.seed_avgspeed) * 1024 and torrent_record.seeding_time >= 30 * 60:
+            reason = f"平均上传速度 {torrent_record.avg_upspeed / 1024:.1f} KB/s，低于 {brush_config.seed_avgspeed} KB/s"
+        elif brush_config.seed_inactivetime and torrent_record.iatime >= float(
                 brush_config.seed_inactivetime) * 60:
-            reason = f"未活动时间 {torrent_info.get('iatime') / 60:.0f} 分钟，大于 {brush_config.seed_inactivetime} 分钟"
+            reason = f"未活动时间 {torrent_record.iatime / 60:.0f} 分钟，大于 {brush_config.seed_inactivetime} 分钟"
         else:
             return False, reason
 
         return True, reason if not hit_and_run else "H&R种子（未设置H&R条件），" + reason
 
-    def __evaluate_proxy_pre_conditions_for_delete(self, site_name: str, torrent_info: dict) -> Tuple[bool, str]:
+    def __evaluate_proxy_pre_conditions_for_delete(self, site_name: str, torrent_record: TorrentRecord) \
+            -> Tuple[bool, str]:
         """
         评估动态删除前置条件并返回是否应删除种子及其原因
         """
@@ -2531,24 +3567,23 @@ class BrushFlow(_PluginBase):
 
         reason = "未能满足动态删除设置的前置删除条件"
 
-        if brush_config.download_time and torrent_info.get("downloaded") < torrent_info.get(
-                "total_size") and torrent_info.get("dltime") >= float(brush_config.download_time) * 3600:
-            reason = f"下载耗时 {torrent_info.get('dltime') / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
+        if brush_config.download_time and torrent_record.downloaded < torrent_record.total_size \
+                and torrent_record.dltime >= float(brush_config.download_time) * 3600:
+            reason = f"下载耗时 {torrent_record.dltime / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
         else:
             return False, reason
 
         return True, reason
 
-    def __delete_torrent_for_evaluate_conditions(self, torrents: List[Any], torrent_tasks: Dict[str, dict],
-                                                 proxy_delete: bool = False) -> List:
+    def __delete_torrent_for_evaluate_conditions(self, records: List[TorrentRecord], torrent_tasks: Dict[str, dict],
+                                                 proxy_delete: bool = False) -> List[str]:
         """
         根据条件删除种子并获取已删除列表
         """
         delete_hashes = []
 
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
+        for record in records:
+            torrent_task = torrent_tasks.get(record.hash, None)
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
                 continue
@@ -2556,14 +3591,12 @@ class BrushFlow(_PluginBase):
             torrent_title = torrent_task.get("title", "")
             torrent_desc = torrent_task.get("description", "")
 
-            torrent_info = self.__get_torrent_info(torrent)
-
             # 删除种子的具体实现可能会根据实际情况略有不同
             should_delete, reason = self.__evaluate_conditions_for_delete(site_name=site_name,
-                                                                          torrent_info=torrent_info,
+                                                                          torrent_record=record,
                                                                           torrent_task=torrent_task)
             if should_delete:
-                delete_hashes.append(torrent_hash)
+                delete_hashes.append(record.hash)
                 reason = "触发动态删除阈值，" + reason if proxy_delete else reason
                 self.__send_delete_message(site_name=site_name, torrent_title=torrent_title, torrent_desc=torrent_desc,
                                            reason=reason)
@@ -2573,16 +3606,15 @@ class BrushFlow(_PluginBase):
 
         return delete_hashes
 
-    def __delete_torrent_for_evaluate_proxy_pre_conditions(self, torrents: List[Any],
-                                                           torrent_tasks: Dict[str, dict]) -> List:
+    def __delete_torrent_for_evaluate_proxy_pre_conditions(self, records: List[TorrentRecord],
+                                                           torrent_tasks: Dict[str, dict]) -> List[str]:
         """
         根据动态删除前置条件排除H&R种子后删除种子并获取已删除列表
         """
         delete_hashes = []
 
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
+        for record in records:
+            torrent_task = torrent_tasks.get(record.hash, None)
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
                 continue
@@ -2595,13 +3627,11 @@ class BrushFlow(_PluginBase):
             torrent_title = torrent_task.get("title", "")
             torrent_desc = torrent_task.get("description", "")
 
-            torrent_info = self.__get_torrent_info(torrent)
-
             # 删除种子的具体实现可能会根据实际情况略有不同
             should_delete, reason = self.__evaluate_proxy_pre_conditions_for_delete(site_name=site_name,
-                                                                                    torrent_info=torrent_info)
+                                                                                    torrent_record=record)
             if should_delete:
-                delete_hashes.append(torrent_hash)
+                delete_hashes.append(record.hash)
                 self.__send_delete_message(site_name=site_name, torrent_title=torrent_title, torrent_desc=torrent_desc,
                                            reason=reason)
                 logger.info(f"站点：{site_name}，{reason}，删除种子：{torrent_title}|{torrent_desc}")
@@ -2610,7 +3640,7 @@ class BrushFlow(_PluginBase):
 
         return delete_hashes
 
-    def __delete_torrent_for_proxy(self, torrents: List[Any], torrent_tasks: Dict[str, dict]) -> List:
+    def __delete_torrent_for_proxy(self, records: List[TorrentRecord], torrent_tasks: Dict[str, dict]) -> List[str]:
         """
         动态删除种子，删除规则如下；
         - 不管做种体积是否超过设定的动态删除阈值，默认优先执行排除H&R种子后满足「下载超时时间」的种子
@@ -2626,25 +3656,28 @@ class BrushFlow(_PluginBase):
         if not (brush_config.proxy_delete and brush_config.delete_size_range):
             return []
 
-        # 获取种子信息Map
-        torrent_info_map = {self.__get_hash(torrent): self.__get_torrent_info(torrent=torrent) for torrent in torrents}
+        # 种子记录Map
+        record_map = {record.hash: record for record in records}
+
+        def sum_size(hashes: Set[str]) -> float:
+            return sum(record_map[_hash].total_size or 0 for _hash in hashes if _hash in record_map)
 
         # 计算当前总做种体积
-        total_torrent_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
+        total_torrent_size = self._task_store.statistics.seeding_size
 
         logger.info(
             f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB，正在准备计算满足动态前置删除条件的种子")
 
         # 执行排除H&R种子后满足前置删除条件的种子
-        pre_delete_hashes = self.__delete_torrent_for_evaluate_proxy_pre_conditions(torrents=torrents,
+        pre_delete_hashes = self.__delete_torrent_for_evaluate_proxy_pre_conditions(records=records,
                                                                                     torrent_tasks=torrent_tasks) or []
 
         # 如果存在前置删除种子，这里进行额外判断，总做种体积排除前置删除种子的体积
         if pre_delete_hashes:
-            pre_delete_total_size = sum(torrent_info_map[self.__get_hash(torrent)].get("total_size", 0)
-                                        for torrent in torrents if self.__get_hash(torrent) in pre_delete_hashes)
+            pre_delete_set = set(pre_delete_hashes)
+            pre_delete_total_size = sum_size(pre_delete_set)
             total_torrent_size = total_torrent_size - pre_delete_total_size
-            torrents = [torrent for torrent in torrents if self.__get_hash(torrent) not in pre_delete_hashes]
+            records = [record for record in records if record.hash not in pre_delete_set]
             logger.info(
                 f"满足动态删除前置条件的种子共 {len(pre_delete_hashes)} 个，体积 {self.__bytes_to_gb(pre_delete_total_size):.1f} GB，"
                 f"删除种子后，当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB")
@@ -2674,54 +3707,50 @@ class BrushFlow(_PluginBase):
         need_delete_hashes.extend(pre_delete_hashes)
 
         # 即使开了动态删除，但是也有可能部分站点单独设置了关闭，这里根据种子托管进行分组，先处理不需要托管的种子，按设置的规则进行删除
-        proxy_delete_torrents, not_proxy_delete_torrents = self.__group_torrents_by_proxy_delete(torrents=torrents,
-                                                                                                 torrent_tasks=torrent_tasks)
-        logger.info(f"托管种子数 {len(proxy_delete_torrents)}，未托管种子数 {len(not_proxy_delete_torrents)}")
-        if not_proxy_delete_torrents:
-            not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=not_proxy_delete_torrents,
+        proxy_delete_records, not_proxy_delete_records = self.__group_torrents_by_proxy_delete(
+            records=records, torrent_tasks=torrent_tasks)
+        logger.info(f"托管种子数 {len(proxy_delete_records)}，未托管种子数 {len(not_proxy_delete_records)}")
+        if not_proxy_delete_records:
+            not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(records=not_proxy_delete_records,
                                                                                     torrent_tasks=torrent_tasks) or []
             need_delete_hashes.extend(not_proxy_delete_hashes)
-            total_torrent_size -= sum(
-                torrent_info_map[self.__get_hash(torrent)].get("total_size", 0) for torrent in not_proxy_delete_torrents
-                if self.__get_hash(torrent) in not_proxy_delete_hashes)
+            total_torrent_size -= sum_size(set(not_proxy_delete_hashes))
 
         # 如果删除非托管种子后仍未达到最小体积要求，则处理托管种子
-        if total_torrent_size > min_size and proxy_delete_torrents:
-            proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=proxy_delete_torrents,
+        if total_torrent_size > min_size and proxy_delete_records:
+            proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(records=proxy_delete_records,
                                                                                 torrent_tasks=torrent_tasks,
                                                                                 proxy_delete=True) or []
             need_delete_hashes.extend(proxy_delete_hashes)
-            total_torrent_size -= sum(
-                torrent_info_map[self.__get_hash(torrent)].get("total_size", 0) for torrent in proxy_delete_torrents if
-                self.__get_hash(torrent) in proxy_delete_hashes)
+            total_torrent_size -= sum_size(set(proxy_delete_hashes))
 
-        # 在完成初始删除步骤后，如果总体积仍然超过最小阈值，则进一步找到已完成种子并排除HR种子后按做种时间正序进行删除
+        # 在完成初始删除步骤后，如果总体积仍然超过最小阈值，则进一步找到已完成种子并排除HR种子后按做种时间倒序进行删除
         if total_torrent_size > min_size:
             # 重新计算当前的种子列表，排除已删除的种子
-            remaining_hashes = list(
-                {self.__get_hash(torrent) for torrent in proxy_delete_torrents} - set(need_delete_hashes))
+            need_delete_set = set(need_delete_hashes)
+            remaining_hashes = [record.hash for record in proxy_delete_records if record.hash not in need_delete_set]
             # 这里根据排除后的种子列表，再次从下载器中找到已完成的任务
             downloader = self.downloader
-            completed_torrents = downloader.get_completed_torrents(ids=remaining_hashes)
-            remaining_hashes = {self.__get_hash(torrent) for torrent in completed_torrents}
-            remaining_torrents = [(_hash, torrent_info_map[_hash]) for _hash in remaining_hashes]
+            completed_torrents = downloader.get_completed_torrents(ids=remaining_hashes) or []
+            is_qbittorrent = self.downloader_helper.is_downloader("qbittorrent", service=self.service_info)
+            completed_hashes = {self.__get_hash(torrent, is_qbittorrent=is_qbittorrent)
+                                for torrent in completed_torrents}
 
-            # 准备一个列表，用于存放满足条件的种子，即非HR种子且有明确做种时间
-            filtered_torrents = [(_hash, info['seeding_time']) for _hash, info in remaining_torrents if
-                                 not torrent_tasks[_hash].get("hit_and_run", False)]
-            sorted_torrents = sorted(filtered_torrents, key=lambda x: x[1], reverse=True)
+            # 非HR种子按做种时间构建大顶堆，按需弹出，无需对全部种子排序
+            heap = [(-(record_map[_hash].seeding_time or 0), _hash) for _hash in completed_hashes
+                    if _hash in record_map and not torrent_tasks.get(_hash, {}).get("hit_and_run", False)]
+            heapq.heapify(heap)
 
             # 进行额外的删除操作，直到满足最小阈值或没有更多种子可删除
-            for torrent_hash, _ in sorted_torrents:
-                if total_torrent_size <= min_size:
-                    break
+            while heap and total_torrent_size > min_size:
+                _, torrent_hash = heapq.heappop(heap)
                 torrent_task = torrent_tasks.get(torrent_hash, None)
-                torrent_info = torrent_info_map.get(torrent_hash, None)
-                if not torrent_task or not torrent_info:
+                record = record_map.get(torrent_hash, None)
+                if not torrent_task or not record:
                     continue
 
                 need_delete_hashes.append(torrent_hash)
-                total_torrent_size -= torrent_info.get("total_size", 0)
+                total_torrent_size -= record.total_size or 0
 
                 site_name = torrent_task.get("site_name", "")
                 torrent_title = torrent_task.get("title", "")
@@ -2750,12 +3779,14 @@ class BrushFlow(_PluginBase):
         # 返回所有需要删除的种子的哈希列表
         return need_delete_hashes
 
-    def __update_undeleted_torrents_missing_in_downloader(self, torrent_tasks, torrent_check_hashes, torrents):
+    def __update_undeleted_torrents_missing_in_downloader(self, torrent_tasks: Dict[str, dict],
+                                                          torrent_check_hashes: List[str],
+                                                          records: List[TorrentRecord]):
         """
         处理已经被删除，但是任务记录中还没有被标记删除的种子
         """
         # 先通过获取的全量种子，判断已经被删除，但是任务记录中还没有被标记删除的种子
-        torrent_all_hashes = self.__get_all_hashes(torrents)
+        torrent_all_hashes = {record.hash for record in records if record.hash}
         missing_hashes = [hash_value for hash_value in torrent_check_hashes if hash_value not in torrent_all_hashes]
         undeleted_hashes = [hash_value for hash_value in missing_hashes if not torrent_tasks[hash_value].get("deleted")]
 
@@ -2768,8 +3799,10 @@ class BrushFlow(_PluginBase):
             # 获取对应的任务信息
             torrent_task = torrent_tasks[hash_value]
             # 标记为已删除
+            self._task_store.statistics.apply(torrent_task, sign=-1)
             torrent_task["deleted"] = True
             torrent_task["deleted_time"] = time.time()
+            self._task_store.statistics.apply(torrent_task)
             # 处理日志相关内容
             delete_tasks.append(torrent_task)
             site_name = torrent_task.get("site_name", "")
@@ -2820,40 +3853,12 @@ class BrushFlow(_PluginBase):
         """
         更新并保存统计信息
         """
-        total_count, total_uploaded, total_downloaded, total_deleted = 0, 0, 0, 0
-        active_uploaded, active_downloaded, active_count, total_unarchived = 0, 0, 0, 0
-
-        statistic_info = self.__get_statistic_info()
-        archived_tasks = self.get_data("archived") or {}
-        combined_tasks = {**torrent_tasks, **archived_tasks}
-
-        for task in combined_tasks.values():
-            if task.get("deleted", False):
-                total_deleted += 1
-            total_downloaded += task.get("downloaded", 0)
-            total_uploaded += task.get("uploaded", 0)
-
-        # 计算torrent_tasks中未标记为删除的活跃任务的统计信息，及待归档的任务数
-        for task in torrent_tasks.values():
-            if not task.get("deleted", False):
-                active_uploaded += task.get("uploaded", 0)
-                active_downloaded += task.get("downloaded", 0)
-                active_count += 1
-            else:
-                total_unarchived += 1
-
-        # 更新统计信息
-        total_count = len(combined_tasks)
-        statistic_info.update({
-            "uploaded": total_uploaded,
-            "downloaded": total_downloaded,
-            "deleted": total_deleted,
-            "unarchived": total_unarchived,
-            "count": total_count,
-            "active": active_count,
-            "active_uploaded": active_uploaded,
-            "active_downloaded": active_downloaded
-        })
+        statistic_info = self._task_store.get_statistic_info()
+        total_count, total_deleted = statistic_info.get("count"), statistic_info.get("deleted")
+        total_uploaded, total_downloaded = statistic_info.get("uploaded"), statistic_info.get("downloaded")
+        active_count, total_unarchived = statistic_info.get("active"), statistic_info.get("unarchived")
+        active_uploaded, active_downloaded = statistic_info.get("active_uploaded"), statistic_info.get(
+            "active_downloaded")
 
         logger.info(f"刷流任务统计数据，总任务数：{total_count}，活跃任务数：{active_count}，已删除：{total_deleted}，"
                     f"待归档：{total_unarchived}，"
@@ -2863,7 +3868,7 @@ class BrushFlow(_PluginBase):
                     f"总下载量：{StringUtils.str_filesize(total_downloaded)}")
 
         self.save_data("statistic", statistic_info)
-        self.save_data("torrents", torrent_tasks)
+        self._task_store.save(torrent_tasks)
 
     def __get_brush_config(self, sitename: str = None) -> BrushConfig:
         """
@@ -2896,7 +3901,10 @@ class BrushFlow(_PluginBase):
             "seed_inactivetime": "未活动时间",
             "up_speed": "单任务上传限速",
             "dl_speed": "单任务下载限速",
-            "auto_archive_days": "自动清理记录天数"
+            "auto_archive_days": "自动清理记录天数",
+            "browse_workers": "站点并发获取数",
+            "browse_timeout": "站点获取超时时间",
+            "download_batch": "种子批量下载数"
         }
 
         config_range_number_attr_to_desc = {
@@ -2978,6 +3986,11 @@ class BrushFlow(_PluginBase):
             "active_time_range": brush_config.active_time_range,
             "cron": brush_config.cron,
             "qb_category": brush_config.qb_category,
+            "browse_workers": brush_config.browse_workers,
+            "browse_timeout": brush_config.browse_timeout,
+            "bandwidth_mode": brush_config.bandwidth_mode,
+            "downloader_sync": brush_config.downloader_sync,
+            "download_batch": brush_config.download_batch,
             "enable_site_config": brush_config.enable_site_config,
             "site_config": brush_config.site_config,
             "_tabs": self._tabs
@@ -3074,12 +4087,78 @@ class BrushFlow(_PluginBase):
             logger.error(f"Error while resetting downloader URL for torrent: {torrent_url}. Error: {str(e)}")
             return torrent_url
 
-    def __download(self, torrent: TorrentInfo) -> Optional[str]:
+    def __download_torrents(self, torrents: List[TorrentInfo]) -> List[Tuple[TorrentInfo, Optional[str]]]:
+        """
+        批量添加下载任务，先并发下载种子文件，再依次添加到下载器
+        """
+        if len(torrents) == 1:
+            contents = [self.__prepare_torrent_content(torrents[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(torrents), thread_name_prefix="BrushFlow-Download") as executor:
+                contents = list(executor.map(self.__prepare_torrent_content, torrents))
+
+        results = []
+        for torrent, content in zip(torrents, contents):
+            hash_string = None
+            if content:
+                torrent_content, cookies = content
+                hash_string = self.__add_torrent(torrent=torrent, torrent_content=torrent_content, cookies=cookies)
+            results.append((torrent, hash_string))
+        return results
+
+    def __prepare_torrent_content(self, torrent: TorrentInfo) -> Optional[Tuple[Union[str, bytes], Optional[str]]]:
+        """
+        获取种子内容，如果种子地址不是磁力地址，则请求种子到内存，请求失败时返回种子地址交由下载器下载
+        :return: (种子内容或地址, cookie)
+        """
+        try:
+            if not torrent.enclosure:
+                logger.error(f"获取下载链接失败：{torrent.title}")
+                return None
+
+            brush_config = self.__get_brush_config(torrent.site_name)
+
+            # 获取下载链接
+            torrent_content = torrent.enclosure
+            # proxies
+            proxies = settings.PROXY if torrent.site_proxy else None
+            # cookie
+            cookies = torrent.site_cookie
+            if torrent_content.startswith("["):
+                torrent_content = self.__get_redict_url(url=torrent_content,
+                                                        proxies=proxies,
+                                                        ua=torrent.site_ua,
+                                                        cookie=cookies)
+                # 目前馒头请求实际种子时，不能传入Cookie
+                cookies = None
+            if not torrent_content:
+                logger.error(f"获取下载链接失败：{torrent.title}")
+                return None
+
+            if brush_config.site_skip_tips:
+                torrent_content = self.__reset_download_url(torrent_url=torrent_content, site_id=torrent.site)
+                logger.debug(f"站点 {torrent.site_name} 已启用自动跳过提示，种子下载地址更新为 {torrent_content}")
+
+            # 如果种子地址不是磁力地址，则请求种子到内存再传入下载器
+            if not torrent_content.startswith("magnet"):
+                response = RequestUtils(cookies=cookies,
+                                        proxies=proxies,
+                                        ua=torrent.site_ua).get_res(url=torrent_content)
+                if response and response.ok:
+                    torrent_content = response.content
+                else:
+                    logger.error("尝试通过MP下载种子失败，继续尝试传递种子地址到下载器进行下载")
+            return torrent_content, cookies
+        except Exception as e:
+            logger.error(f"{torrent.title} 获取种子内容失败，错误详情: {e}")
+            return None
+
+    def __add_torrent(self, torrent: TorrentInfo, torrent_content: Union[str, bytes],
+                      cookies: Optional[str]) -> Optional[str]:
         """
-        添加下载任务
+        添加种子到下载器并返回种子Hash
         """
-        if not torrent.enclosure:
-            logger.error(f"获取下载链接失败：{torrent.title}")
+        if not torrent_content:
             return None
 
         brush_config = self.__get_brush_config(torrent.site_name)
@@ -3090,26 +4169,6 @@ class BrushFlow(_PluginBase):
         down_speed = int(brush_config.dl_speed) if brush_config.dl_speed else None
         # 保存地址
         download_dir = brush_config.save_path or None
-        # 获取下载链接
-        torrent_content = torrent.enclosure
-        # proxies
-        proxies = settings.PROXY if torrent.site_proxy else None
-        # cookie
-        cookies = torrent.site_cookie
-        if torrent_content.startswith("["):
-            torrent_content = self.__get_redict_url(url=torrent_content,
-                                                    proxies=proxies,
-                                                    ua=torrent.site_ua,
-                                                    cookie=cookies)
-            # 目前馒头请求实际种子时，不能传入Cookie
-            cookies = None
-        if not torrent_content:
-            logger.error(f"获取下载链接失败：{torrent.title}")
-            return None
-
-        if brush_config.site_skip_tips:
-            torrent_content = self.__reset_download_url(torrent_url=torrent_content, site_id=torrent.site)
-            logger.debug(f"站点 {torrent.site_name} 已启用自动跳过提示，种子下载地址更新为 {torrent_content}")
 
         downloader = self.downloader
         if not downloader:
@@ -3119,59 +4178,110 @@ class BrushFlow(_PluginBase):
             # 限速值转为bytes
             up_speed = up_speed * 1024 if up_speed else None
             down_speed = down_speed * 1024 if down_speed else None
-            # 生成随机Tag
-            tag = StringUtils.generate_random_str(10)
-            # 如果开启代理下载以及种子地址不是磁力地址，则请求种子到内存再传入下载器
-            if not torrent_content.startswith("magnet"):
-                response = RequestUtils(cookies=cookies,
-                                        proxies=proxies,
-                                        ua=torrent.site_ua).get_res(url=torrent_content)
-                if response and response.ok:
-                    torrent_content = response.content
-                else:
-                    logger.error("尝试通过MP下载种子失败，继续尝试传递种子地址到下载器进行下载")
-            if torrent_content:
-                state = downloader.add_torrent(content=torrent_content,
-                                               download_dir=download_dir,
-                                               cookie=cookies,
-                                               category=brush_config.qb_category,
-                                               tag=["已整理", brush_config.brush_tag, tag],
-                                               upload_limit=up_speed,
-                                               download_limit=down_speed)
-                if not state:
-                    return None
-                else:
-                    # 获取种子Hash
-                    torrent_hash = downloader.get_torrent_id_by_tag(tags=tag)
-                    if not torrent_hash:
-                        logger.error(f"{brush_config.downloader} 获取种子Hash失败，详细信息请查看 README")
-                        return None
-                    return torrent_hash
-            return None
+            # 优先根据种子内容计算Hash，无法计算时才添加随机标签，添加后再通过标签从下载器中获取
+            torrent_hash = self.__get_torrent_hash_from_content(torrent_content)
+            tag = StringUtils.generate_random_str(10) if not torrent_hash else None
+            tags = ["已整理", brush_config.brush_tag, tag] if tag else ["已整理", brush_config.brush_tag]
+            state = downloader.add_torrent(content=torrent_content,
+                                           download_dir=download_dir,
+                                           cookie=cookies,
+                                           category=brush_config.qb_category,
+                                           tag=tags,
+                                           upload_limit=up_speed,
+                                           download_limit=down_speed)
+            if not state:
+                return None
+            if not torrent_hash:
+                torrent_hash = downloader.get_torrent_id_by_tag(tags=tag)
+            if not torrent_hash:
+                logger.error(f"{brush_config.downloader} 获取种子Hash失败，详细信息请查看 README")
+                return None
+            return torrent_hash
 
         elif self.downloader_helper.is_downloader("transmission", service=self.service_info):
-            # 如果开启代理下载以及种子地址不是磁力地址，则请求种子到内存再传入下载器
-            if not torrent_content.startswith("magnet"):
-                response = RequestUtils(cookies=cookies,
-                                        proxies=proxies,
-                                        ua=torrent.site_ua).get_res(url=torrent_content)
-                if response and response.ok:
-                    torrent_content = response.content
-                else:
-                    logger.error("尝试通过MP下载种子失败，继续尝试传递种子地址到下载器进行下载")
-            if torrent_content:
-                torrent = downloader.add_torrent(content=torrent_content,
-                                                 download_dir=download_dir,
-                                                 cookie=cookies,
-                                                 labels=["已整理", brush_config.brush_tag])
-                if not torrent:
+            torrent = downloader.add_torrent(content=torrent_content,
+                                             download_dir=download_dir,
+                                             cookie=cookies,
+                                             labels=["已整理", brush_config.brush_tag])
+            if not torrent:
+                return None
+            else:
+                if brush_config.up_speed or brush_config.dl_speed:
+                    downloader.change_torrent(hash_string=torrent.hashString,
+                                              upload_limit=up_speed,
+                                              download_limit=down_speed)
+                return torrent.hashString
+        return None
+
+    @staticmethod
+    def __get_torrent_hash_from_content(torrent_content: Union[str, bytes]) -> Optional[str]:
+        """
+        根据种子内容计算种子Hash，与qBittorrent保持一致：
+        - v1 及混合种子使用 info 字典的 SHA1
+        - 纯 v2 种子使用 info 字典 SHA256 的前 40 位
+        - 磁力链接直接解析 btih
+        """
+        try:
+            if isinstance(torrent_content, str):
+                if not torrent_content.startswith("magnet"):
                     return None
+                for xt in parse_qs(urlparse(torrent_content).query).get("xt", []):
+                    if not xt.lower().startswith("urn:btih:"):
+                        continue
+                    btih = xt[len("urn:btih:"):]
+                    if len(btih) == 40:
+                        return btih.lower()
+                    if len(btih) == 32:
+                        return base64.b32decode(btih.upper()).hex()
+                return None
+            # 直接对原始的 info 字节计算Hash，避免重新编码非规范种子导致Hash不一致
+            info_bytes = BrushFlow.__get_info_bytes(torrent_content)
+            if not info_bytes:
+                return None
+            info = bdecode(info_bytes)
+            if info.get("meta version") == 2 and "pieces" not in info:
+                return hashlib.sha256(info_bytes).hexdigest()[:40]
+            return hashlib.sha1(info_bytes).hexdigest()
+        except Exception as e:
+            logger.debug(f"根据种子内容计算Hash失败，错误详情: {e}")
+            return None
+
+    @staticmethod
+    def __get_info_bytes(torrent_content: bytes) -> Optional[bytes]:
+        """
+        从种子内容中截取 info 字典的原始字节
+        """
+        def skip_value(pos: int) -> int:
+            # 跳过一个完整的 bencode 值，返回其结束位置
+            depth = 0
+            while True:
+                token = torrent_content[pos:pos + 1]
+                if token in (b"d", b"l"):
+                    depth += 1
+                    pos += 1
+                elif token == b"e" and depth > 0:
+                    depth -= 1
+                    pos += 1
+                elif token == b"i":
+                    pos = torrent_content.index(b"e", pos) + 1
+                elif token.isdigit():
+                    colon = torrent_content.index(b":", pos)
+                    pos = colon + 1 + int(torrent_content[pos:colon])
                 else:
-                    if brush_config.up_speed or brush_config.dl_speed:
-                        downloader.change_torrent(hash_string=torrent.hashString,
-                                                  upload_limit=up_speed,
-                                                  download_limit=down_speed)
-                    return torrent.hashString
+                    raise ValueError(f"无效的种子内容，位置 {pos}")
+                if depth == 0:
+                    return pos
+
+        if not torrent_content or torrent_content[:1] != b"d":
+            return None
+        pos = 1
+        while torrent_content[pos:pos + 1] != b"e":
+            key_end = skip_value(pos)
+            key = torrent_content[torrent_content.index(b":", pos) + 1:key_end]
+            value_end = skip_value(key_end)
+            if key == b"info":
+                return torrent_content[key_end:value_end]
+            pos = value_end
         return None
 
     def __qb_torrents_reannounce(self, torrent_hashes: List[str]):
@@ -3192,57 +4302,40 @@ class BrushFlow(_PluginBase):
         except Exception as err:
             logger.error(f"强制重新汇报失败：{str(err)}")
 
-    def __get_hash(self, torrent: Any):
+    def __get_hash(self, torrent: Any, is_qbittorrent: Optional[bool] = None):
         """
-        获取种子hash
+        获取种子hash，批量处理时可传入下载器类型，避免逐个种子判断
         """
         try:
-            return torrent.get("hash") if self.downloader_helper.is_downloader("qbittorrent", service=self.service_info) \
-                else torrent.hashString
+            if is_qbittorrent is None:
+                is_qbittorrent = self.downloader_helper.is_downloader("qbittorrent", service=self.service_info)
+            return torrent.get("hash") if is_qbittorrent else torrent.hashString
         except Exception as e:
             print(str(e))
             return ""
 
-    def __get_all_hashes(self, torrents):
+    def __get_label(self, torrent: Any, is_qbittorrent: Optional[bool] = None):
         """
-        获取torrents列表中所有种子的Hash值
-
-        :param torrents: 包含种子信息的列表
-        :return: 包含所有Hash值的列表
-        """
-        try:
-            all_hashes = []
-            for torrent in torrents:
-                # 根据下载器类型获取Hash值
-                hash_value = torrent.get("hash") if self.downloader_helper.is_downloader("qbittorrent",
-                                                                                         service=self.service_info) \
-                    else torrent.hashString
-                if hash_value:
-                    all_hashes.append(hash_value)
-            return all_hashes
-        except Exception as e:
-            print(str(e))
-            return []
-
-    def __get_label(self, torrent: Any):
-        """
-        获取种子标签
+        获取种子标签，批量处理时可传入下载器类型，避免逐个种子判断
         """
         try:
+            if is_qbittorrent is None:
+                is_qbittorrent = self.downloader_helper.is_downloader("qbittorrent", service=self.service_info)
             return [str(tag).strip() for tag in torrent.get("tags").split(',')] \
-                if self.downloader_helper.is_downloader("qbittorrent",
-                                                        service=self.service_info) else torrent.labels or []
+                if is_qbittorrent else torrent.labels or []
         except Exception as e:
             print(str(e))
             return []
 
-    def __get_torrent_info(self, torrent: Any) -> dict:
+    def __get_torrent_info(self, torrent: Any, is_qbittorrent: Optional[bool] = None) -> dict:
         """
-        获取种子信息
+        获取种子信息，批量处理时可传入下载器类型，避免逐个种子判断
         """
         date_now = int(time.time())
+        if is_qbittorrent is None:
+            is_qbittorrent = self.downloader_helper.is_downloader("qbittorrent", service=self.service_info)
         # QB
-        if self.downloader_helper.is_downloader("qbittorrent", service=self.service_info):
+        if is_qbittorrent:
             """
             {
               "added_on": 1693359031,
@@ -3501,37 +4594,56 @@ class BrushFlow(_PluginBase):
         获取任务中的种子总大小
         """
         # 读取种子记录
-        task_info = self.get_data("torrents") or {}
+        task_info = self._task_store.get_tasks()
         if not task_info:
             return 0
         total_size = sum([task.get("size") or 0 for task in task_info.values()])
         return total_size
 
-    def __get_average_bandwidth(self, sample_count: int = 5, interval: float = 3.0) \
-            -> Tuple[Optional[float], Optional[float]]:
-        """
-        多次采样上传和下载带宽，取平均值
-        """
-        upload_speeds = []
-        download_speeds = []
-        start_time = time.time()
-        for _ in range(sample_count):
-            downloader_info = self.__get_downloader_info()
-            if downloader_info:
-                upload_speeds.append(downloader_info.upload_speed or 0)
-                download_speeds.append(downloader_info.download_speed or 0)
-            # 采样间隔
-            time.sleep(interval)
-        end_time = time.time()
-        total_duration = end_time - start_time
-        if not upload_speeds or not download_speeds:
+    def __get_average_bandwidth(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        从后台带宽采样窗口中读取上传和下载带宽，按配置的计算方式返回平均值、指数加权平均或百分位数
+        未配置带宽限制时不进行采样
+        """
+        brush_config = self.__get_brush_config()
+        if not brush_config.maxupspeed and not brush_config.maxdlspeed:
             return None, None
-        avg_upload_speed = sum(upload_speeds) / len(upload_speeds) if upload_speeds else 0
-        avg_download_speed = sum(download_speeds) / len(download_speeds) if download_speeds else 0
-        logger.debug(f"平均上传带宽 {StringUtils.str_filesize(avg_upload_speed)}, "
-                     f"平均下载带宽 {StringUtils.str_filesize(avg_download_speed)}, "
-                     f"采样次数={sample_count}, 时长={total_duration:.2f} 秒")
-        return avg_upload_speed, avg_download_speed
+        sampler = self._bandwidth_sampler
+        if not sampler:
+            sampler = BandwidthSampler(sample_func=self.__sample_bandwidth)
+            self._bandwidth_sampler = sampler
+        # 采样器刚启动或已停止时，立即补充一次采样
+        if not sampler.sample_count():
+            sampler.sample()
+            if not sampler.running and self._task_brush_enable:
+                sampler.start()
+
+        bandwidth_mode = brush_config.bandwidth_mode
+        if bandwidth_mode == "ewma":
+            upload_speed, download_speed = sampler.ewma()
+        elif bandwidth_mode == "p90":
+            upload_speed, download_speed = sampler.percentile(90)
+        else:
+            upload_speed, download_speed = sampler.average()
+        if upload_speed is None or download_speed is None:
+            return None, None
+        logger.debug(f"上传带宽 {StringUtils.str_filesize(upload_speed)}, "
+                     f"下载带宽 {StringUtils.str_filesize(download_speed)}, "
+                     f"计算方式={bandwidth_mode}, 采样次数={sampler.sample_count()}")
+        return upload_speed, download_speed
+
+    def __sample_bandwidth(self) -> Optional[Tuple[float, float]]:
+        """
+        带宽采样函数，供后台带宽采样器调用
+        """
+        # 后台定时采样，下载器不可用时静默跳过，避免重复发送系统通知
+        service = self.downloader_helper.get_service(name=self.__get_brush_config().downloader)
+        if not service or service.instance.is_inactive():
+            return None
+        downloader_info = self.__get_downloader_info()
+        if not downloader_info:
+            return None
+        return downloader_info.upload_speed or 0, downloader_info.download_speed or 0
 
     def __get_downloader_info(self) -> schemas.DownloaderInfo:
         """
@@ -3615,25 +4727,20 @@ class BrushFlow(_PluginBase):
             logger.error(str(e))
             return 0
 
-    def __filter_torrents_by_tag(self, torrents: List[Any], exclude_tag: str) -> List[Any]:
+    @staticmethod
+    def __filter_records_by_tag(records: List[TorrentRecord], exclude_tag: str) -> List[TorrentRecord]:
         """
-        根据标签过滤torrents，排除标签格式为逗号分隔的字符串，例如 "MOVIEPILOT, H&R"
+        根据标签过滤种子记录，排除标签格式为逗号分隔的字符串，例如 "MOVIEPILOT, H&R"
         """
         # 如果排除标签字符串为空，则返回原始列表
         if not exclude_tag:
-            return torrents
+            return records
 
         # 将 exclude_tag 字符串分割成一个集合，并去除每个标签两端的空白，忽略空白标签并自动去重
         exclude_tags = set(tag.strip() for tag in exclude_tag.split(',') if tag.strip())
 
-        filter_torrents = []
-        for torrent in torrents:
-            # 使用 __get_label 方法获取每个 torrent 的标签列表
-            labels = self.__get_label(torrent)
-            # 检查是否有任何一个排除标签存在于标签列表中
-            if not any(exclude in labels for exclude in exclude_tags):
-                filter_torrents.append(torrent)
-        return filter_torrents
+        # 检查是否有任何一个排除标签存在于标签列表中
+        return [record for record in records if exclude_tags.isdisjoint(record.labels)]
 
     def __get_subscribe_titles(self) -> Set[str]:
         """
@@ -3747,13 +4854,6 @@ class BrushFlow(_PluginBase):
         except ValueError:
             return False
 
-    @staticmethod
-    def __calculate_seeding_torrents_size(torrent_tasks: Dict[str, dict]) -> float:
-        """
-        计算保种种子体积
-        """
-        return sum(task.get("size", 0) for task in torrent_tasks.values() if not task.get("deleted", False))
-
     def __auto_archive_tasks(self, torrent_tasks: Dict[str, dict]) -> None:
         """
        自动归档已经删除的种子数据
@@ -3762,8 +4862,8 @@ class BrushFlow(_PluginBase):
             logger.info("自动归档记录天数小于等于0，取消自动归档")
             return
 
-        # 用于存储已删除的数据
-        archived_tasks: Dict[str, dict] = self.get_data("archived") or {}
+        # 用于存储本次需要归档的数据
+        archived_tasks: Dict[str, dict] = {}
 
         current_time = time.time()
         archive_threshold_seconds = self._brush_config.auto_archive_days * 86400  # 将天数转换为秒数
@@ -3789,17 +4889,17 @@ class BrushFlow(_PluginBase):
 
         # 从原始字典中移除已删除的条目
         for key in keys_to_delete:
-            del torrent_tasks[key]
+            self._task_store.statistics.apply(torrent_tasks.pop(key), sign=-1)
 
-        self.save_data("archived", archived_tasks)
+        # 归档数据仅追加写入
+        self._task_store.append_archived(archived_tasks)
 
     def __clear_tasks(self):
         """
         清除统计数据
         彻底重置所有刷流数据，如当前还存在正在做种的刷流任务，待定时检查任务执行后，会自动纳入刷流管理
         """
-        self.save_data("torrents", {})
-        self.save_data("archived", {})
+        self._task_store.clear()
         self.save_data("unmanaged", {})
         self.save_data("statistic", {})
 
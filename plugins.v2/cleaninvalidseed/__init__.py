@@ -2,6 +2,7 @@ import glob
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -20,6 +21,46 @@ from app.log import logger
 from app.schemas import NotificationType
 from app.helper.downloader import DownloaderHelper
 
+
+class PathPrefixIndex(object):
+    """
+    路径前缀树，按路径层级保存做种源文件路径，判断路径是否为某个做种路径或其上级目录
+    """
+
+    def __init__(self, paths=None):
+        self._root = {}
+        for path in paths or []:
+            self.add(path)
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        """
+        按路径层级拆分，统一分隔符并忽略多余的分隔符
+        """
+        return [part for part in str(path).replace("\\", "/").split("/") if part]
+
+    def add(self, path: str):
+        if not path:
+            return
+        node = self._root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+
+    def contains(self, path: str) -> bool:
+        """
+        路径本身或其下级路径是否存在于做种路径中
+        """
+        parts = self.split(path)
+        if not parts:
+            return False
+        node = self._root
+        for part in parts:
+            node = node.get(part)
+            if node is None:
+                return False
+        return True
+
+
 class CleanInvalidSeed(_PluginBase):
     # 插件名称
     plugin_name = "清理QB无效做种"
@@ -28,7 +69,7 @@ class CleanInvalidSeed(_PluginBase):
     # 插件图标
     plugin_icon = "clean_a.png"
     # 插件版本
-    plugin_version = "2.0"
+    plugin_version = "2.2"
     # 插件作者
     plugin_author = "DzAvril"
     # 作者主页
@@ -65,6 +106,10 @@ class CleanInvalidSeed(_PluginBase):
         "err torrent banned",
     ]
     _custom_error_msg = ""
+    # 并发获取tracker的线程数
+    _tracker_workers = 8
+    # 并发统计文件大小的线程数
+    _size_workers = 4
 
     def init_plugin(self, config: dict = None):
         self.downloader_helper = DownloaderHelper()
@@ -339,6 +384,25 @@ class CleanInvalidSeed(_PluginBase):
             return []
         return all_torrents
 
+    def get_torrents_trackers(self, torrents: list) -> Dict[str, Optional[list]]:
+        """
+        并发获取所有种子的tracker信息，每个种子仅请求一次
+        QB的 sync/maindata 只包含tracker地址而没有状态和消息，因此通过有限的线程池逐个获取
+        :return: 种子hash -> tracker列表，获取失败时为None
+        """
+
+        def fetch_trackers(torrent):
+            try:
+                return torrent.get("hash"), list(torrent.trackers)
+            except Exception as e:
+                logger.error(f"获取种子 {torrent.name} tracker信息失败：{str(e)}")
+                return torrent.get("hash"), None
+
+        if not torrents:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self._tracker_workers, len(torrents))) as executor:
+            return dict(executor.map(fetch_trackers, torrents))
+
     def clean_invalid_seed(self):
         for service in self.service_info.values():
             downloader_name = service.name
@@ -348,6 +412,8 @@ class CleanInvalidSeed(_PluginBase):
                 continue
             logger.info(f"开始清理 {downloader_name} 无效做种...")
             all_torrents = self.get_all_torrents(service)
+            # 一次性获取全部种子的tracker信息，后续筛选均使用该结果
+            torrents_trackers = self.get_torrents_trackers(all_torrents)
             temp_invalid_torrents = []
             # tracker未工作，但暂时不能判定为失效做种，需人工判断
             tracker_not_working_torrents = []
@@ -364,7 +430,9 @@ class CleanInvalidSeed(_PluginBase):
             error_msgs = self._error_msg + custom_msgs
             # 第一轮筛选出所有未工作的种子
             for torrent in all_torrents:
-                trackers = torrent.trackers
+                trackers = torrents_trackers.get(torrent.get("hash"))
+                if trackers is None:
+                    continue
                 is_invalid = True
                 is_tracker_working = False
                 for tracker in trackers:
@@ -400,7 +468,7 @@ class CleanInvalidSeed(_PluginBase):
             invalid_torrent_tuple_list = []
             deleted_torrent_tuple_list = []
             for torrent in temp_invalid_torrents:
-                trackers = torrent.trackers
+                trackers = torrents_trackers.get(torrent.get("hash")) or []
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
                         continue
@@ -467,7 +535,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(tracker_not_working_torrents)):
                 torrent = tracker_not_working_torrents[index]
-                trackers = torrent.trackers
+                trackers = torrents_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -478,7 +546,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(invalid_torrents_exclude_categories)):
                 torrent = invalid_torrents_exclude_categories[index]
-                trackers = torrent.trackers
+                trackers = torrents_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -489,7 +557,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(invalid_torrents_exclude_labels)):
                 torrent = invalid_torrents_exclude_labels[index]
-                trackers = torrent.trackers
+                trackers = torrents_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -583,11 +651,11 @@ class CleanInvalidSeed(_PluginBase):
             source_path_map[mp_path] = qb_path
             source_paths.append(mp_path)
         # 所有做种源文件路径
-        content_path_set = set()
-        for torrent in all_torrents:
-            content_path_set.add(torrent.content_path)
+        content_path_index = PathPrefixIndex(torrent.content_path for torrent in all_torrents)
 
         message = "检测未做种无效源文件：\n"
+        # 未做种的无效源文件
+        invalid_files = []
         for source_path_str in source_paths:
             source_path = Path(source_path_str)
             # 判断source_path是否存在
@@ -616,22 +684,24 @@ class CleanInvalidSeed(_PluginBase):
                 qb_path = (str(source_file)).replace(
                     source_path_str, source_path_map[source_path_str]
                 )
-                # todo: 优化性能
-                is_exist = False
-                for content_path in content_path_set:
-                    if qb_path in content_path:
-                        is_exist = True
-                        break
+                if not content_path_index.contains(qb_path):
+                    invalid_files.append(source_file)
 
-                if not is_exist:
-                    deleted_file_cnt += 1
-                    message += f"{deleted_file_cnt}. {str(source_file)}\n"
-                    total_size += self.get_size(source_file)
-                    if self._delete_invalid_files:
-                        if source_file.is_file():
-                            source_file.unlink()
-                        elif source_file.is_dir():
-                            shutil.rmtree(source_file)
+        # 并发统计无效源文件大小
+        if invalid_files:
+            with ThreadPoolExecutor(max_workers=min(self._size_workers, len(invalid_files))) as executor:
+                file_sizes = list(executor.map(self.get_size, invalid_files))
+        else:
+            file_sizes = []
+        for source_file, file_size in zip(invalid_files, file_sizes):
+            deleted_file_cnt += 1
+            message += f"{deleted_file_cnt}. {str(source_file)}\n"
+            total_size += file_size
+            if self._delete_invalid_files:
+                if source_file.is_file():
+                    source_file.unlink()
+                elif source_file.is_dir():
+                    shutil.rmtree(source_file)
 
         message += f"检测到{deleted_file_cnt}个未做种的无效源文件，共占用{StringUtils.str_filesize(total_size)}空间。\n"
         if self._delete_invalid_files:
@@ -646,14 +716,27 @@ class CleanInvalidSeed(_PluginBase):
             )
         logger.info("检测无效源文件任务结束")
 
-    def get_size(self, path: Path):
-        total_size = 0
+    @staticmethod
+    def get_size(path: Path):
         if path.is_file():
             return path.stat().st_size
-        # rglob 方法用于递归遍历所有文件和目录
-        for entry in path.rglob("*"):
-            if entry.is_file():
-                total_size += entry.stat().st_size
+        # 使用 os.scandir 遍历，复用目录项中的文件类型信息，减少 stat 调用
+        total_size = 0
+        pending_dirs = [str(path)]
+        while pending_dirs:
+            current_dir = pending_dirs.pop()
+            try:
+                with os.scandir(current_dir) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending_dirs.append(entry.path)
+                            elif entry.is_file():
+                                total_size += entry.stat().st_size
+                        except OSError as e:
+                            logger.warning(f"获取 {entry.path} 大小失败：{str(e)}")
+            except OSError as e:
+                logger.warning(f"遍历目录 {current_dir} 失败：{str(e)}")
         return total_size
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
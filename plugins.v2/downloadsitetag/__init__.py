@@ -6,10 +6,12 @@ import pytz
 from app.helper.sites import SitesHelper
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.context import Context
 from app.core.event import eventmanager, Event
+from app.db import db_query
 from app.db.downloadhistory_oper import DownloadHistoryOper
 from app.db.models.downloadhistory import DownloadHistory
 from app.helper.downloader import DownloaderHelper
@@ -28,7 +30,7 @@ class DownloadSiteTag(_PluginBase):
     # 插件图标
     plugin_icon = "Youtube-dl_B.png"
     # 插件版本
-    plugin_version = "2.2"
+    plugin_version = "2.3"
     # 插件作者
     plugin_author = "叮叮当"
     # 作者主页
@@ -62,6 +64,8 @@ class DownloadSiteTag(_PluginBase):
     _category_tv = None
     _category_anime = None
     _downloaders = None
+    # 批量查询下载历史时每次查询的hash数量
+    _history_chunk_size = 500
 
     def init_plugin(self, config: dict = None):
         self.downloadhistory_oper = DownloadHistoryOper()
@@ -229,6 +233,12 @@ class DownloadSiteTag(_PluginBase):
             logger.info(f"{self.LOG_TAG}按时间重新排序 {downloader} 种子数：{len(torrents)}")
             # 按添加时间进行排序, 时间靠前的按大小和名称加入处理历史, 判定为原始种子, 其他为辅种
             torrents = self._torrents_sort(torrents=torrents, dl_type=service.type)
+            # 批量查询全部种子的下载历史
+            histories = self._get_histories_by_hashes(
+                hashes=[self._get_hash(torrent=torrent, dl_type=service.type) for torrent in torrents])
+            # 按目标标签、分类分组，最后统一设置
+            tag_groups: Dict[Tuple[str, ...], List[str]] = {}
+            cat_groups: Dict[str, List[str]] = {}
             logger.info(f"{self.LOG_TAG}下载器 {downloader} 分析种子信息中 ...")
             for torrent in torrents:
                 try:
@@ -246,7 +256,7 @@ class DownloadSiteTag(_PluginBase):
                     torrent_tags = self._get_label(torrent=torrent, dl_type=service.type)
                     torrent_cat = self._get_category(torrent=torrent, dl_type=service.type)
                     # 提取种子hash对应的下载历史
-                    history: DownloadHistory = self.downloadhistory_oper.get_by_hash(_hash)
+                    history: Optional[DownloadHistory] = histories.get(_hash)
                     if not history:
                         # 如果找到已处理种子的历史, 表明当前种子是辅种, 否则创建一个空DownloadHistory
                         if _key and _key in dispose_history:
@@ -311,15 +321,71 @@ class DownloadSiteTag(_PluginBase):
                     # 判断当前种子是否不需要修改
                     if not _cat and not _tags:
                         continue
-                    # 执行通用方法, 设置种子标签与分类
-                    self._set_torrent_info(service=service, _hash=_hash, _torrent=torrent, _tags=_tags, _cat=_cat,
-                                           _original_tags=torrent_tags)
+                    # 加入分组, TR设置标签时会覆盖原有标签, 因此需要合并原始标签
+                    if _tags:
+                        if service.type != "qbittorrent" and torrent_tags:
+                            _tags = list(set(torrent_tags).union(set(_tags)))
+                        tag_groups.setdefault(tuple(sorted(_tags)), []).append(_hash)
+                    if _cat:
+                        cat_groups.setdefault(_cat, []).append(_hash)
                 except Exception as e:
                     logger.error(
                         f"{self.LOG_TAG}分析种子信息时发生了错误: {str(e)}")
+            # 批量设置种子标签与分类
+            self._set_torrents_info_bulk(service=service, tag_groups=tag_groups, cat_groups=cat_groups)
 
         logger.info(f"{self.LOG_TAG}执行完成")
 
+    @db_query
+    def _get_histories_by_hashes(self, db: Session = None, hashes: List[str] = None) -> Dict[str, DownloadHistory]:
+        """
+        分批查询种子hash对应的下载历史, 同一hash存在多条历史时取最新一条
+        """
+        histories = {}
+        hashes = list({_hash for _hash in hashes or [] if _hash})
+        for i in range(0, len(hashes), self._history_chunk_size):
+            chunk = hashes[i:i + self._history_chunk_size]
+            result = db.query(DownloadHistory) \
+                .filter(DownloadHistory.download_hash.in_(chunk)) \
+                .order_by(DownloadHistory.date.desc()) \
+                .all()
+            for history in result:
+                histories.setdefault(history.download_hash, history)
+        return histories
+
+    def _set_torrents_info_bulk(self, service: ServiceInfo, tag_groups: Dict[Tuple[str, ...], List[str]],
+                                cat_groups: Dict[str, List[str]]):
+        """
+        按目标标签与分类分组, 每组仅调用一次下载器接口
+        """
+        if not service or not service.instance:
+            return
+        downloader_obj = service.instance
+        for _tags, hashes in tag_groups.items():
+            try:
+                if service.type == "qbittorrent":
+                    downloader_obj.set_torrents_tag(ids=hashes, tags=list(_tags))
+                else:
+                    downloader_obj.set_torrent_tag(ids=hashes, tags=list(_tags))
+                logger.warn(f"{self.LOG_TAG}下载器: {service.name} {len(hashes)} 个种子  标签: {','.join(_tags)}")
+            except Exception as e:
+                logger.error(f"{self.LOG_TAG}下载器: {service.name} 设置标签 {','.join(_tags)} 失败: {str(e)}")
+        # 设置分类 <tr暂不支持>
+        if service.type != "qbittorrent":
+            return
+        for _cat, hashes in cat_groups.items():
+            try:
+                # 尝试设置种子分类, 如果失败, 则创建再设置一遍
+                try:
+                    downloader_obj.qbc.torrents_set_category(category=_cat, torrent_hashes=hashes)
+                except Exception as e:
+                    logger.warn(f"下载器 {service.name} 设置分类 {_cat} 失败：{str(e)}, 尝试创建分类再设置 ...")
+                    downloader_obj.qbc.torrents_createCategory(name=_cat)
+                    downloader_obj.qbc.torrents_set_category(category=_cat, torrent_hashes=hashes)
+                logger.warn(f"{self.LOG_TAG}下载器: {service.name} {len(hashes)} 个种子  分类: {_cat}")
+            except Exception as e:
+                logger.error(f"{self.LOG_TAG}下载器: {service.name} 设置分类 {_cat} 失败: {str(e)}")
+
     def _genre_ids_get_cat(self, mtype, genre_ids=None):
         """
         根据genre_ids判断是否<动漫>分类
@@ -1,8 +1,11 @@
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from threading import Event
-from typing import Any, Dict, List, Optional, Tuple
+from threading import Event, Lock, Semaphore
+from typing import Any, Dict, List, Optional, Tuple, Set
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -18,6 +21,7 @@ from app.helper.sites import SitesHelper
 from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.iyuuautoseed.cache_helper import SeedCacheHelper, SeedHistoryIndex
 from app.plugins.iyuuautoseed.iyuu_helper import IyuuHelper
 from app.schemas import NotificationType, ServiceInfo
 from app.schemas.types import EventType
@@ -25,6 +29,34 @@ from app.utils.http import RequestUtils
 from app.utils.string import StringUtils
 
 
+class SiteRateLimiter:
+    """
+    站点下载限速，限制同一站点同时下载的种子数及相邻两次下载的最小间隔，以及全部站点同时下载的种子数
+    """
+
+    def __init__(self, concurrency: int = 2, interval: float = 1.0, total: int = 5):
+        self._concurrency = max(1, concurrency)
+        self._interval = max(0.0, interval)
+        self._total = Semaphore(max(1, total))
+        self._lock = Lock()
+        self._semaphores: Dict[str, Semaphore] = {}
+        self._next_times: Dict[str, float] = {}
+
+    @contextmanager
+    def acquire(self, site: str):
+        with self._lock:
+            semaphore = self._semaphores.setdefault(site, Semaphore(self._concurrency))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_times.get(site, 0.0))
+                self._next_times[site] = start + self._interval
+            if start > now:
+                time.sleep(start - now)
+            with self._total:
+                yield
+
+
 class IYUUAutoSeed(_PluginBase):
     # 插件名称
     plugin_name = "IYUU自动辅种"
@@ -33,7 +65,7 @@ class IYUUAutoSeed(_PluginBase):
     # 插件图标
     plugin_icon = "IYUU.png"
     # 插件版本
-    plugin_version = "2.8"
+    plugin_version = "3.4.6"
     # 插件作者
     plugin_author = "jxxghp,ckun"
     # 作者主页
@@ -70,8 +102,22 @@ class IYUUAutoSeed(_PluginBase):
     _addhosttotag = False
     _size = None
     _clearcache = False
+    # 辅种失败缓存有效期（天）
+    _error_cache_days = 0
+    # 增量辅种，仅查询新完成的种子及轮询部分已查询过的种子
+    _incremental = False
+    # 增量辅种时，已查询过的种子经过多少次辅种全部轮询一遍
+    _incremental_cycles = 10
     # 退出事件
     _event = Event()
+    # 同时扫描的下载器数量
+    _scan_workers = 3
+    # 种子文件下载线程数，多个下载器同时扫描时共享
+    _download_workers = 5
+    # 单个站点同时下载的种子数
+    _site_concurrency = 2
+    # 同一站点相邻两次下载的最小间隔（秒）
+    _site_interval = 1.0
     # 种子链接xpaths
     _torrent_xpaths = [
         "//form[contains(@action, 'download.php?id=')]/@action",
@@ -81,13 +127,26 @@ class IYUUAutoSeed(_PluginBase):
     ]
     # 待校全种子hash清单
     _recheck_torrents = {}
-    _is_recheck_running = False
-    # 辅种缓存，出错的种子不再重复辅种，可清除
-    _error_caches = []
-    # 辅种缓存，辅种成功的种子，可清除
-    _success_caches = []
-    # 辅种缓存，出错的种子不再重复辅种，且无法清除。种子被删除404等情况
-    _permanent_error_caches = []
+    _recheck_lock = Lock()
+    # 待校全种子清单锁，多个下载器同时辅种时追加与校验检查可能并发修改清单
+    _recheck_torrents_lock = Lock()
+    # 辅种缓存，辅种成功及出错的种子不再重复辅种，出错缓存超过有效期后失效
+    _cache_helper: Optional[SeedCacheHelper] = None
+    # 本次辅种中各下载器已有种子的hash集合，未能获取时为None，退化为逐个查询
+    _downloader_hashes: Dict[str, Optional[Set[str]]] = {}
+    # 本次辅种中已加入下载队列的种子，多个下载器同时扫描时避免重复下载
+    _pending_hashes: Set[str] = set()
+    # 本次辅种共享的站点下载限速
+    _site_limiter: Optional[SiteRateLimiter] = None
+    # 计数锁，多个下载器同时扫描时共享计数
+    _count_lock = Lock()
+    # 辅种历史缓冲，每组辅种完成后统一保存
+    _history_buffer: Dict[str, Dict[str, Set[str]]] = {}
+    _history_lock = Lock()
+    # 辅种历史索引，辅种结束后统一写回
+    _history_index: Optional[SeedHistoryIndex] = None
+    # 数据页展示的最大辅种历史数
+    _page_size = 200
     # 辅种计数
     total = 0
     realtotal = 0
@@ -119,15 +178,30 @@ class IYUUAutoSeed(_PluginBase):
             self._addhosttotag = config.get("addhosttotag")
             self._size = float(config.get("size")) if config.get("size") else 0
             self._clearcache = config.get("clearcache")
-            self._permanent_error_caches = [] if self._clearcache else config.get("permanent_error_caches") or []
-            self._error_caches = [] if self._clearcache else config.get("error_caches") or []
-            self._success_caches = [] if self._clearcache else config.get("success_caches") or []
+            self._error_cache_days = float(config.get("error_cache_days")) if config.get("error_cache_days") else 0
+            self._incremental = config.get("incremental")
+            self._incremental_cycles = int(config.get("incremental_cycles")) \
+                if config.get("incremental_cycles") else 10
+
+            self._cache_helper = SeedCacheHelper(plugin=self, error_ttl=self._error_cache_days * 86400)
+            if self._clearcache:
+                self._cache_helper.clear()
+            else:
+                # 旧版本的缓存保存在配置中，迁移至插件数据
+                self._cache_helper.add_all(SeedCacheHelper.SUCCESS, config.get("success_caches"))
+                self._cache_helper.add_all(SeedCacheHelper.ERROR, config.get("error_caches"))
+                self._cache_helper.add_all(SeedCacheHelper.PERMANENT_ERROR, config.get("permanent_error_caches"))
+                self._cache_helper.flush()
 
             # 过滤掉已删除的站点
             all_sites = [site.id for site in self.site_oper.list_order_by_pri()] + [site.get("id") for site in
                                                                                     self.__custom_sites()]
             self._sites = [site_id for site_id in all_sites if site_id in self._sites]
             self.__update_config()
+        else:
+            self._cache_helper = SeedCacheHelper(plugin=self)
+
+        self._history_index = SeedHistoryIndex(plugin=self)
 
         # 停止现有任务
         self.stop_service()
@@ -553,6 +627,61 @@ class IYUUAutoSeed(_PluginBase):
                                 ]
                             }
                         ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'error_cache_days',
+                                            'label': '失败缓存有效期(天)',
+                                            'placeholder': '超过有效期后重新尝试辅种，为空则不过期'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'incremental',
+                                            'label': '增量辅种',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'incremental_cycles',
+                                            'label': '增量轮询周期(次)',
+                                            'placeholder': '已查询过的种子经过多少次辅种全部重新查询一遍'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
                     }
                 ]
             }
@@ -572,11 +701,70 @@ class IYUUAutoSeed(_PluginBase):
             "nolabels": "",
             "labelsafterseed": "",
             "categoryafterseed": "",
-            "size": ""
+            "size": "",
+            "error_cache_days": "7",
+            "incremental": False,
+            "incremental_cycles": "10"
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        """
+        拼装插件详情页面，基于辅种历史索引展示最近的辅种记录
+        """
+        history_index = self._history_index.items() if self._history_index else []
+        if not history_index:
+            return [
+                {
+                    'component': 'div',
+                    'text': '暂无数据',
+                    'props': {
+                        'class': 'text-center',
+                    }
+                }
+            ]
+        histories = sorted(history_index, key=lambda x: x[1].get("time") or "", reverse=True)
+        items = [
+            {
+                'hash': current_hash,
+                'downloaders': "、".join(history.get("downloaders") or []),
+                'count': history.get("count") or 0,
+                'time': history.get("time")
+            } for current_hash, history in histories[:self._page_size]
+        ]
+        headers = [
+            {'title': '源种子Hash', 'key': 'hash', 'sortable': True},
+            {'title': '辅种下载器', 'key': 'downloaders', 'sortable': True},
+            {'title': '辅种数', 'key': 'count', 'sortable': True},
+            {'title': '更新时间', 'key': 'time', 'sortable': True},
+        ]
+        return [
+            {
+                'component': 'VRow',
+                'content': [
+                    {
+                        'component': 'VCol',
+                        'props': {
+                            'cols': 12,
+                        },
+                        'content': [
+                            {
+                                'component': 'VDataTableVirtual',
+                                'props': {
+                                    'class': 'text-sm',
+                                    'headers': headers,
+                                    'items': items,
+                                    'height': '30rem',
+                                    'density': 'compact',
+                                    'fixed-header': True,
+                                    'hide-no-data': True,
+                                    'hover': True
+                                }
+                            }
+                        ]
+                    }
+                ]
+            }
+        ]
 
     def __update_config(self):
         self.update_config({
@@ -596,9 +784,9 @@ class IYUUAutoSeed(_PluginBase):
             "categoryafterseed": self._categoryafterseed,
             "addhosttotag": self._addhosttotag,
             "size": self._size,
-            "success_caches": self._success_caches,
-            "error_caches": self._error_caches,
-            "permanent_error_caches": self._permanent_error_caches
+            "error_cache_days": self._error_cache_days,
+            "incremental": self._incremental,
+            "incremental_cycles": self._incremental_cycles
         })
 
     def auto_seed(self):
@@ -616,8 +804,64 @@ class IYUUAutoSeed(_PluginBase):
         self.exist = 0
         self.fail = 0
         self.cached = 0
-        # 扫描下载器辅种
-        for service in self.service_infos.values():
+        # 一次性获取各辅种目标下载器中已有种子的hash，避免逐个种子查询下载器
+        service_infos = self.service_infos
+        if not service_infos:
+            return
+        target_services = [self.auto_service_info] if self._auto_downloader else list(service_infos.values())
+        self._downloader_hashes = {service.name: self.__get_downloader_hashes(service)
+                                   for service in target_services if service}
+        self._pending_hashes = set()
+        self._site_limiter = SiteRateLimiter(concurrency=self._site_concurrency, interval=self._site_interval,
+                                             total=self._download_workers)
+        # 多个下载器同时扫描辅种
+        services = list(service_infos.values())
+        with ThreadPoolExecutor(max_workers=max(1, min(self._scan_workers, len(services)))) as executor:
+            results = list(executor.map(self.__scan_service, services))
+        if not all(completed for completed, _ in results):
+            # 辅种服务停止
+            self._cache_helper.flush()
+            self.__flush_history()
+            self._history_index.flush()
+            return
+        self._downloader_hashes = {}
+        # 全部下载器扫描成功时，清理已不在下载器中的种子的查询记录
+        if self._incremental and all(scanned_hashes is not None for _, scanned_hashes in results):
+            self._cache_helper.retain(SeedCacheHelper.QUERIED,
+                                      set().union(*(scanned_hashes for _, scanned_hashes in results)))
+        # 指定主辅分离时只检查辅种下载器
+        if self.auto_service_info:
+            self.start_service_torrents(self.auto_service_info)
+        else:
+            # qb 中，辅种结束后，一起开始所有辅种后暂停的种子（排除了出错的种子），及时人工确认也是手动开始这部分种子
+            for service in service_infos.values():
+                self.start_service_torrents(service)
+        # 保存缓存、辅种历史及历史索引
+        self._cache_helper.flush()
+        self.__flush_history()
+        self._history_index.flush()
+        # 发送消息
+        if self._notify:
+            if self.success or self.fail:
+                self.post_message(
+                    mtype=NotificationType.SiteMessage,
+                    title="【IYUU自动辅种任务完成】",
+                    text=f"服务器返回可辅种总数：{self.total}\n"
+                         f"实际可辅种数：{self.realtotal}\n"
+                         f"已存在：{self.exist}\n"
+                         f"成功：{self.success}\n"
+                         f"失败：{self.fail}\n"
+                         f"{self.cached} 条失败记录已加入缓存"
+                )
+        logger.info("辅种任务执行完成")
+
+    def __scan_service(self, service: ServiceInfo) -> Tuple[bool, Optional[Set[str]]]:
+        """
+        扫描单个下载器辅种
+        :return: 是否继续（辅种服务停止时为False）、下载器中已完成种子的hash（扫描失败时为None）
+        """
+        scanned_hashes: Optional[Set[str]] = set()
+        try:
             downloader = service.name
             downloader_obj = service.instance
             logger.info(f"开始扫描下载器 {downloader} ...")
@@ -627,15 +871,17 @@ class IYUUAutoSeed(_PluginBase):
                 logger.info(f"下载器 {downloader} 已完成种子数：{len(torrents)}")
             else:
                 logger.info(f"下载器 {downloader} 没有已完成种子")
-                continue
+                return True, None if torrents is None else scanned_hashes
+            if self._incremental:
+                scanned_hashes = {self.__get_hash(torrent=torrent, dl_type=service.type) for torrent in torrents}
             hash_strs = []
             for torrent in torrents:
                 if self._event.is_set():
                     logger.info(f"辅种服务停止")
-                    return
+                    return False, scanned_hashes
                 # 获取种子hash
                 hash_str = self.__get_hash(torrent=torrent, dl_type=service.type)
-                if hash_str in self._error_caches or hash_str in self._permanent_error_caches:
+                if self._cache_helper.is_error(hash_str):
                     logger.info(f"种子 {hash_str} 辅种失败且已缓存，跳过 ...")
                     continue
                 save_path = self.__get_save_path(torrent=torrent, dl_type=service.type)
@@ -673,43 +919,64 @@ class IYUUAutoSeed(_PluginBase):
                     "hash": hash_str,
                     "save_path": save_path
                 })
+            if hash_strs and self._incremental:
+                hash_strs = self.__select_incremental_hashes(hash_strs=hash_strs)
             if hash_strs:
                 logger.info(f"总共需要辅种的种子数：{len(hash_strs)}")
                 # 分组处理，减少IYUU Api请求次数
                 chunk_size = 200
                 for i in range(0, len(hash_strs), chunk_size):
+                    if self._event.is_set():
+                        logger.info(f"辅种服务停止")
+                        return False, scanned_hashes
                     # 切片操作
                     chunk = hash_strs[i:i + chunk_size]
                     # 处理分组
-                    self.__seed_torrents(hash_strs=chunk,
-                                         service=service)
+                    if self.__seed_torrents(hash_strs=chunk,
+                                            service=service) and self._incremental:
+                        # 记录查询时间，用于增量辅种，查询记录在辅种结束后统一写回
+                        self._cache_helper.add_all(SeedCacheHelper.QUERIED,
+                                                   [item.get("hash") for item in chunk], refresh=True)
+                    # 每组处理完成后写回变更的辅种结果缓存及辅种历史
+                    self._cache_helper.flush(kinds=SeedCacheHelper.result_kinds)
+                    self.__flush_history()
                 # 触发校验检查
                 self.check_recheck()
             else:
                 logger.info(f"没有需要辅种的种子")
-        # 指定主辅分离时只检查辅种下载器
-        if self.auto_service_info:
-            self.start_service_torrents(self.auto_service_info)
-        else:
-            # qb 中，辅种结束后，一起开始所有辅种后暂停的种子（排除了出错的种子），及时人工确认也是手动开始这部分种子
-            for service in self.service_infos.values():
-                self.start_service_torrents(service)
-        # 保存缓存
-        self.__update_config()
-        # 发送消息
-        if self._notify:
-            if self.success or self.fail:
-                self.post_message(
-                    mtype=NotificationType.SiteMessage,
-                    title="【IYUU自动辅种任务完成】",
-                    text=f"服务器返回可辅种总数：{self.total}\n"
-                         f"实际可辅种数：{self.realtotal}\n"
-                         f"已存在：{self.exist}\n"
-                         f"成功：{self.success}\n"
-                         f"失败：{self.fail}\n"
-                         f"{self.cached} 条失败记录已加入缓存"
-                )
-        logger.info("辅种任务执行完成")
+        except Exception as e:
+            logger.error(f"下载器 {service.name} 辅种出错：{str(e)}")
+            return True, None
+        return True, scanned_hashes
+
+    def __count(self, name: str, value: int = 1):
+        """
+        辅种计数
+        """
+        with self._count_lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def __get_downloader_hashes(self, service: ServiceInfo) -> Optional[Set[str]]:
+        """
+        获取下载器中全部种子的hash
+        """
+        torrents, error = service.instance.get_torrents()
+        if error or torrents is None:
+            logger.warning(f"获取下载器 {service.name} 种子列表失败，将逐个查询种子是否已存在")
+            return None
+        hashes = {self.__get_hash(torrent=torrent, dl_type=service.type) for torrent in torrents}
+        logger.info(f"下载器 {service.name} 已有种子数：{len(hashes)}")
+        return hashes
+
+    def __exists_in_downloader(self, info_hash: str, service: ServiceInfo) -> bool:
+        """
+        判断种子是否已在下载器中，优先使用本次辅种预先获取的hash集合
+        """
+        hashes = self._downloader_hashes.get(service.name)
+        if hashes is not None:
+            return info_hash in hashes
+        torrent_info, _ = service.instance.get_torrents(ids=[info_hash])
+        return True if torrent_info else False
 
     def start_service_torrents(self, service: ServiceInfo):
         """
@@ -736,20 +1003,21 @@ class IYUUAutoSeed(_PluginBase):
         """
         if not self._recheck_torrents:
             return
-        if self._is_recheck_running:
-            return
-        self._is_recheck_running = True
-        if self.auto_service_info:
-            # 检查指定下载器
-            self.check_recheck_service(self.auto_service_info)
-            self._is_recheck_running = False
-            return
-        if not self.service_infos:
+        # 已有检查任务在执行时直接跳过，多个下载器同时扫描时也可能并发触发
+        if not self._recheck_lock.acquire(blocking=False):
             return
-        for service in self.service_infos.values():
-            # 需要检查的种子
-            self.check_recheck_service(service)
-        self._is_recheck_running = False
+        try:
+            if self.auto_service_info:
+                # 检查指定下载器
+                self.check_recheck_service(self.auto_service_info)
+                return
+            if not self.service_infos:
+                return
+            for service in self.service_infos.values():
+                # 需要检查的种子
+                self.check_recheck_service(service)
+        finally:
+            self._recheck_lock.release()
 
     def check_recheck_service(self, service: ServiceInfo):
         """
@@ -758,7 +1026,8 @@ class IYUUAutoSeed(_PluginBase):
         # 需要检查的种子
         downloader = service.name
         downloader_obj = service.instance
-        recheck_torrents = self._recheck_torrents.get(downloader) or []
+        with self._recheck_torrents_lock:
+            recheck_torrents = list(self._recheck_torrents.get(downloader) or [])
         if not recheck_torrents:
             return
         logger.info(f"开始检查下载器 {downloader} 的校验任务 ...")
@@ -775,40 +1044,78 @@ class IYUUAutoSeed(_PluginBase):
                 logger.info(f"共 {len(can_seeding_torrents)} 个任务校验完成，开始辅种 ...")
                 # 开始任务
                 downloader_obj.start_torrents(ids=can_seeding_torrents)
-                # 去除已经处理过的种子
-                self._recheck_torrents[downloader] = list(
-                    set(recheck_torrents).difference(set(can_seeding_torrents)))
+                # 去除已经处理过的种子，保留检查期间新追加的种子
+                self.__remove_recheck_torrents(downloader, can_seeding_torrents)
         elif torrents is None:
             logger.info(f"下载器 {downloader} 查询校验任务失败，将在下次继续查询 ...")
             return
         else:
             logger.info(f"下载器 {downloader} 中没有需要检查的校验任务，清空待处理列表 ...")
-            self._recheck_torrents[downloader] = []
+            self.__remove_recheck_torrents(downloader, recheck_torrents)
+
+    def __remove_recheck_torrents(self, downloader: str, hashes: List[str]):
+        """
+        从待校验清单中移除指定种子
+        """
+        removed = set(hashes)
+        with self._recheck_torrents_lock:
+            self._recheck_torrents[downloader] = [torrent_hash for torrent_hash
+                                                  in self._recheck_torrents.get(downloader) or []
+                                                  if torrent_hash not in removed]
 
-    def __seed_torrents(self, hash_strs: list, service: ServiceInfo):
+    def __select_incremental_hashes(self, hash_strs: List[dict]) -> List[dict]:
+        """
+        增量辅种，选出从未查询过的种子，及按查询时间从早到晚轮询的部分已查询种子
+        """
+        new_items, queried_items = [], []
+        for item in hash_strs:
+            queried_time = self._cache_helper.get_time(SeedCacheHelper.QUERIED, item.get("hash"))
+            if queried_time is None:
+                new_items.append(item)
+            else:
+                queried_items.append((queried_time, item))
+        cycles = max(1, self._incremental_cycles or 1)
+        rotate_count = -(-len(queried_items) // cycles)
+        queried_items.sort(key=lambda x: x[0])
+        rotate_items = [item for _, item in queried_items[:rotate_count]]
+        logger.info(f"增量辅种，新增种子数：{len(new_items)}，"
+                    f"已查询种子数：{len(queried_items)}，本次轮询：{len(rotate_items)}")
+        return new_items + rotate_items
+
+    def __seed_torrents(self, hash_strs: list, service: ServiceInfo) -> bool:
         """
         执行一批种子的辅种
+        :return: 本批次是否已完成查询及辅种，可记录为已查询用于增量辅种
+                 未能向IYUU查询、辅种下载器不可用或辅种服务中途停止时返回False，下次辅种时重新查询
         """
         if not hash_strs:
-            return
+            return False
         logger.info(f"下载器 {service.name} 开始查询辅种，数量：{len(hash_strs)} ...")
         # 下载器中的Hashs
-        hashs = [item.get("hash") for item in hash_strs]
+        hashs = {item.get("hash") for item in hash_strs}
         # 每个Hash的保存目录
         save_paths = {}
         for item in hash_strs:
             save_paths[item.get("hash")] = item.get("save_path")
         # 查询可辅种数据
-        seed_list, msg = self.iyuu_helper.get_seed_info(hashs)
+        seed_list, msg = self.iyuu_helper.get_seed_info(list(hashs))
         if not isinstance(seed_list, dict):
             # 判断辅种异常是否是由于Token未认证导致的，由于没有解决接口，只能从返回值来判断
             if self._token and msg == '请求缺少token':
                 logger.warn(f'IYUU辅种失败，疑似站点未绑定插件配置不完整，请先检查是否完成站点绑定！{msg}')
             else:
                 logger.warn(f"当前种子列表没有可辅种的站点：{msg}")
-            return
+            # 请求成功但没有返回可辅种数据时，同样视为已查询
+            return seed_list is not None
         else:
             logger.info(f"IYUU返回可辅种数：{len(seed_list)}")
+        # 如果配置了主辅分离使用辅种下载器
+        target_service = self.auto_service_info if self._auto_downloader else service
+        if not target_service:
+            logger.warn("辅种下载器不可用，跳过本批次辅种")
+            return False
+        # 需要下载的辅种任务
+        seed_tasks = []
         # 遍历
         for current_hash, seed_info in seed_list.items():
             if not seed_info:
@@ -817,9 +1124,6 @@ class IYUUAutoSeed(_PluginBase):
             if not isinstance(seed_torrents, list):
                 seed_torrents = [seed_torrents]
 
-            # 本次辅种成功的种子
-            success_torrents = []
-
             for seed in seed_torrents:
                 if not seed:
                     continue
@@ -830,34 +1134,77 @@ class IYUUAutoSeed(_PluginBase):
                 if seed.get("info_hash") in hashs:
                     logger.info(f"{seed.get('info_hash')} 已在下载器中，跳过 ...")
                     continue
-                if seed.get("info_hash") in self._success_caches:
+                if self._cache_helper.is_success(seed.get("info_hash")):
                     logger.info(f"{seed.get('info_hash')} 已处理过辅种，跳过 ...")
                     continue
-                if seed.get("info_hash") in self._error_caches or seed.get("info_hash") in self._permanent_error_caches:
+                if self._cache_helper.is_error(seed.get("info_hash")):
                     logger.info(f"种子 {seed.get('info_hash')} 辅种失败且已缓存，跳过 ...")
                     continue
-                # 添加任务 如果配置了主辅分离使用辅种下载器
-                if self._auto_downloader:
-                    success = self.__download_torrent(seed=seed,
-                                                      service=self.auto_service_info,
-                                                      save_path=save_paths.get(current_hash))
-                else:
-                    success = self.__download_torrent(seed=seed,
-                                                      service=service,
-                                                      save_path=save_paths.get(current_hash))
-                if success:
-                    success_torrents.append(seed.get("info_hash"))
-
-            # 辅种成功的去重放入历史
-            if len(success_torrents) > 0:
-                self.__save_history(current_hash=current_hash,
-                                    downloader=service.name,
-                                    success_torrents=success_torrents)
-
+                # 不同种子可能返回相同的可辅种种子，多个下载器同时扫描时也可能重复
+                with self._count_lock:
+                    if seed.get("info_hash") in self._pending_hashes:
+                        logger.info(f"{seed.get('info_hash')} 已在辅种队列中，跳过 ...")
+                        continue
+                    self._pending_hashes.add(seed.get("info_hash"))
+                seed_task = self.__prepare_seed_task(seed=seed,
+                                                     service=target_service,
+                                                     save_path=save_paths.get(current_hash))
+                if seed_task:
+                    seed_task["current_hash"] = current_hash
+                    seed_tasks.append(seed_task)
+
+        # 本次辅种成功的种子
+        success_torrents: Dict[str, List[str]] = {}
+        # 辅种服务是否中途停止
+        stopped = False
+        if seed_tasks:
+            logger.info(f"开始下载辅种种子文件，数量：{len(seed_tasks)} ...")
+            # 多线程下载种子文件，每个种子下载完成后立即添加到下载器，慢速站点不影响其他站点
+            limiter = self._site_limiter or SiteRateLimiter(concurrency=self._site_concurrency,
+                                                            interval=self._site_interval,
+                                                            total=self._download_workers)
+            with ThreadPoolExecutor(max_workers=min(self._download_workers, len(seed_tasks))) as executor:
+                futures = {executor.submit(self.__fetch_seed_torrent, seed_task, limiter): seed_task
+                           for seed_task in seed_tasks}
+                for future in as_completed(futures):
+                    if self._event.is_set():
+                        logger.info(f"辅种服务停止")
+                        for pending_future in futures:
+                            pending_future.cancel()
+                        stopped = True
+                        break
+                    seed_task = futures[future]
+                    try:
+                        status, content, torrent_url, error_msg = future.result()
+                    except Exception as e:
+                        logger.error(f"下载种子文件出错：{str(e)}")
+                        status, content, torrent_url, error_msg = "error", None, None, str(e)
+                    if self.__add_seed_torrent(seed_task=seed_task, status=status, content=content,
+                                               torrent_url=torrent_url, error_msg=error_msg):
+                        success_torrents.setdefault(seed_task.get("current_hash"), []).append(
+                            seed_task.get("seed").get("info_hash"))
+
+        # 辅种成功的去重放入历史，中途停止时已成功的种子同样记录
+        for current_hash, torrents in success_torrents.items():
+            self.__save_history(current_hash=current_hash,
+                                downloader=service.name,
+                                success_torrents=torrents)
+
+        if stopped:
+            return False
         logger.info(f"下载器 {service.name} 辅种完成")
+        return True
 
     def __save_history(self, current_hash: str, downloader: str, success_torrents: []):
         """
+        记录辅种历史，先写入缓冲，由 __flush_history 统一保存
+        """
+        with self._history_lock:
+            self._history_buffer.setdefault(current_hash, {}).setdefault(downloader, set()).update(success_torrents)
+
+    def __flush_history(self):
+        """
+        保存缓冲中的辅种历史，每个源种子Hash仅读写一次，并更新内存中的历史索引，索引在辅种结束后统一写回
         [
             {
                 "downloader":"2",
@@ -875,38 +1222,40 @@ class IYUUAutoSeed(_PluginBase):
             }
         ]
         """
-        try:
-            # 查询当前Hash的辅种历史
-            seed_history = self.get_data(key=current_hash) or []
-
-            new_history = True
-            if len(seed_history) > 0:
-                for history in seed_history:
-                    if not history:
-                        continue
-                    if not isinstance(history, dict):
-                        continue
-                    if not history.get("downloader"):
-                        continue
-                    # 如果本次辅种下载器之前有过记录则继续添加
-                    if str(history.get("downloader")) == downloader:
-                        history_torrents = history.get("torrents") or []
-                        history["torrents"] = list(set(history_torrents + success_torrents))
-                        new_history = False
-                        break
-
-            # 本次辅种下载器之前没有成功记录则新增
-            if new_history:
-                seed_history.append({
-                    "downloader": downloader,
-                    "torrents": list(set(success_torrents))
-                })
-
-            # 保存历史
-            self.save_data(key=current_hash,
-                           value=seed_history)
-        except Exception as e:
-            print(str(e))
+        with self._history_lock:
+            history_buffer, self._history_buffer = self._history_buffer, {}
+            if not history_buffer:
+                return
+            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for current_hash, downloader_torrents in history_buffer.items():
+                try:
+                    # 查询当前Hash的辅种历史
+                    seed_history = self.get_data(key=current_hash) or []
+                    for downloader, success_torrents in downloader_torrents.items():
+                        new_history = True
+                        for history in seed_history:
+                            if not history or not isinstance(history, dict) or not history.get("downloader"):
+                                continue
+                            # 如果本次辅种下载器之前有过记录则继续添加
+                            if str(history.get("downloader")) == downloader:
+                                history_torrents = history.get("torrents") or []
+                                history["torrents"] = list(set(history_torrents).union(success_torrents))
+                                new_history = False
+                                break
+                        # 本次辅种下载器之前没有成功记录则新增
+                        if new_history:
+                            seed_history.append({
+                                "downloader": downloader,
+                                "torrents": list(success_torrents)
+                            })
+                    # 保存历史
+                    self.save_data(key=current_hash,
+                                   value=seed_history)
+                    self._history_index.update(current_hash,
+                                               SeedHistoryIndex.build_entry(seed_history, current_time))
+                except Exception as e:
+                    logger.error(f"保存辅种历史出错：{str(e)}")
+            logger.info(f"已保存 {len(history_buffer)} 个种子的辅种历史")
 
     def __download(self, service: ServiceInfo, content: bytes,
                    save_path: str, site_name: str) -> Optional[str]:
@@ -955,104 +1304,151 @@ class IYUUAutoSeed(_PluginBase):
         logger.error(f"不支持的下载器：{service.type}")
         return None
 
-    def __download_torrent(self, seed: dict, service: ServiceInfo, save_path: str):
+    def __prepare_seed_task(self, seed: dict, service: ServiceInfo, save_path: str) -> Optional[dict]:
         """
-        下载种子
+        检查可辅种种子的站点及是否已在下载器中，返回需要下载的辅种任务
         torrent: {
                     "sid": 3,
                     "torrent_id": 377467,
                     "info_hash": "a444850638e7a6f6220e2efdde94099c53358159"
                 }
         """
-
-        def __is_special_site(url):
-            """
-            判断是否为特殊站点（是否需要添加https）
-            """
-            if "hdsky.me" in url:
-                return False
-            return True
-
-        self.total += 1
+        self.__count("total")
         # 获取种子站点及下载地址模板
         site_url, download_page = self.iyuu_helper.get_torrent_url(seed.get("sid"))
         if not site_url or not download_page:
             # 加入缓存
-            self._error_caches.append(seed.get("info_hash"))
-            self.fail += 1
-            self.cached += 1
-            return False
+            self._cache_helper.add(SeedCacheHelper.ERROR, seed.get("info_hash"))
+            self.__count("fail")
+            self.__count("cached")
+            return None
         # 查询站点
         site_domain = StringUtils.get_url_domain(site_url)
         # 站点信息
         site_info = self.sites_helper.get_indexer(site_domain)
         if not site_info or not site_info.get('url'):
             logger.debug(f"没有维护种子对应的站点：{site_url}")
-            return False
+            return None
         if self._sites and site_info.get('id') not in self._sites:
             logger.info("当前站点不在选择的辅种站点范围，跳过 ...")
-            return False
-        self.realtotal += 1
+            return None
+        self.__count("realtotal")
         # 查询hash值是否已经在下载器中
-        downloader_obj = service.instance
-        torrent_info, _ = downloader_obj.get_torrents(ids=[seed.get("info_hash")])
-        if torrent_info:
+        if self.__exists_in_downloader(info_hash=seed.get("info_hash"), service=service):
             logger.info(f"{seed.get('info_hash')} 已在下载器中，跳过 ...")
-            self.exist += 1
+            self.__count("exist")
+            return None
+        return {
+            "seed": seed,
+            "service": service,
+            "save_path": save_path,
+            "site_info": site_info,
+            "site_domain": site_domain,
+            "download_page": download_page
+        }
+
+    def __fetch_seed_torrent(self, seed_task: dict,
+                             limiter: SiteRateLimiter) -> Tuple[str, Optional[bytes], Optional[str], Optional[str]]:
+        """
+        下载辅种种子文件，在下载线程中执行，不修改计数及缓存
+        :return: 状态（success/stopped/flow_control/no_url/failed）、种子内容、种子链接、错误信息
+        下载线程异常时由调用方记为error状态
+        """
+
+        def __is_special_site(url):
+            """
+            判断是否为特殊站点（是否需要添加https）
+            """
+            if "hdsky.me" in url:
+                return False
+            return True
+
+        site_info = seed_task.get("site_info")
+        site_domain = seed_task.get("site_domain")
+        with limiter.acquire(site_domain):
+            if self._event.is_set():
+                return "stopped", None, None, None
+            # 站点流控
+            check, checkmsg = self.sites_helper.check(site_domain)
+            if check:
+                return "flow_control", None, None, checkmsg
+            # 下载种子
+            torrent_url = self.__get_download_url(seed=seed_task.get("seed"),
+                                                  site=site_info,
+                                                  base_url=seed_task.get("download_page"))
+            if not torrent_url:
+                return "no_url", None, None, None
+            # 强制使用Https
+            if __is_special_site(torrent_url):
+                if "?" in torrent_url:
+                    torrent_url += "&https=1"
+                else:
+                    torrent_url += "?https=1"
+            # 下载种子文件
+            _, content, _, _, error_msg = self.torrent_helper.download_torrent(
+                url=torrent_url,
+                cookie=site_info.get("cookie"),
+                ua=site_info.get("ua") or settings.USER_AGENT,
+                proxy=site_info.get("proxy"))
+        if not content:
+            return "failed", None, torrent_url, error_msg
+        return "success", content, torrent_url, None
+
+    def __add_seed_torrent(self, seed_task: dict, status: str, content: Optional[bytes],
+                           torrent_url: Optional[str], error_msg: Optional[str]) -> bool:
+        """
+        根据种子文件下载结果添加辅种任务
+        """
+        seed = seed_task.get("seed")
+        service = seed_task.get("service")
+        site_info = seed_task.get("site_info")
+        downloader_obj = service.instance
+        if status == "stopped":
+            return False
+        if status == "flow_control":
+            logger.warn(error_msg)
+            self.__count("fail")
             return False
-        # 站点流控
-        check, checkmsg = self.sites_helper.check(site_domain)
-        if check:
-            logger.warn(checkmsg)
-            self.fail += 1
+        if status == "error":
+            # 下载线程异常，可能是临时错误，计为失败但不加入缓存，下次辅种时重试
+            logger.warn(f"种子 {seed.get('info_hash')} 下载出错，下次辅种时重试：{error_msg}")
+            self.__count("fail")
             return False
-        # 下载种子
-        torrent_url = self.__get_download_url(seed=seed,
-                                              site=site_info,
-                                              base_url=download_page)
-        if not torrent_url:
+        if status == "no_url":
             # 加入失败缓存
-            self._error_caches.append(seed.get("info_hash"))
-            self.fail += 1
-            self.cached += 1
+            self._cache_helper.add(SeedCacheHelper.ERROR, seed.get("info_hash"))
+            self.__count("fail")
+            self.__count("cached")
             return False
-        # 强制使用Https
-        if __is_special_site(torrent_url):
-            if "?" in torrent_url:
-                torrent_url += "&https=1"
-            else:
-                torrent_url += "?https=1"
-        # 下载种子文件
-        _, content, _, _, error_msg = self.torrent_helper.download_torrent(
-            url=torrent_url,
-            cookie=site_info.get("cookie"),
-            ua=site_info.get("ua") or settings.USER_AGENT,
-            proxy=site_info.get("proxy"))
         if not content:
             # 下载失败
-            self.fail += 1
+            self.__count("fail")
             # 加入失败缓存
             if error_msg and ('无法打开链接' in error_msg or '触发站点流控' in error_msg):
-                self._error_caches.append(seed.get("info_hash"))
+                self._cache_helper.add(SeedCacheHelper.ERROR, seed.get("info_hash"))
             else:
                 # 种子不存在的情况
-                self._permanent_error_caches.append(seed.get("info_hash"))
+                self._cache_helper.add(SeedCacheHelper.PERMANENT_ERROR, seed.get("info_hash"))
             logger.error(f"下载种子文件失败：{torrent_url}")
             return False
         # 添加下载，辅种任务默认暂停
         logger.info(f"添加下载任务：{torrent_url} ...")
         download_id = self.__download(service=service,
                                       content=content,
-                                      save_path=save_path,
+                                      save_path=seed_task.get("save_path"),
                                       site_name=site_info.get("name"))
         if not download_id:
             # 下载失败
-            self.fail += 1
+            self.__count("fail")
             # 加入失败缓存
-            self._error_caches.append(seed.get("info_hash"))
+            self._cache_helper.add(SeedCacheHelper.ERROR, seed.get("info_hash"))
             return False
         else:
-            self.success += 1
+            self.__count("success")
+            # 同步更新下载器hash集合
+            hashes = self._downloader_hashes.get(service.name)
+            if hashes is not None:
+                hashes.update({seed.get("info_hash"), download_id})
             if self._skipverify:
                 # 跳过校验
                 logger.info(f"{download_id} 跳过校验，请自行检查...")
@@ -1063,9 +1459,8 @@ class IYUUAutoSeed(_PluginBase):
             else:
                 # 追加校验任务
                 logger.info(f"添加校验检查任务：{download_id} ...")
-                if not self._recheck_torrents.get(service.name):
-                    self._recheck_torrents[service.name] = []
-                self._recheck_torrents[service.name].append(download_id)
+                with self._recheck_torrents_lock:
+                    self._recheck_torrents.setdefault(service.name, []).append(download_id)
                 # TR会自动校验
                 if service.type == "qbittorrent":
                     # 开始校验种子
@@ -1073,7 +1468,7 @@ class IYUUAutoSeed(_PluginBase):
             # 下载成功
             logger.info(f"成功添加辅种下载，站点：{site_info.get('name')}，种子链接：{torrent_url}")
             # 成功也加入缓存，有一些改了路径校验不通过的，手动删除后，下一次又会辅上
-            self._success_caches.append(seed.get("info_hash"))
+            self._cache_helper.add(SeedCacheHelper.SUCCESS, seed.get("info_hash"))
             return True
 
     @staticmethod
@@ -0,0 +1,308 @@
+import json
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.log import logger
+from app.plugins import _PluginBase
+
+
+class SeedCacheHelper(object):
+    """
+    辅种缓存，按种子hash记录加入缓存的时间
+    - success：辅种成功的种子
+    - error：辅种出错的种子，超过有效期后自动失效
+    - permanent_error：种子被删除404等情况，不会过期
+    - queried：最近一次向IYUU查询可辅种数据的时间，用于增量辅种
+    缓存按hash分桶保存在插件数据中，每次仅写回存在变更的分桶
+    """
+    SUCCESS = "success"
+    ERROR = "error"
+    PERMANENT_ERROR = "permanent_error"
+    QUERIED = "queried"
+    kinds = [SUCCESS, ERROR, PERMANENT_ERROR, QUERIED]
+    # 辅种结果缓存，不含查询记录
+    result_kinds = [SUCCESS, ERROR, PERMANENT_ERROR]
+    # 每类缓存的分桶数量
+    bucket_count = 16
+
+    def __init__(self, plugin: _PluginBase, error_ttl: float = 0):
+        """
+        :param plugin: 插件实例，用于读写插件数据
+        :param error_ttl: 出错缓存的有效期（秒），小于等于0时不过期
+        """
+        self._plugin = plugin
+        self._error_ttl = error_ttl
+        self._lock = threading.RLock()
+        self._caches: Dict[str, Dict[str, float]] = {}
+        self._dirty: Dict[str, Set[int]] = {kind: set() for kind in self.kinds}
+        for kind in self.kinds:
+            cache: Dict[str, float] = {}
+            for bucket in range(self.bucket_count):
+                cache.update(self._plugin.get_data(self.__bucket_key(kind, bucket)) or {})
+            self._caches[kind] = cache
+        self.purge_expired()
+
+    @classmethod
+    def __bucket_of(cls, info_hash: str) -> int:
+        return zlib.crc32(str(info_hash).encode("utf-8")) % cls.bucket_count
+
+    @staticmethod
+    def __bucket_key(kind: str, bucket: int) -> str:
+        return f"cache_{kind}_{bucket}"
+
+    def __is_expired(self, kind: str, cached_time: float, now: float) -> bool:
+        return kind == self.ERROR and self._error_ttl > 0 and now - cached_time > self._error_ttl
+
+    def contains(self, kind: str, info_hash: str) -> bool:
+        """
+        判断种子是否在指定缓存中，过期的出错缓存会被移除
+        """
+        with self._lock:
+            cache = self._caches[kind]
+            cached_time = cache.get(info_hash)
+            if cached_time is None:
+                return False
+            if self.__is_expired(kind, cached_time, time.time()):
+                del cache[info_hash]
+                self._dirty[kind].add(self.__bucket_of(info_hash))
+                return False
+            return True
+
+    def is_success(self, info_hash: str) -> bool:
+        """
+        是否已辅种成功
+        """
+        return self.contains(self.SUCCESS, info_hash)
+
+    def is_error(self, info_hash: str) -> bool:
+        """
+        是否辅种出错且仍在缓存有效期内
+        """
+        return self.contains(self.PERMANENT_ERROR, info_hash) or self.contains(self.ERROR, info_hash)
+
+    def add(self, kind: str, info_hash: str):
+        """
+        加入缓存
+        """
+        if not info_hash:
+            return
+        with self._lock:
+            self._caches[kind][info_hash] = time.time()
+            self._dirty[kind].add(self.__bucket_of(info_hash))
+
+    def get_time(self, kind: str, info_hash: str) -> Optional[float]:
+        """
+        获取种子加入缓存的时间
+        """
+        return self._caches[kind].get(info_hash)
+
+    def add_all(self, kind: str, info_hashes: Iterable[str], refresh: bool = False):
+        """
+        批量加入缓存
+        :param refresh: 是否刷新已存在种子的时间，否则保留原有时间
+        """
+        now = time.time()
+        with self._lock:
+            cache = self._caches[kind]
+            for info_hash in info_hashes or []:
+                if info_hash and (refresh or info_hash not in cache):
+                    cache[info_hash] = now
+                    self._dirty[kind].add(self.__bucket_of(info_hash))
+
+    def purge_expired(self) -> int:
+        """
+        移除全部过期的出错缓存
+        """
+        now = time.time()
+        with self._lock:
+            cache = self._caches[self.ERROR]
+            expired = [info_hash for info_hash, cached_time in cache.items()
+                       if self.__is_expired(self.ERROR, cached_time, now)]
+            for info_hash in expired:
+                del cache[info_hash]
+                self._dirty[self.ERROR].add(self.__bucket_of(info_hash))
+        if expired:
+            logger.info(f"已移除 {len(expired)} 条过期的辅种失败缓存")
+        return len(expired)
+
+    def retain(self, kind: str, info_hashes: Set[str]) -> int:
+        """
+        仅保留指定种子的缓存，移除其余种子
+        """
+        with self._lock:
+            cache = self._caches[kind]
+            removed = [info_hash for info_hash in cache if info_hash not in info_hashes]
+            for info_hash in removed:
+                del cache[info_hash]
+                self._dirty[kind].add(self.__bucket_of(info_hash))
+        if removed:
+            logger.info(f"已移除 {len(removed)} 条已不在下载器中的种子的{kind}缓存")
+        return len(removed)
+
+    def count(self, kind: str) -> int:
+        """
+        缓存数量
+        """
+        return len(self._caches[kind])
+
+    def flush(self, kinds: Iterable[str] = None):
+        """
+        写回存在变更的分桶
+        :param kinds: 需要写回的缓存类型，为空时写回全部
+        """
+        with self._lock:
+            for kind in kinds or self.kinds:
+                dirty_buckets = self._dirty[kind]
+                if not dirty_buckets:
+                    continue
+                grouped: Dict[int, Dict[str, float]] = {bucket: {} for bucket in dirty_buckets}
+                for info_hash, cached_time in self._caches[kind].items():
+                    bucket_cache = grouped.get(self.__bucket_of(info_hash))
+                    if bucket_cache is not None:
+                        bucket_cache[info_hash] = cached_time
+                for bucket, bucket_cache in grouped.items():
+                    if bucket_cache:
+                        self._plugin.save_data(self.__bucket_key(kind, bucket), bucket_cache)
+                    else:
+                        self._plugin.del_data(self.__bucket_key(kind, bucket))
+                dirty_buckets.clear()
+
+    def clear(self):
+        """
+        清空全部缓存
+        """
+        with self._lock:
+            for kind in self.kinds:
+                self._caches[kind] = {}
+                self._dirty[kind].clear()
+                for bucket in range(self.bucket_count):
+                    self._plugin.del_data(self.__bucket_key(kind, bucket))
+
+
+class SeedHistoryIndex(object):
+    """
+    辅种历史索引，按源种子hash记录辅种下载器、辅种数及更新时间，用于详情页展示
+    索引按hash分桶保存在插件数据中，首次使用时由已有的辅种历史回填，每次仅写回存在变更的分桶
+    """
+    # 分桶数量
+    bucket_count = 16
+    # 旧版本的单键索引
+    legacy_key = "history_index"
+    # 已完成回填的标记
+    backfilled_key = "history_index_backfilled"
+    # 辅种历史的键为源种子hash
+    _hash_pattern = re.compile(r"^[0-9a-fA-F]{40}$|^[0-9a-fA-F]{64}$")
+
+    def __init__(self, plugin: _PluginBase):
+        self._plugin = plugin
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, dict]] = None
+        self._dirty: Set[int] = set()
+
+    @classmethod
+    def __bucket_of(cls, info_hash: str) -> int:
+        return zlib.crc32(str(info_hash).encode("utf-8")) % cls.bucket_count
+
+    @staticmethod
+    def __bucket_key(bucket: int) -> str:
+        return f"history_index_{bucket}"
+
+    @staticmethod
+    def build_entry(seed_history: list, update_time: str) -> dict:
+        """
+        由单个源种子的辅种历史生成索引项
+        """
+        histories = [history for history in seed_history or [] if isinstance(history, dict)]
+        return {
+            "downloaders": [str(history.get("downloader")) for history in histories],
+            "count": sum(len(history.get("torrents") or []) for history in histories),
+            "time": update_time
+        }
+
+    def __load(self) -> Dict[str, dict]:
+        if self._index is not None:
+            return self._index
+        index: Dict[str, dict] = {}
+        for bucket in range(self.bucket_count):
+            index.update(self._plugin.get_data(self.__bucket_key(bucket)) or {})
+        self._index = index
+        if not self._plugin.get_data(self.backfilled_key):
+            self.__backfill()
+        return self._index
+
+    def __backfill(self):
+        """
+        由已有的辅种历史及旧版本索引回填，全部回填成功后才删除旧版本索引并记录回填标记
+        """
+        legacy_index = self._plugin.get_data(self.legacy_key) or {}
+        count = 0
+        try:
+            for plugin_data in self._plugin.get_data() or []:
+                key = getattr(plugin_data, "key", None)
+                if not key or not self._hash_pattern.match(key) or key in self._index:
+                    continue
+                seed_history = plugin_data.value
+                # 不指定键时返回的插件数据未经反序列化
+                if isinstance(seed_history, str):
+                    try:
+                        seed_history = json.loads(seed_history)
+                    except ValueError:
+                        logger.warning(f"辅种历史 {key} 解析失败，跳过回填")
+                        continue
+                if not isinstance(seed_history, list):
+                    continue
+                legacy_entry = legacy_index.get(key) or {}
+                self._index[key] = self.build_entry(seed_history, legacy_entry.get("time") or "")
+                self._dirty.add(self.__bucket_of(key))
+                count += 1
+            # 辅种历史中已不存在的旧版本索引项原样保留
+            for key, legacy_entry in legacy_index.items():
+                if key not in self._index and isinstance(legacy_entry, dict):
+                    self._index[key] = legacy_entry
+                    self._dirty.add(self.__bucket_of(key))
+                    count += 1
+            self.flush()
+        except Exception as e:
+            logger.error(f"辅种历史索引回填失败，将在下次加载时重试：{str(e)}")
+            return
+        if legacy_index:
+            self._plugin.del_data(self.legacy_key)
+        self._plugin.save_data(self.backfilled_key, True)
+        logger.info(f"辅种历史索引回填完成，共 {count} 条")
+
+    def update(self, info_hash: str, entry: dict):
+        """
+        更新索引项，需调用 flush 写回
+        """
+        with self._lock:
+            self.__load()[info_hash] = entry
+            self._dirty.add(self.__bucket_of(info_hash))
+
+    def items(self) -> List[Tuple[str, dict]]:
+        """
+        全部索引项
+        """
+        with self._lock:
+            return list(self.__load().items())
+
+    def flush(self):
+        """
+        写回存在变更的分桶
+        """
+        with self._lock:
+            if not self._dirty or self._index is None:
+                return
+            grouped: Dict[int, Dict[str, dict]] = {bucket: {} for bucket in self._dirty}
+            for info_hash, entry in self._index.items():
+                bucket_index = grouped.get(self.__bucket_of(info_hash))
+                if bucket_index is not None:
+                    bucket_index[info_hash] = entry
+            for bucket, bucket_index in grouped.items():
+                if bucket_index:
+                    self._plugin.save_data(self.__bucket_key(bucket), bucket_index)
+                else:
+                    self._plugin.del_data(self.__bucket_key(bucket))
+            self._dirty.clear()
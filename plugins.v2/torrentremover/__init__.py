@@ -2,12 +2,13 @@ import re
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Callable
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from app import schemas
 from app.core.config import settings
 from app.helper.downloader import DownloaderHelper
 from app.log import logger
@@ -18,6 +19,122 @@ from app.utils.string import StringUtils
 lock = threading.Lock()
 
 
+class RemoveRules(object):
+    """
+    删种条件，每次运行时编译一次：正则预编译、状态与分类转为集合、阈值转为数值
+    条件按开销从低到高排列，判断时遇到不满足的条件即返回
+    """
+
+    def __init__(self, dl_type: str, size: str = None, ratio: str = None, seeding_time: str = None,
+                 upspeed: str = None, pathkeywords: str = None, trackerkeywords: str = None,
+                 errorkeywords: str = None, torrentstates: str = None, torrentcategorys: str = None):
+        self.dl_type = dl_type
+        self.now = int(time.time())
+        # 条件名称 -> 判断函数，返回True表示满足删除条件
+        self.clauses: List[Tuple[str, Callable[[Any], bool]]] = []
+        is_qb = dl_type == "qbittorrent"
+        # 状态、分类仅适用于QB
+        if is_qb and torrentstates:
+            states = self.__split(torrentstates)
+            self.clauses.append(("state", lambda torrent: torrent.state in states))
+        if is_qb and torrentcategorys:
+            categorys = self.__split(torrentcategorys)
+            self.clauses.append(("category", lambda torrent: bool(torrent.category) and torrent.category in categorys))
+        if ratio:
+            min_ratio = float(ratio)
+            self.clauses.append(("ratio", lambda torrent: torrent.ratio > min_ratio))
+        if size:
+            # 大小 单位：GB
+            sizes = size.split('-')
+            minsize = int(float(sizes[0]) * 1024 * 1024 * 1024)
+            maxsize = int(float(sizes[-1]) * 1024 * 1024 * 1024)
+            self.clauses.append(("size", lambda torrent: minsize < self.get_size(torrent) < maxsize))
+        if seeding_time:
+            # 做种时间 单位：小时
+            min_seeding_time = float(seeding_time) * 3600
+            self.clauses.append(("time", lambda torrent: self.get_seeding_time(torrent) > min_seeding_time))
+        if upspeed:
+            # 平均上传速度 单位：KB/s
+            max_upspeed = float(upspeed) * 1024
+            self.clauses.append(("upspeed", lambda torrent: self.get_upload_avs(torrent) < max_upspeed))
+        if pathkeywords:
+            path_pattern = re.compile(pathkeywords, re.I)
+            self.clauses.append(("path", lambda torrent: bool(path_pattern.search(self.get_path(torrent) or ""))))
+        if trackerkeywords:
+            tracker_pattern = re.compile(trackerkeywords, re.I)
+            if is_qb:
+                self.clauses.append(("tracker", lambda torrent: bool(tracker_pattern.search(torrent.tracker or ""))))
+            else:
+                self.clauses.append(("tracker", lambda torrent: any(
+                    tracker_pattern.search(tracker.get("announce", "")) for tracker in torrent.trackers or [])))
+        # 错误信息仅适用于TR
+        if not is_qb and errorkeywords:
+            error_pattern = re.compile(errorkeywords, re.I)
+            self.clauses.append(("error", lambda torrent: bool(error_pattern.search(torrent.error_string or ""))))
+
+    @staticmethod
+    def __split(value: str) -> frozenset:
+        return frozenset(item.strip() for item in value.split(',') if item.strip())
+
+    def get_size(self, torrent: Any) -> int:
+        return torrent.size if self.dl_type == "qbittorrent" else torrent.total_size
+
+    def get_path(self, torrent: Any) -> str:
+        return torrent.save_path if self.dl_type == "qbittorrent" else torrent.download_dir
+
+    def get_seeding_time(self, torrent: Any) -> int:
+        """
+        做种时间，单位：秒
+        """
+        if self.dl_type == "qbittorrent":
+            date_done = torrent.completion_on if torrent.completion_on > 0 else torrent.added_on
+            return self.now - date_done if date_done else 0
+        date_done = torrent.date_done or torrent.date_added
+        return self.now - int(time.mktime(date_done.timetuple())) if date_done else 0
+
+    def get_upload_avs(self, torrent: Any) -> float:
+        """
+        平均上传速度，单位：B/s
+        """
+        seeding_time = self.get_seeding_time(torrent)
+        if not seeding_time:
+            return 0
+        uploaded = torrent.uploaded if self.dl_type == "qbittorrent" else torrent.ratio * torrent.total_size
+        return uploaded / seeding_time
+
+    def match(self, torrent: Any) -> bool:
+        """
+        是否满足全部删除条件
+        """
+        for _, check in self.clauses:
+            if not check(torrent):
+                return False
+        return True
+
+    def dry_run(self, torrents: list) -> dict:
+        """
+        逐项统计满足各条件的种子数量及耗时，不执行删除
+        """
+        start_time = time.perf_counter()
+        clause_counts = {name: 0 for name, _ in self.clauses}
+        matched = 0
+        for torrent in torrents:
+            is_match = True
+            for name, check in self.clauses:
+                if check(torrent):
+                    clause_counts[name] += 1
+                else:
+                    is_match = False
+            if is_match:
+                matched += 1
+        return {
+            "total": len(torrents),
+            "matched": matched,
+            "clauses": clause_counts,
+            "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 2)
+        }
+
+
 class TorrentRemover(_PluginBase):
     # 插件名称
     plugin_name = "自动删种"
@@ -26,7 +143,7 @@ class TorrentRemover(_PluginBase):
     # 插件图标
     plugin_icon = "delete.jpg"
     # 插件版本
-    plugin_version = "2.2"
+    plugin_version = "2.4"
     # 插件作者
     plugin_author = "jxxghp"
     # 作者主页
@@ -61,6 +178,8 @@ class TorrentRemover(_PluginBase):
     _errorkeywords = None
     _torrentstates = None
     _torrentcategorys = None
+    # 每次请求下载器处理的种子数量
+    _batch_size = 100
 
     def init_plugin(self, config: dict = None):
         self.downloader_helper = DownloaderHelper()
@@ -131,7 +250,49 @@ class TorrentRemover(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        """
+        获取插件API
+        [{
+            "path": "/xx",
+            "endpoint": self.xxx,
+            "methods": ["GET", "POST"],
+            "summary": "API说明"
+        }]
+        """
+        return [{
+            "path": "/dry_run",
+            "endpoint": self.dry_run,
+            "methods": ["GET"],
+            "summary": "删种条件试运行",
+            "description": "按当前配置统计满足各删种条件的种子数量及耗时，不执行删除",
+        }]
+
+    def dry_run(self, apikey: str, downloader: str = None) -> schemas.Response:
+        """
+        删种条件试运行，可由API调用
+        :param apikey: API密钥
+        :param downloader: 下载器名称，为空时统计全部已配置的下载器
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        service_infos = self.service_infos or {}
+        downloaders = [downloader] if downloader else self._downloaders
+        results = {}
+        for name in downloaders:
+            service = service_infos.get(name)
+            if not service:
+                return schemas.Response(success=False, message=f"下载器 {name} 未配置或未连接")
+            try:
+                start_time = time.perf_counter()
+                rules = self.__compile_rules(service.type)
+                compile_ms = round((time.perf_counter() - start_time) * 1000, 2)
+            except (ValueError, re.error) as e:
+                return schemas.Response(success=False, message=f"删种条件配置错误：{str(e)}")
+            torrents = self.__get_downloader_torrents(name)
+            if torrents is None:
+                return schemas.Response(success=False, message=f"获取下载器 {name} 种子失败")
+            results[name] = {**rules.dry_run(torrents), "compile_ms": compile_ms}
+        return schemas.Response(success=True, data=results)
 
     def get_service(self) -> List[Dict[str, Any]]:
         """
@@ -637,47 +798,33 @@ class TorrentRemover(_PluginBase):
                     downlader_obj = self.__get_downloader(downloader)
                     if self._action == "pause":
                         message_text = f"{downloader.title()} 共暂停{len(torrents)}个种子"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
-                            text_item = f"{torrent.get('name')} " \
-                                        f"来自站点：{torrent.get('site')} " \
-                                        f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 暂停种子
-                            downlader_obj.stop_torrents(ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 暂停种子：{text_item}")
-                            message_text = f"{message_text}\n{text_item}"
+                        action_text = "暂停种子"
                     elif self._action == "delete":
                         message_text = f"{downloader.title()} 共删除{len(torrents)}个种子"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
-                            text_item = f"{torrent.get('name')} " \
-                                        f"来自站点：{torrent.get('site')} " \
-                                        f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 删除种子
-                            downlader_obj.delete_torrents(delete_file=False,
-                                                          ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 删除种子：{text_item}")
-                            message_text = f"{message_text}\n{text_item}"
+                        action_text = "删除种子"
                     elif self._action == "deletefile":
                         message_text = f"{downloader.title()} 共删除{len(torrents)}个种子及文件"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
+                        action_text = "删除种子及文件"
+                    else:
+                        continue
+                    # 分批处理，每批仅请求一次下载器
+                    for i in range(0, len(torrents), self._batch_size):
+                        if self._event.is_set():
+                            logger.info(f"自动删种服务停止")
+                            return
+                        batch_torrents = torrents[i:i + self._batch_size]
+                        batch_ids = [torrent.get("id") for torrent in batch_torrents]
+                        if self._action == "pause":
+                            downlader_obj.stop_torrents(ids=batch_ids)
+                        else:
+                            downlader_obj.delete_torrents(delete_file=self._action == "deletefile",
+                                                          ids=batch_ids)
+                        for torrent in batch_torrents:
                             text_item = f"{torrent.get('name')} " \
                                         f"来自站点：{torrent.get('site')} " \
                                         f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 删除种子
-                            downlader_obj.delete_torrents(delete_file=True,
-                                                          ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 删除种子及文件：{text_item}")
+                            logger.info(f"自动删种任务 {action_text}：{text_item}")
                             message_text = f"{message_text}\n{text_item}"
-                    else:
-                        continue
                     if torrents and message_text and self._notify:
                         self.post_message(
                             mtype=NotificationType.SiteMessage,
@@ -687,90 +834,33 @@ class TorrentRemover(_PluginBase):
             except Exception as e:
                 logger.error(f"自动删种任务异常：{str(e)}")
 
-    def __get_qb_torrent(self, torrent: Any) -> Optional[dict]:
-        """
-        检查QB下载任务是否符合条件
-        """
-        # 完成时间
-        date_done = torrent.completion_on if torrent.completion_on > 0 else torrent.added_on
-        # 现在时间
-        date_now = int(time.mktime(datetime.now().timetuple()))
-        # 做种时间
-        torrent_seeding_time = date_now - date_done if date_done else 0
-        # 平均上传速度
-        torrent_upload_avs = torrent.uploaded / torrent_seeding_time if torrent_seeding_time else 0
-        # 大小 单位：GB
-        sizes = self._size.split('-') if self._size else []
-        minsize = float(sizes[0]) * 1024 * 1024 * 1024 if sizes else 0
-        maxsize = float(sizes[-1]) * 1024 * 1024 * 1024 if sizes else 0
-        # 分享率
-        if self._ratio and torrent.ratio <= float(self._ratio):
-            return None
-        # 做种时间 单位：小时
-        if self._time and torrent_seeding_time <= float(self._time) * 3600:
-            return None
-        # 文件大小
-        if self._size and (torrent.size >= int(maxsize) or torrent.size <= int(minsize)):
-            return None
-        if self._upspeed and torrent_upload_avs >= float(self._upspeed) * 1024:
-            return None
-        if self._pathkeywords and not re.findall(self._pathkeywords, torrent.save_path, re.I):
-            return None
-        if self._trackerkeywords and not re.findall(self._trackerkeywords, torrent.tracker, re.I):
-            return None
-        if self._torrentstates and torrent.state not in self._torrentstates:
-            return None
-        if self._torrentcategorys and (not torrent.category or torrent.category not in self._torrentcategorys):
-            return None
-        return {
-            "id": torrent.hash,
-            "name": torrent.name,
-            "site": StringUtils.get_url_sld(torrent.tracker),
-            "size": torrent.size
-        }
+    def __compile_rules(self, dl_type: str) -> RemoveRules:
+        """
+        按当前配置编译删种条件
+        """
+        return RemoveRules(dl_type=dl_type,
+                           size=self._size,
+                           ratio=self._ratio,
+                           seeding_time=self._time,
+                           upspeed=self._upspeed,
+                           pathkeywords=self._pathkeywords,
+                           trackerkeywords=self._trackerkeywords,
+                           errorkeywords=self._errorkeywords,
+                           torrentstates=self._torrentstates,
+                           torrentcategorys=self._torrentcategorys)
 
-    def __get_tr_torrent(self, torrent: Any) -> Optional[dict]:
+    @staticmethod
+    def __get_torrent_item(torrent: Any, dl_type: str) -> dict:
         """
-        检查TR下载任务是否符合条件
+        获取种子删除信息
         """
-        # 完成时间
-        date_done = torrent.date_done or torrent.date_added
-        # 现在时间
-        date_now = int(time.mktime(datetime.now().timetuple()))
-        # 做种时间
-        torrent_seeding_time = date_now - int(time.mktime(date_done.timetuple())) if date_done else 0
-        # 上传量
-        torrent_uploaded = torrent.ratio * torrent.total_size
-        # 平均上传速茺
-        torrent_upload_avs = torrent_uploaded / torrent_seeding_time if torrent_seeding_time else 0
-        # 大小 单位：GB
-        sizes = self._size.split('-') if self._size else []
-        minsize = float(sizes[0]) * 1024 * 1024 * 1024 if sizes else 0
-        maxsize = float(sizes[-1]) * 1024 * 1024 * 1024 if sizes else 0
-        # 分享率
-        if self._ratio and torrent.ratio <= float(self._ratio):
-            return None
-        if self._time and torrent_seeding_time <= float(self._time) * 3600:
-            return None
-        if self._size and (torrent.total_size >= int(maxsize) or torrent.total_size <= int(minsize)):
-            return None
-        if self._upspeed and torrent_upload_avs >= float(self._upspeed) * 1024:
-            return None
-        if self._pathkeywords and not re.findall(self._pathkeywords, torrent.download_dir, re.I):
-            return None
-        if self._trackerkeywords:
-            if not torrent.trackers:
-                return None
-            else:
-                tacker_key_flag = False
-                for tracker in torrent.trackers:
-                    if re.findall(self._trackerkeywords, tracker.get("announce", ""), re.I):
-                        tacker_key_flag = True
-                        break
-                if not tacker_key_flag:
-                    return None
-        if self._errorkeywords and not re.findall(self._errorkeywords, torrent.error_string, re.I):
-            return None
+        if dl_type == "qbittorrent":
+            return {
+                "id": torrent.hash,
+                "name": torrent.name,
+                "site": StringUtils.get_url_sld(torrent.tracker),
+                "size": torrent.size
+            }
         return {
             "id": torrent.hashString,
             "name": torrent.name,
@@ -778,14 +868,11 @@ class TorrentRemover(_PluginBase):
             "size": torrent.total_size
         }
 
-    def get_remove_torrents(self, downloader: str):
+    def __get_downloader_torrents(self, downloader: str) -> Optional[list]:
         """
-        获取自动删种任务种子
+        按标签查询下载器中的种子
         """
-        remove_torrents = []
-        # 下载器对象
         downloader_obj = self.__get_downloader(downloader)
-        downloader_config = self.__get_downloader_config(downloader)
         # 标题
         if self._labels:
             tags = self._labels.split(',')
@@ -796,46 +883,55 @@ class TorrentRemover(_PluginBase):
         # 查询种子
         torrents, error_flag = downloader_obj.get_torrents(tags=tags or None)
         if error_flag:
+            return None
+        return torrents or []
+
+    def get_remove_torrents(self, downloader: str):
+        """
+        获取自动删种任务种子
+        """
+        remove_torrents = []
+        downloader_config = self.__get_downloader_config(downloader)
+        # 查询种子
+        torrents = self.__get_downloader_torrents(downloader)
+        if not torrents:
             return []
-        # 处理种子
+        # 编译删种条件并处理种子
+        rules = self.__compile_rules(downloader_config.type)
         for torrent in torrents:
-            if downloader_config.type == "qbittorrent":
-                item = self.__get_qb_torrent(torrent)
-            else:
-                item = self.__get_tr_torrent(torrent)
-            if not item:
-                continue
-            remove_torrents.append(item)
+            if rules.match(torrent):
+                remove_torrents.append(self.__get_torrent_item(torrent, downloader_config.type))
         # 处理辅种
         if self._samedata and remove_torrents:
-            remove_ids = [t.get("id") for t in remove_torrents]
+            remove_ids = {t.get("id") for t in remove_torrents}
+            # 按名称和大小建立索引
+            same_data_index: Dict[Tuple[str, int], List[Any]] = {}
+            for torrent in torrents:
+                if downloader_config.type == "qbittorrent":
+                    same_data_key = (torrent.name, torrent.size)
+                else:
+                    same_data_key = (torrent.name, torrent.total_size)
+                same_data_index.setdefault(same_data_key, []).append(torrent)
             remove_torrents_plus = []
             for remove_torrent in remove_torrents:
-                name = remove_torrent.get("name")
-                size = remove_torrent.get("size")
-                for torrent in torrents:
+                same_data_key = (remove_torrent.get("name"), remove_torrent.get("size"))
+                for torrent in same_data_index.get(same_data_key, []):
+                    plus_id = torrent.hash if downloader_config.type == "qbittorrent" else torrent.hashString
+                    if plus_id in remove_ids:
+                        continue
+                    remove_ids.add(plus_id)
                     if downloader_config.type == "qbittorrent":
-                        plus_id = torrent.hash
-                        plus_name = torrent.name
-                        plus_size = torrent.size
                         plus_site = StringUtils.get_url_sld(torrent.tracker)
                     else:
-                        plus_id = torrent.hashString
-                        plus_name = torrent.name
-                        plus_size = torrent.total_size
                         plus_site = torrent.trackers[0].get("sitename") if torrent.trackers else ""
-                    # 比对名称和大小
-                    if plus_name == name \
-                            and plus_size == size \
-                            and plus_id not in remove_ids:
-                        remove_torrents_plus.append(
-                            {
-                                "id": plus_id,
-                                "name": plus_name,
-                                "site": plus_site,
-                                "size": plus_size
-                            }
-                        )
+                    remove_torrents_plus.append(
+                        {
+                            "id": plus_id,
+                            "name": same_data_key[0],
+                            "site": plus_site,
+                            "size": same_data_key[1]
+                        }
+                    )
             if remove_torrents_plus:
                 remove_torrents.extend(remove_torrents_plus)
         return remove_torrents
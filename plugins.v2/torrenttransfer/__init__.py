@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from threading import Event
@@ -28,7 +29,7 @@ class TorrentTransfer(_PluginBase):
     # 插件图标
     plugin_icon = "seed.png"
     # 插件版本
-    plugin_version = "1.9"
+    plugin_version = "2.0.1"
     # 插件作者
     plugin_author = "jxxghp"
     # 作者主页
@@ -70,6 +71,10 @@ class TorrentTransfer(_PluginBase):
     _is_recheck_running = False
     # 任务标签
     _torrent_tags = []
+    # 每批次添加的种子数量
+    _batch_size = 50
+    # 读取种子文件的线程数
+    _read_workers = 4
 
     def init_plugin(self, config: dict = None):
         self.torrent_helper = TorrentHelper()
@@ -694,6 +699,19 @@ class TorrentTransfer(_PluginBase):
         # 开始转移任务
         if trans_torrents:
             logger.info(f"需要转移的种子数：{len(trans_torrents)}")
+            # 一次性获取目的下载器中的全部种子
+            to_torrents, error = to_downloader.get_torrents()
+            if error:
+                logger.error(f"获取下载器 {to_service.name} 种子列表失败，停止转移")
+                return
+            to_hashes = set()
+            to_paused_hashes = set()
+            for torrent in to_torrents or []:
+                to_hash = self.__get_hash(torrent, to_service.type)
+                to_hashes.add(to_hash)
+                if self.__can_seeding(torrent, to_service.type):
+                    to_paused_hashes.add(to_hash)
+
             # 记数
             total = len(trans_torrents)
             # 总成功数
@@ -704,132 +722,120 @@ class TorrentTransfer(_PluginBase):
             skip = 0
             # 删除重复数
             del_dup = 0
+            # 已处理数
+            processed = 0
 
-            for torrent_item in trans_torrents:
-                # 检查种子文件是否存在
-                torrent_file = Path(self._fromtorrentpath) / f"{torrent_item.get('hash')}.torrent"
-                if not torrent_file.exists():
-                    logger.error(f"种子文件不存在：{torrent_file}")
-                    # 失败计数
-                    fail += 1
-                    continue
-
-                # 查询hash值是否已经在目的下载器中
-                torrent_info, _ = to_downloader.get_torrents(ids=[torrent_item.get('hash')])
-                if torrent_info:
-                    # 删除重复的源种子，不能删除文件！
-                    if self._deleteduplicate:
-                        logger.info(f"删除重复的源下载器任务（不含文件）：{torrent_item.get('hash')} ...")
-                        to_downloader.delete_torrents(delete_file=False, ids=[torrent_item.get('hash')])
-                        del_dup += 1
-                    else:
-                        logger.info(f"{torrent_item.get('hash')} 已在目的下载器中，跳过 ...")
-                        # 跳过计数
-                        skip += 1
-                    continue
-
-                # 转换保存路径
-                download_dir = self.__convert_save_path(torrent_item.get('save_path'),
-                                                        self._frompath,
-                                                        self._topath)
-                if not download_dir:
-                    logger.error(f"转换保存路径失败：{torrent_item.get('save_path')}")
-                    # 失败计数
-                    fail += 1
-                    continue
-
-                # 如果源下载器是QB检查是否有Tracker，没有的话额外获取
-                if self.downloader_helper.is_downloader("qbittorrent", service=from_service):
-                    # 读取种子内容、解析种子文件
-                    content = torrent_file.read_bytes()
-                    if not content:
-                        logger.warn(f"读取种子文件失败：{torrent_file}")
-                        fail += 1
-                        continue
-                    # 读取trackers
-                    try:
-                        torrent_main = bdecode(content)
-                        main_announce = torrent_main.get('announce')
-                    except Exception as err:
-                        logger.warn(f"解析种子文件 {torrent_file} 失败：{str(err)}")
-                        fail += 1
-                        continue
-
-                    if not main_announce:
-                        logger.info(f"{torrent_item.get('hash')} 未发现tracker信息，尝试补充tracker信息...")
-                        # 读取fastresume文件
-                        fastresume_file = Path(self._fromtorrentpath) / f"{torrent_item.get('hash')}.fastresume"
-                        if not fastresume_file.exists():
-                            logger.warn(f"fastresume文件不存在：{fastresume_file}")
+            with ThreadPoolExecutor(max_workers=self._read_workers) as executor:
+                for i in range(0, total, self._batch_size):
+                    if self._event.is_set():
+                        logger.info(f"转移服务停止")
+                        break
+                    batch = trans_torrents[i:i + self._batch_size]
+                    processed += len(batch)
+
+                    # 过滤已在目的下载器中的种子
+                    pending_items = []
+                    duplicate_hashes = []
+                    resume_delete_hashes = []
+                    for torrent_item in batch:
+                        hash_str = torrent_item.get('hash')
+                        if hash_str not in to_hashes:
+                            pending_items.append(torrent_item)
+                            continue
+                        # 根据转种记录恢复上次未完成的处理
+                        history = self.get_data(key=f"{from_service.name}-{hash_str}")
+                        if history and history.get("to_download") == to_service.name:
+                            logger.info(f"{hash_str} 已转移到目的下载器中，跳过 ...")
+                            # 仅在当前仍开启删除源种子时，补充删除上次未完成删除的源种子
+                            if self._deletesource and history.get("delete_source"):
+                                resume_delete_hashes.append(hash_str)
+                            download_id = history.get("to_download_id")
+                            if self._autostart and download_id in to_paused_hashes:
+                                self.__add_recheck_torrents(to_service.name, [download_id])
+                            skip += 1
+                        elif self._deleteduplicate:
+                            # 删除重复的源种子，不能删除文件！
+                            logger.info(f"删除重复的源下载器任务（不含文件）：{hash_str} ...")
+                            duplicate_hashes.append(hash_str)
+                            to_hashes.discard(hash_str)
+                            del_dup += 1
+                        else:
+                            logger.info(f"{hash_str} 已在目的下载器中，跳过 ...")
+                            # 跳过计数
+                            skip += 1
+                    if duplicate_hashes:
+                        to_downloader.delete_torrents(delete_file=False, ids=duplicate_hashes)
+                    if resume_delete_hashes:
+                        logger.info(f"删除上次已转移的源下载器任务（不含文件）：{len(resume_delete_hashes)} 个 ...")
+                        from_downloader.delete_torrents(delete_file=False, ids=resume_delete_hashes)
+
+                    # 并发读取并解析种子文件
+                    added_hashes = []
+                    download_ids = []
+                    for torrent_item, (content, err_msg) in zip(
+                            pending_items, executor.map(
+                                lambda item: self.__read_torrent(item.get('hash'), from_service), pending_items)):
+                        if self._event.is_set():
+                            logger.info(f"转移服务停止")
+                            break
+                        if not content:
+                            logger.error(err_msg)
+                            # 失败计数
                             fail += 1
                             continue
-                        # 尝试补充trackers
-                        try:
-                            # 解析fastresume文件
-                            fastresume = fastresume_file.read_bytes()
-                            torrent_fastresume = bdecode(fastresume)
-                            # 读取trackers
-                            fastresume_trackers = torrent_fastresume.get('trackers')
-                            if isinstance(fastresume_trackers, list) \
-                                    and len(fastresume_trackers) > 0 \
-                                    and fastresume_trackers[0]:
-                                # 重新赋值
-                                torrent_main['announce'] = fastresume_trackers[0][0]
-                                # 保留其他tracker，避免单一tracker无法连接
-                                if len(fastresume_trackers) > 1 or len(fastresume_trackers[0]) > 1:
-                                    torrent_main['announce-list'] = fastresume_trackers
-                                # 替换种子文件路径
-                                torrent_file = settings.TEMP_PATH / f"{torrent_item.get('hash')}.torrent"
-                                # 编码并保存到临时文件
-                                torrent_file.write_bytes(bencode(torrent_main))
-                        except Exception as err:
-                            logger.error(f"解析fastresume文件 {fastresume_file} 出错：{str(err)}")
+                        # 转换保存路径
+                        download_dir = self.__convert_save_path(torrent_item.get('save_path'),
+                                                                self._frompath,
+                                                                self._topath)
+                        if not download_dir:
+                            logger.error(f"转换保存路径失败：{torrent_item.get('save_path')}")
+                            # 失败计数
                             fail += 1
                             continue
 
-                # 发送到另一个下载器中下载：默认暂停、传输下载路径、关闭自动管理模式
-                logger.info(f"添加转移做种任务到下载器 {to_service.name}：{torrent_file}")
-                download_id = self.__download(service=to_service,
-                                              content=torrent_file.read_bytes(),
-                                              save_path=download_dir)
-                if not download_id:
-                    # 下载失败
-                    fail += 1
-                    logger.error(f"添加下载任务失败：{torrent_file}")
-                    continue
-                else:
-                    # 下载成功
-                    logger.info(f"成功添加转移做种任务，种子文件：{torrent_file}")
-
-                    # TR会自动校验，QB需要手动校验
-                    if self.downloader_helper.is_downloader("qbittorrent", service=to_service):
-                        logger.info(f"qbittorrent 开始校验 {download_id} ...")
-                        to_downloader.recheck_torrents(ids=[download_id])
-
-                    # 追加校验任务
-                    logger.info(f"添加校验检查任务：{download_id} ...")
-                    if not self._recheck_torrents.get(to_service.name):
-                        self._recheck_torrents[to_service.name] = []
-                    self._recheck_torrents[to_service.name].append(download_id)
-
-                    # 删除源种子，不能删除文件！
-                    if self._deletesource:
-                        logger.info(f"删除源下载器任务（不含文件）：{torrent_item.get('hash')} ...")
-                        from_downloader.delete_torrents(delete_file=False, ids=[torrent_item.get('hash')])
-
-                    # 成功计数
-                    success += 1
-                    # 插入转种记录
-                    history_key = f"{from_service.name}-{torrent_item.get('hash')}"
-                    self.save_data(key=history_key,
-                                   value={
-                                       "to_download": to_service.name,
-                                       "to_download_id": download_id,
-                                       "delete_source": self._deletesource,
-                                       "delete_duplicate": self._deleteduplicate,
-                                   })
+                        # 发送到另一个下载器中下载：默认暂停、传输下载路径、关闭自动管理模式
+                        logger.info(f"添加转移做种任务到下载器 {to_service.name}：{torrent_item.get('hash')}")
+                        download_id = self.__download(service=to_service,
+                                                      content=content,
+                                                      save_path=download_dir)
+                        if not download_id:
+                            # 下载失败
+                            fail += 1
+                            logger.error(f"添加下载任务失败：{torrent_item.get('hash')}")
+                            continue
+                        # 成功计数
+                        success += 1
+                        to_hashes.add(download_id)
+                        added_hashes.append(torrent_item.get('hash'))
+                        download_ids.append(download_id)
+                        # 插入转种记录，中断后可据此恢复
+                        history_key = f"{from_service.name}-{torrent_item.get('hash')}"
+                        self.save_data(key=history_key,
+                                       value={
+                                           "to_download": to_service.name,
+                                           "to_download_id": download_id,
+                                           "delete_source": self._deletesource,
+                                           "delete_duplicate": self._deleteduplicate,
+                                       })
+
+                    if download_ids:
+                        logger.info(f"成功添加 {len(download_ids)} 个转移做种任务")
+                        # TR会自动校验，QB需要手动校验
+                        if self.downloader_helper.is_downloader("qbittorrent", service=to_service):
+                            logger.info(f"qbittorrent 开始校验 {len(download_ids)} 个任务 ...")
+                            to_downloader.recheck_torrents(ids=download_ids)
+                        # 追加校验任务
+                        self.__add_recheck_torrents(to_service.name, download_ids)
+                        # 删除源种子，不能删除文件！
+                        if self._deletesource:
+                            logger.info(f"删除源下载器任务（不含文件）：{len(added_hashes)} 个 ...")
+                            from_downloader.delete_torrents(delete_file=False, ids=added_hashes)
+
+                    logger.info(f"转移进度：{processed}/{total}，成功：{success}，失败：{fail}，"
+                                f"跳过：{skip}，删除重复：{del_dup}")
+
             # 触发校验任务
-            if success > 0 and self._autostart:
+            if self._autostart and self._recheck_torrents.get(to_service.name):
                 self.check_recheck()
 
             # 发送通知
@@ -843,6 +849,64 @@ class TorrentTransfer(_PluginBase):
             logger.info(f"没有需要转移的种子")
         logger.info("转移做种任务执行完成")
 
+    def __read_torrent(self, hash_str: str, from_service: ServiceInfo) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        读取种子文件内容，源下载器为QB时检查并补充Tracker
+        :return: 种子内容、错误信息
+        """
+        # 检查种子文件是否存在
+        torrent_file = Path(self._fromtorrentpath) / f"{hash_str}.torrent"
+        if not torrent_file.exists():
+            return None, f"种子文件不存在：{torrent_file}"
+        # 读取种子内容
+        content = torrent_file.read_bytes()
+        if not content:
+            return None, f"读取种子文件失败：{torrent_file}"
+        # 如果源下载器是QB检查是否有Tracker，没有的话额外获取
+        if not self.downloader_helper.is_downloader("qbittorrent", service=from_service):
+            return content, None
+        # 读取trackers
+        try:
+            torrent_main = bdecode(content)
+            main_announce = torrent_main.get('announce')
+        except Exception as err:
+            return None, f"解析种子文件 {torrent_file} 失败：{str(err)}"
+        if main_announce:
+            return content, None
+
+        logger.info(f"{hash_str} 未发现tracker信息，尝试补充tracker信息...")
+        # 读取fastresume文件
+        fastresume_file = Path(self._fromtorrentpath) / f"{hash_str}.fastresume"
+        if not fastresume_file.exists():
+            return None, f"fastresume文件不存在：{fastresume_file}"
+        # 尝试补充trackers
+        try:
+            # 解析fastresume文件
+            torrent_fastresume = bdecode(fastresume_file.read_bytes())
+            # 读取trackers
+            fastresume_trackers = torrent_fastresume.get('trackers')
+            if isinstance(fastresume_trackers, list) \
+                    and len(fastresume_trackers) > 0 \
+                    and fastresume_trackers[0]:
+                # 重新赋值
+                torrent_main['announce'] = fastresume_trackers[0][0]
+                # 保留其他tracker，避免单一tracker无法连接
+                if len(fastresume_trackers) > 1 or len(fastresume_trackers[0]) > 1:
+                    torrent_main['announce-list'] = fastresume_trackers
+                # 重新编码种子内容
+                content = bencode(torrent_main)
+        except Exception as err:
+            return None, f"解析fastresume文件 {fastresume_file} 出错：{str(err)}"
+        return content, None
+
+    def __add_recheck_torrents(self, service_name: str, download_ids: List[str]):
+        """
+        追加待检查的校验任务
+        """
+        logger.info(f"添加校验检查任务：{len(download_ids)} 个 ...")
+        recheck_torrents = self._recheck_torrents.setdefault(service_name, [])
+        recheck_torrents.extend(download_id for download_id in download_ids if download_id not in recheck_torrents)
+
     def check_recheck(self):
         """
         定时检查下载器中种子是否校验完成，校验完成且完整的自动开始辅种
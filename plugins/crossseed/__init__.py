@@ -1,10 +1,12 @@
 import hashlib
+import json
 import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
-from threading import Event
+from threading import Event, Lock
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pytz
@@ -28,10 +30,43 @@ from app.utils.string import StringUtils
 from app.utils.timer import TimerUtils
 
 
+class QueryTokenBucket(object):
+    """
+    令牌桶，按站点配置的查询请求间隔限制请求频率，代替每次请求后的固定等待
+    """
+
+    def __init__(self, interval: float, capacity: int = 1):
+        self._interval = max(0.0, float(interval or 0))
+        self._capacity = max(1, capacity)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        获取一个令牌，令牌不足时等待
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._interval > 0:
+                    self._tokens = min(self._capacity, self._tokens + (now - self._updated) / self._interval)
+                else:
+                    self._tokens = self._capacity
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self._interval
+            time.sleep(wait)
+
+
 class CSSiteConfig(object):
     """
     站点辅种配置类
     """
+    # 单次查询的最大pieces_hash数量
+    query_limit = 100
 
     def __init__(
             self,
@@ -52,6 +87,15 @@ class CSSiteConfig(object):
         self.ua = ua
         self.proxy = proxy
         self.query_gap = query_gap
+        self._token_bucket = None
+
+    def acquire_query(self):
+        """
+        按查询请求间隔等待，直到可以发起下一次查询
+        """
+        if not self._token_bucket:
+            self._token_bucket = QueryTokenBucket(interval=self.query_gap)
+        self._token_bucket.acquire()
 
     def get_api_url(self):
         if self.name == "憨憨":
@@ -166,11 +210,166 @@ class CrossSeedHelper(object):
                     remote_torrent_infos.append(
                         TorInfo.remote(site.name, pieces_hash, torrent_id)
                     )
-            time.sleep(site.query_gap)
         except requests.exceptions.RequestException as e:
             return None, f"站点{site.name}请求失败：{e}"
         return remote_torrent_infos, None
 
+    @staticmethod
+    def query_site_torrents(
+            site: CSSiteConfig,
+            pieces_hashes: List[str],
+            event: Event = None
+    ) -> List[TorInfo]:
+        """
+        按站点接口限制分批查询可辅种的种子，每次请求前通过令牌桶控制请求频率
+        """
+        remote_tors: List[TorInfo] = []
+        chunk_size = site.query_limit
+        total_size = len(pieces_hashes)
+        for i in range(0, total_size, chunk_size):
+            if event and event.is_set():
+                break
+            # 切片操作
+            chunk = pieces_hashes[i:i + chunk_size]
+            site.acquire_query()
+            chunk_tors, err_msg = CrossSeedHelper.get_target_torrent(site, chunk)
+            if not chunk_tors and err_msg:
+                logger.info(
+                    f"查询站点{site.name}可辅种的信息出错 {err_msg},进度={i + 1}/{total_size}"
+                )
+            else:
+                logger.info(
+                    f"站点{site.name}本批次的可辅种/查询数={len(chunk_tors)}/{len(chunk)},进度={i + 1}/{total_size}"
+                )
+                remote_tors.extend(chunk_tors)
+        logger.info(f"站点{site.name}返回可以辅种的种子总数为{len(remote_tors)}")
+        return remote_tors
+
+
+def parse_torrent_file(torrent_path: str) -> Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    解析本地种子文件
+    :return: 种子文件路径、info_hash、pieces_hash、announce、错误信息
+    """
+    local_tor, err = CrossSeedHelper.get_local_torrent_info(torrent_path)
+    if not local_tor:
+        return torrent_path, None, None, None, err
+    announce = local_tor.torrent_announce
+    if isinstance(announce, bytes):
+        announce = announce.decode("utf-8", "ignore")
+    return torrent_path, local_tor.info_hash, local_tor.pieces_hash, announce, None
+
+
+class TorrentInfoCache(object):
+    """
+    本地种子文件解析结果缓存，以文件路径+修改时间+大小判断种子文件是否变更，未变更的种子文件不再重复解析
+    缓存未命中的种子文件数量较多时使用线程池解析，不使用进程池以免在多线程的主进程中 fork 导致死锁
+    """
+    # 使用线程池解析的最少种子文件数量
+    _parallel_threshold = 50
+    # 线程池解析的总超时时间（秒），超时未完成的种子文件下次重新解析
+    _parse_timeout = 600
+
+    def __init__(self, cache_file: Path, workers: int = None):
+        self._cache_file = cache_file
+        self._workers = workers or min(4, os.cpu_count() or 1)
+        # 种子文件路径 -> [修改时间(ns), 大小, info_hash, pieces_hash, announce]
+        self._cache: Dict[str, list] = self.__load()
+        self._dirty = False
+
+    def __load(self) -> Dict[str, list]:
+        try:
+            if self._cache_file.exists():
+                return json.loads(self._cache_file.read_text(encoding="utf-8")) or {}
+        except Exception as err:
+            logger.warn(f"读取种子解析缓存失败，将重新解析种子文件：{err}")
+        return {}
+
+    def save(self):
+        """
+        保存缓存文件
+        """
+        if not self._dirty:
+            return
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self._cache_file.with_suffix(".tmp")
+            temp_file.write_text(json.dumps(self._cache, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_file, self._cache_file)
+            self._dirty = False
+        except Exception as err:
+            logger.warn(f"保存种子解析缓存失败：{err}")
+
+    def __parse(self, torrent_paths: List[str]) -> List[Tuple[str, Optional[str], Optional[str],
+                                                              Optional[str], Optional[str]]]:
+        if len(torrent_paths) < self._parallel_threshold or self._workers <= 1:
+            return [parse_torrent_file(torrent_path) for torrent_path in torrent_paths]
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="CrossSeed-Parse")
+        futures = {executor.submit(parse_torrent_file, torrent_path): torrent_path for torrent_path in torrent_paths}
+        try:
+            for future in as_completed(futures, timeout=self._parse_timeout):
+                torrent_path = futures[future]
+                try:
+                    results[torrent_path] = future.result()
+                except Exception as err:
+                    results[torrent_path] = (torrent_path, None, None, None, str(err))
+        except FutureTimeoutError:
+            logger.warn(f"解析种子文件超时，{len(torrent_paths) - len(results)} 个种子文件将在下次重新解析")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return [results.get(torrent_path) or (torrent_path, None, None, None, "解析种子文件超时")
+                for torrent_path in torrent_paths]
+
+    def get_torrent_infos(self, torrent_paths: List[Path]) -> Dict[str, Tuple[Optional[TorInfo], str]]:
+        """
+        批量获取种子文件信息
+        :return: 种子文件路径 -> (种子信息, 错误信息)
+        """
+        results: Dict[str, Tuple[Optional[TorInfo], str]] = {}
+        misses: Dict[str, Tuple[int, int]] = {}
+        for torrent_path in torrent_paths:
+            key = str(torrent_path)
+            try:
+                stat = os.stat(key)
+            except OSError as err:
+                results[key] = (None, str(err))
+                continue
+            cached = self._cache.get(key)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                results[key] = (self.__to_tor_info(key, cached), "")
+            else:
+                misses[key] = (stat.st_mtime_ns, stat.st_size)
+
+        if misses:
+            logger.info(f"共 {len(torrent_paths)} 个种子文件，{len(misses)} 个需要重新解析 ...")
+            for key, info_hash, pieces_hash, announce, err in self.__parse(list(misses.keys())):
+                if not info_hash:
+                    results[key] = (None, err)
+                    self._cache.pop(key, None)
+                    continue
+                mtime, size = misses[key]
+                cached = [mtime, size, info_hash, pieces_hash, announce]
+                self._cache[key] = cached
+                results[key] = (self.__to_tor_info(key, cached), "")
+            self._dirty = True
+
+        # 清理同目录下已不存在的种子文件缓存
+        folders = {os.path.dirname(str(torrent_path)) for torrent_path in torrent_paths}
+        stale_keys = [key for key in self._cache.keys()
+                      if key not in results and os.path.dirname(key) in folders]
+        for key in stale_keys:
+            del self._cache[key]
+        if stale_keys:
+            self._dirty = True
+        return results
+
+    @staticmethod
+    def __to_tor_info(torrent_path: str, cached: list) -> TorInfo:
+        local_tor = TorInfo.local(torrent_path=torrent_path, info_hash=cached[2], pieces_hash=cached[3])
+        local_tor.torrent_announce = cached[4]
+        return local_tor
+
 
 class CrossSeed(_PluginBase):
     # 插件名称
@@ -180,7 +379,7 @@ class CrossSeed(_PluginBase):
     # 插件图标
     plugin_icon = "qingwa.png"
     # 插件版本
-    plugin_version = "2.4"
+    plugin_version = "2.7.2"
     # 插件作者
     plugin_author = "233@qingwa"
     # 作者主页
@@ -226,6 +425,15 @@ class CrossSeed(_PluginBase):
     _permanent_error_caches = []
     _torrentpaths = []
     _site_cs_infos = []
+    # 本地种子文件解析结果缓存
+    _torrent_info_cache = None
+    # passkey -> 站点名称
+    _passkey_site_map: Dict[str, str] = {}
+    # 本次辅种中 tracker -> 站点名称（passkey匹配）、域名 -> 站点名称 的解析结果
+    _tracker_site_cache: Dict[str, Optional[str]] = {}
+    _domain_site_cache: Dict[str, Optional[str]] = {}
+    # 同时查询的站点数量
+    _query_workers = 5
     # 辅种计数
     total = 0
     realtotal = 0
@@ -320,6 +528,10 @@ class CrossSeed(_PluginBase):
                 if site_query_gap:
                     site_cs_info.query_gap = site_query_gap
                 self._site_cs_infos.append(site_cs_info)
+            # 同一passkey只保留第一个站点，与按站点顺序匹配的结果一致
+            self._passkey_site_map = {}
+            for site_cs_info in self._site_cs_infos:
+                self._passkey_site_map.setdefault(site_cs_info.passkey, site_cs_info.name)
 
             self.__update_config()
 
@@ -329,6 +541,7 @@ class CrossSeed(_PluginBase):
         # 启动定时任务 & 立即运行一次
         if self.get_state() or self._onlyonce:
             self.cross_helper = CrossSeedHelper()
+            self._torrent_info_cache = TorrentInfoCache(cache_file=self.get_data_path() / "torrent_info_cache.json")
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
             self.qb = Qbittorrent()
             self.tr = Transmission()
@@ -765,6 +978,8 @@ class CrossSeed(_PluginBase):
         self.exist = 0
         self.fail = 0
         self.cached = 0
+        self._tracker_site_cache = {}
+        self._domain_site_cache = {}
         # 扫描下载器辅种
         for idx, downloader in enumerate(self._downloaders):
             logger.info(f"开始扫描下载器 {downloader} ...")
@@ -776,6 +991,13 @@ class CrossSeed(_PluginBase):
             else:
                 logger.info(f"下载器 {downloader} 没有已完成种子")
                 continue
+            # 批量读取种子文件具体信息，未变更的种子文件使用缓存，已缓存失败的种子不再解析
+            error_caches = set(self._error_caches) | set(self._permanent_error_caches)
+            local_torrent_infos = self._torrent_info_cache.get_torrent_infos(
+                [Path(self._torrentpaths[idx]) / f"{hash_str}.torrent"
+                 for hash_str in (self.__get_hash(torrent, downloader) for torrent in torrents)
+                 if hash_str not in error_caches])
+            self._torrent_info_cache.save()
             hash_strs = []
             for torrent in torrents:
                 if self._event.is_set():
@@ -783,7 +1005,7 @@ class CrossSeed(_PluginBase):
                     return
                     # 获取种子hash
                 hash_str = self.__get_hash(torrent, downloader)
-                if hash_str in self._error_caches or hash_str in self._permanent_error_caches:
+                if hash_str in error_caches:
                     logger.info(f"种子 {hash_str} 辅种失败且已缓存，跳过 ...")
                     continue
                 save_path = self.__get_save_path(torrent, downloader)
@@ -809,7 +1031,7 @@ class CrossSeed(_PluginBase):
 
                 # 读取种子文件具体信息
                 if not torrent_info:
-                    torrent_info, err = self.cross_helper.get_local_torrent_info(torrent_path)
+                    torrent_info, err = local_torrent_infos.get(str(torrent_path)) or (None, "")
                     if not torrent_info:
                         logger.error(f"未能读取到种子文件具体信息：{torrent_path} {err}")
                         continue
@@ -818,9 +1040,10 @@ class CrossSeed(_PluginBase):
                 tracker_urls = set()
                 try:
                     if downloader == "qbittorrent":
-                        for i in torrent.trackers:
-                            if "https" in i.get("url"):
-                                tracker_urls.add(i.get("url"))
+                        # 优先使用种子列表中已返回的当前tracker，避免逐个种子请求tracker列表
+                        current_tracker = torrent.get("tracker")
+                        if current_tracker and "https" in current_tracker:
+                            tracker_urls.add(current_tracker)
                     elif downloader == "transmission":
                         if torrent_info and torrent_info.torrent_announce:
                             if "https" in torrent_info.torrent_announce:
@@ -828,18 +1051,15 @@ class CrossSeed(_PluginBase):
                 except Exception as err:
                     logger.warn(f"尝试获取 {downloader} 的tracker出错 {err}")
                 # 根据tracker补充站点信息
-                for tracker in tracker_urls:
-                    # 优先通过passkey获取站点名
-                    for site_config in self._site_cs_infos:
-                        if site_config.passkey in tracker:
-                            torrent_info.site_name = site_config.name
-                            break
-                    if not torrent_info.site_name:
-                        # 尝试通过域名获取站点信息
-                        tracker_domain = StringUtils.get_url_domain(tracker)
-                        site_info = self.sites.get_indexer(tracker_domain)
-                        if site_info:
-                            torrent_info.site_name = site_info.get("name")
+                self.__fill_site_name(torrent_info, tracker_urls)
+                if downloader == "qbittorrent" and not torrent_info.site_name:
+                    # 当前tracker未能识别站点时，再从完整的tracker列表中识别
+                    try:
+                        backup_urls = {i.get("url") for i in torrent.trackers
+                                       if i.get("url") and "https" in i.get("url")} - tracker_urls
+                        self.__fill_site_name(torrent_info, backup_urls)
+                    except Exception as err:
+                        logger.warn(f"尝试获取 {downloader} 的tracker出错 {err}")
 
                 if self._nopaths and save_path:
                     # 过滤不需要转移的路径
@@ -891,6 +1111,49 @@ class CrossSeed(_PluginBase):
                 )
         logger.info("辅种任务执行完成")
 
+    def __fill_site_name(self, torrent_info: TorInfo, tracker_urls: set):
+        """
+        根据tracker补充种子的站点名
+        """
+        for tracker in tracker_urls:
+            # 优先通过passkey获取站点名
+            site_name = self.__get_site_name_by_passkey(tracker)
+            if site_name:
+                torrent_info.site_name = site_name
+            if not torrent_info.site_name:
+                # 尝试通过域名获取站点信息
+                torrent_info.site_name = self.__get_site_name_by_domain(tracker)
+
+    def __get_site_name_by_passkey(self, tracker: str) -> Optional[str]:
+        """
+        根据tracker中的passkey获取站点名称，同一tracker只解析一次
+        """
+        if tracker in self._tracker_site_cache:
+            return self._tracker_site_cache[tracker]
+        site_name = None
+        # passkey通常为tracker地址中的路径或参数值，优先直接查找
+        for token in re.split(r"[/?&=]", tracker):
+            if token in self._passkey_site_map:
+                site_name = self._passkey_site_map[token]
+                break
+        if not site_name:
+            for site_config in self._site_cs_infos:
+                if site_config.passkey in tracker:
+                    site_name = site_config.name
+                    break
+        self._tracker_site_cache[tracker] = site_name
+        return site_name
+
+    def __get_site_name_by_domain(self, tracker: str) -> Optional[str]:
+        """
+        根据tracker域名获取站点名称，同一域名只查询一次
+        """
+        tracker_domain = StringUtils.get_url_domain(tracker)
+        if tracker_domain not in self._domain_site_cache:
+            site_info = self.sites.get_indexer(tracker_domain)
+            self._domain_site_cache[tracker_domain] = site_info.get("name") if site_info else None
+        return self._domain_site_cache[tracker_domain]
+
     def check_recheck(self):
         """
         定时检查下载器中种子是否校验完成，校验完成且完整的自动开始辅种
@@ -954,60 +1217,44 @@ class CrossSeed(_PluginBase):
         logger.info(f"去重后，总共需要辅种查询的种子数：{len(pieces_hash_set)}")
         pieces_hashes = list(pieces_hash_set)
 
-        # 分站点逐个批次辅种
-        # 逐个站点查询可辅种数据
-        chunk_size = 100
+        # 检查站点是否已经停用
+        site_configs = []
         for site_config in self._site_cs_infos:
-            # 检查站点是否已经停用
             db_site = self.siteoper.get(site_config.id)
             if db_site and not db_site.is_active:
                 logger.info(f"站点{site_config.name}已停用，跳过辅种")
                 continue
-            remote_tors: List[TorInfo] = []
-            total_size = len(pieces_hashes)
-            for i in range(0, len(pieces_hashes), chunk_size):
-                if self._event.is_set():
-                    logger.info(f"辅种服务停止")
-                    return
-                # 切片操作
-                chunk = pieces_hashes[i:i + chunk_size]
-                # 处理分组
-                chunk_tors, err_msg = self.cross_helper.get_target_torrent(site_config, chunk)
-                if not chunk_tors and err_msg:
-                    logger.info(
-                        f"查询站点{site_config.name}可辅种的信息出错 {err_msg},进度={i + 1}/{total_size}"
-                    )
-                else:
-                    logger.info(
-                        f"站点{site_config.name}本批次的可辅种/查询数={len(chunk_tors)}/{len(chunk)},进度={i + 1}/{total_size}"
-                    )
-                    remote_tors = remote_tors + chunk_tors
+            site_configs.append(site_config)
+        if not site_configs:
+            return
 
-            logger.info(f"站点{site_config.name}返回可以辅种的种子总数为{len(remote_tors)}")
+        # 各站点并发查询可辅种数据，同一站点的请求按各自的请求间隔限速
+        with ThreadPoolExecutor(max_workers=min(self._query_workers, len(site_configs))) as executor:
+            site_results = list(executor.map(
+                lambda site: (site, self.cross_helper.query_site_torrents(site, pieces_hashes, self._event)),
+                site_configs))
+        if self._event.is_set():
+            logger.info(f"辅种服务停止")
+            return
 
-            # 去除已经下载过的种子
+        # 合并为 pieces_hash -> [(站点, 种子id)] 索引，并去除已经下载过的种子
+        remote_index: Dict[str, List[Tuple[CSSiteConfig, TorInfo]]] = {}
+        for site_config, remote_tors in site_results:
             local_cnt = 0
-            not_local_tors = []
             for tor_info in remote_tors:
-                if (
-                        tor_info
-                        and tor_info.site_name
-                        and tor_info.pieces_hash
-                        and tor_info.get_name_pieces_tag() in site_pieces_hash_set
-                ):
+                if not tor_info or not tor_info.torrent_id or not tor_info.pieces_hash:
+                    continue
+                if tor_info.site_name and tor_info.get_name_pieces_tag() in site_pieces_hash_set:
                     local_cnt = local_cnt + 1
-                else:
-                    not_local_tors.append(tor_info)
+                    continue
+                remote_index.setdefault(tor_info.pieces_hash, []).append((site_config, tor_info))
             logger.info(f"站点{site_config.name}正在做种或已经辅种过的种子数为{local_cnt}")
 
-            for tor_info in not_local_tors:
+        for pieces_hash, remote_tors in remote_index.items():
+            for site_config, tor_info in remote_tors:
                 if self._event.is_set():
                     logger.info(f"辅种服务停止")
                     return
-                if not tor_info:
-                    continue
-                if not tor_info.torrent_id or not tor_info.pieces_hash:
-                    continue
                 if tor_info.get_name_id_tag() in self._success_caches:
                     logger.info(f"{tor_info.get_name_id_tag()} 已处理过辅种，跳过 ...")
                     continue
@@ -1017,7 +1264,7 @@ class CrossSeed(_PluginBase):
                 # 添加任务
                 self.__download_torrent(tor=tor_info, site_config=site_config,
                                         downloader=downloader,
-                                        save_path=save_paths.get(tor_info.pieces_hash))
+                                        save_path=save_paths.get(pieces_hash))
 
         logger.info(f"下载器 {downloader} 辅种完成")
 